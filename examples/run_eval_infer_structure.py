@@ -3,8 +3,6 @@ from pathlib import Path
 from pprint import pprint
 
 import yaml
-from langchain.globals import set_llm_cache
-from langchain_community.cache import SQLiteCache
 from loguru import logger
 
 from structured_evals import (
@@ -21,8 +19,6 @@ SCHEMA_FILE = "data/franc_loans_schema.yaml"
 PRED_FILE = "data/sample_franc_loans.json"
 SAVE_FILE = ".local/results.json"
 
-set_llm_cache(SQLiteCache(database_path=".langchain_cache.db"))
-
 logger.info("Loading data")
 eval_batch = EvaluationBatch.from_json(
     path=PRED_FILE,
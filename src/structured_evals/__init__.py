@@ -2,9 +2,10 @@ __version__ = "0.1.0"
 
 from .base import EvaluatorBase
 from .eval_batch import BatchDictEval, BatchDictEvalOutput
+from .eval_cascade import CascadeTextEval
 from .eval_dict import DictEval, DictEvalOutput
 from .eval_primitive import DateEval, NumEval
-from .eval_text import EvalTextualMetric
+from .eval_text import ChrfEval, EvalTextualMetric
 from .infer_from_schema import infer_structured_evaluator_from_schema
 from .infer_from_targets import infer_structured_evaluator_from_predictions
 from .loader import EvaluationBatch, load_json, load_jsonl
@@ -17,6 +18,8 @@ __all__ = [
     "DictEvalOutput",
     "DictEval",
     "EvalTextualMetric",
+    "ChrfEval",
+    "CascadeTextEval",
     "NumEval",
     "DateEval",
     "load_json",
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any, Literal
+from typing import Any, Generic, Literal, TypeVar
 
 import numpy as np
+from pydantic import BaseModel
 
 from structured_evals import BatchDictEvalOutput
 
@@ -13,41 +14,152 @@ def get_aggregation(aggregation: str) -> "Aggregation":
         raise ValueError(f"Unsupported aggregation: {aggregation}")
 
 
-class Aggregation(ABC):
-    @abstractmethod
-    def __call__(self, outs: BatchDictEvalOutput) -> dict[str, Any]:
-        raise NotImplementedError("Aggregation subclasses must implement __call__")
+class AggregationState(BaseModel):
+    """Sufficient statistics of an aggregation, serializable and mergeable across partial results."""
+
+    num_items: int = 0
+
+
+T_state = TypeVar("T_state", bound=AggregationState)
 
 
-class AverageAggregation(Aggregation):
+class Aggregation(ABC, Generic[T_state]):
+    """Aggregation computed from accumulated state.
+
+    State is updated incrementally with batches of outputs, and states of partial results
+    (e.g. chunks, shards or processes) can be merged in any order before `finalize`.
+    """
+
     def __call__(self, outs: BatchDictEvalOutput) -> dict[str, Any]:
-        mean: dict[str, Any] = {}
-        standard_error: dict[str, Any] = {}
-        mean_times_missing: dict[str, Any] = {}
-        mean_times_extra: dict[str, Any] = {}
+        return self.finalize(self.get_state(outs))
+
+    @abstractmethod
+    def init_state(self, schema_keys: list[str]) -> T_state:
+        """Returns empty state, being an identity of `merge`."""
+
+    @abstractmethod
+    def get_state(self, outs: BatchDictEvalOutput) -> T_state:
+        """Computes state of a single batch of outputs."""
+
+    @abstractmethod
+    def merge(self, state: T_state, other: T_state) -> T_state:
+        """Associatively combines two states into a new one."""
+
+    @abstractmethod
+    def finalize(self, state: T_state) -> dict[str, Any]:
+        """Computes aggregated scores from state."""
+
+    def update(self, state: T_state, outs: BatchDictEvalOutput) -> T_state:
+        return self.merge(state, self.get_state(outs))
+
+    def merge_all(self, states: list[T_state]) -> T_state:
+        assert states, "At least one state is required to merge"
+        merged = states[0]
+        for state in states[1:]:
+            merged = self.merge(merged, state)
+        return merged
+
+
+class AverageAggregationState(AggregationState):
+    """Per-key mean and sum of squared deviations (Welford), with missing/extra key counts."""
 
-        for key in outs.scores:
-            mean[key] = float(np.mean(outs.scores[key]))
-            standard_error[key] = float(np.std(outs.scores[key]) / np.sqrt(outs.num_items))
+    schema_keys: list[str]
+    mean: list[float]
+    m2: list[float]
+    num_missing: list[int]
+    num_extra: dict[str, int]
 
-        for key in outs.missing_keys:
-            if outs.missing_keys[key]:
-                mean_times_missing[key] = float(np.mean(outs.missing_keys[key]))
-            else:
-                mean_times_missing[key] = 0.0
 
-        for key in outs.num_times_extra_keys:
-            mean_times_extra[key] = outs.num_times_extra_keys[key] / outs.num_items
+class AverageAggregation(Aggregation[AverageAggregationState]):
+    def init_state(self, schema_keys: list[str]) -> AverageAggregationState:
+        return AverageAggregationState(
+            schema_keys=schema_keys,
+            mean=[0.0] * len(schema_keys),
+            m2=[0.0] * len(schema_keys),
+            num_missing=[0] * len(schema_keys),
+            num_extra={},
+        )
 
+    def get_state(self, outs: BatchDictEvalOutput) -> AverageAggregationState:
+        if not outs.num_items:
+            return self.init_state(outs.schema_keys)
+
+        scores = outs.score_matrix.astype(np.float64)
+        mean = scores.mean(axis=0)
+        return AverageAggregationState(
+            num_items=outs.num_items,
+            schema_keys=outs.schema_keys,
+            mean=mean.tolist(),
+            m2=((scores - mean) ** 2).sum(axis=0).tolist(),
+            num_missing=outs.missing_mask.sum(axis=0).tolist(),
+            num_extra=outs.num_times_extra_keys,
+        )
+
+    def merge(
+        self, state: AverageAggregationState, other: AverageAggregationState
+    ) -> AverageAggregationState:
+        if state.schema_keys != other.schema_keys:
+            raise ValueError("Cannot merge states computed for different schema keys")
+        if not state.num_items or not other.num_items:
+            return state if state.num_items else other
+
+        # parallel variant of Welford's algorithm (Chan et al.)
+        num_items = state.num_items + other.num_items
+        mean, other_mean = np.array(state.mean), np.array(other.mean)
+        delta = other_mean - mean
+        num_extra = dict(state.num_extra)
+        for key, num_times in other.num_extra.items():
+            num_extra[key] = num_extra.get(key, 0) + num_times
+
+        return AverageAggregationState(
+            num_items=num_items,
+            schema_keys=state.schema_keys,
+            mean=(mean + delta * other.num_items / num_items).tolist(),
+            m2=(
+                np.array(state.m2)
+                + np.array(other.m2)
+                + delta**2 * state.num_items * other.num_items / num_items
+            ).tolist(),
+            num_missing=(np.array(state.num_missing) + np.array(other.num_missing)).tolist(),
+            num_extra=num_extra,
+        )
+
+    def finalize(self, state: AverageAggregationState) -> dict[str, Any]:
+        keys = state.schema_keys
+        if not state.num_items:
+            nan = [float("nan")] * len(keys)
+            return {
+                "mean": dict(zip(keys, nan)),
+                "standard_error": dict(zip(keys, nan)),
+                "mean_times_missing": dict.fromkeys(keys, 0.0),
+                "mean_times_extra": {},
+            }
+
+        std = np.sqrt(np.array(state.m2) / state.num_items)
         return {
-            "mean": mean,
-            "standard_error": standard_error,
-            "mean_times_missing": mean_times_missing,
-            "mean_times_extra": mean_times_extra,
+            "mean": dict(zip(keys, state.mean)),
+            "standard_error": dict(zip(keys, (std / np.sqrt(state.num_items)).tolist())),
+            "mean_times_missing": dict(
+                zip(keys, (np.array(state.num_missing) / state.num_items).tolist())
+            ),
+            "mean_times_extra": {
+                key: num_times / state.num_items for key, num_times in state.num_extra.items()
+            },
         }
 
 
-class F1ScoreAggregation(Aggregation):
+class F1ScoreAggregationState(AggregationState):
+    """Sums of counts for micro average and of per-item metrics for macro average."""
+
+    relevant_retrieved: float = 0.0
+    all_retrieved: float = 0.0
+    all_relevant: float = 0.0
+    precision_sum: float = 0.0
+    recall_sum: float = 0.0
+    f1_sum: float = 0.0
+
+
+class F1ScoreAggregation(Aggregation[F1ScoreAggregationState]):
     """Aggregates F1 score, precision, and recall for multiple evaluations.
     - Precision: measures the proportion of relevant keys extracted by a model among all the extracted items.
     - Recall: measures the proportion of relevant keys extracted by a model among all the relevant items.
@@ -70,65 +182,76 @@ class F1ScoreAggregation(Aggregation):
         self.mode = mode
         self.average = average
 
-    def __call__(self, outs: BatchDictEvalOutput) -> dict[str, Any]:
-        # TODO: refactor with new signature of BatchDictEvalOutput
-        relevant_retrieved: list[float] = []
-        all_retrieved: list[int] = []
-        all_relevant: list[int] = []
-
-        for out in outs.item_results:
-            all_retrieved.append(len(out.results) + len(out.extra_keys) - len(out.missing_keys))
-            all_relevant.append(len(out.results.values()))
-
-            if self.mode == "hard":
-                relevant_retrieved.append(sum(float(val.score > 0) for val in out.results.values()))
-            elif self.mode == "soft":
-                relevant_retrieved.append(sum(val.score for val in out.results.values()))
-            else:
-                raise ValueError(f"Unsupported mode: {self.mode}")
+    def init_state(self, schema_keys: list[str]) -> F1ScoreAggregationState:
+        return F1ScoreAggregationState()
 
+    def get_state(self, outs: BatchDictEvalOutput) -> F1ScoreAggregationState:
+        num_keys = len(outs.schema_keys)
+        all_relevant = np.full(outs.num_items, num_keys, dtype=np.float64)
+        all_retrieved = (
+            num_keys + outs.num_extra_keys_per_item - outs.missing_mask.sum(axis=1)
+        ).astype(np.float64)
+
+        scores = outs.score_matrix.astype(np.float64)
+        if self.mode == "hard":
+            relevant_retrieved = (scores > 0).sum(axis=1).astype(np.float64)
+        elif self.mode == "soft":
+            relevant_retrieved = scores.sum(axis=1)
+        else:
+            raise ValueError(f"Unsupported mode: {self.mode}")
+
+        precisions = _safe_divide(relevant_retrieved, all_retrieved)
+        recalls = _safe_divide(relevant_retrieved, all_relevant)
+        f1_scores = _safe_divide(2 * precisions * recalls, precisions + recalls)
+        return F1ScoreAggregationState(
+            num_items=outs.num_items,
+            relevant_retrieved=float(relevant_retrieved.sum()),
+            all_retrieved=float(all_retrieved.sum()),
+            all_relevant=float(all_relevant.sum()),
+            precision_sum=float(precisions.sum()),
+            recall_sum=float(recalls.sum()),
+            f1_sum=float(f1_scores.sum()),
+        )
+
+    def merge(
+        self, state: F1ScoreAggregationState, other: F1ScoreAggregationState
+    ) -> F1ScoreAggregationState:
+        return F1ScoreAggregationState(
+            **{
+                field: getattr(state, field) + getattr(other, field)
+                for field in F1ScoreAggregationState.model_fields
+            }
+        )
+
+    def finalize(self, state: F1ScoreAggregationState) -> dict[str, Any]:
         if self.average == "micro":
-            return self._micro_average(relevant_retrieved, all_retrieved, all_relevant)
+            return self._micro_average(state)
         elif self.average == "macro":
-            return self._macro_average(relevant_retrieved, all_retrieved, all_relevant)
+            return self._macro_average(state)
         else:
             raise ValueError(f"Unsupported average: {self.average}")
 
     @staticmethod
-    def _micro_average(
-        relevant_retrieved: list[float],
-        all_retrieved: list[int],
-        all_relevant: list[int],
-    ) -> dict[str, float]:
-        precision = sum(relevant_retrieved) / sum(all_retrieved)
-        recall = sum(relevant_retrieved) / sum(all_relevant)
+    def _micro_average(state: F1ScoreAggregationState) -> dict[str, float]:
+        precision = state.relevant_retrieved / state.all_retrieved
+        recall = state.relevant_retrieved / state.all_relevant
         f1 = 2 * precision * recall / (precision + recall)
         return {"f1": f1, "precision": precision, "recall": recall}
 
     @staticmethod
-    def _macro_average(
-        relevant_retrieved: list[float],
-        all_retrieved: list[int],
-        all_relevant: list[int],
-    ) -> dict[str, float]:
-        num_items = len(relevant_retrieved)
-        precisions = [
-            relevant_retrieved[i] / all_retrieved[i] if all_retrieved[i] != 0 else 0
-            for i in range(num_items)
-        ]
-        recalls = [
-            relevant_retrieved[i] / all_relevant[i] if all_relevant[i] != 0 else 0
-            for i in range(num_items)
-        ]
-        f1_scores = [
-            (
-                2 * precisions[i] * recalls[i] / (precisions[i] + recalls[i])
-                if precisions[i] + recalls[i] != 0
-                else 0
-            )
-            for i in range(num_items)
-        ]
-        precision = sum(precisions) / num_items
-        recall = sum(recalls) / num_items
-        f1 = sum(f1_scores) / num_items
-        return {"f1": f1, "precision": precision, "recall": recall}
+    def _macro_average(state: F1ScoreAggregationState) -> dict[str, float]:
+        return {
+            "f1": state.f1_sum / state.num_items,
+            "precision": state.precision_sum / state.num_items,
+            "recall": state.recall_sum / state.num_items,
+        }
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division, yielding 0 where denominator is 0."""
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros_like(numerator, dtype=np.float64),
+        where=denominator != 0,
+    )
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def linear_sum_assignment(cost: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Solves rectangular linear sum assignment problem (minimal cost matching) in O(n^2 * m).
+
+    Hungarian algorithm with shortest augmenting paths and dual potentials (Jonker-Volgenant
+    flavour), with updates over columns vectorized. Mirrors `scipy.optimize.linear_sum_assignment`
+    without depending on scipy.
+
+    Args:
+        cost: (num_rows, num_cols) matrix of finite costs
+
+    Returns:
+        row and column indices of assigned pairs, sorted by row index; min(num_rows, num_cols)
+        pairs are returned
+    """
+    cost = np.asarray(cost, dtype=float)
+    if cost.ndim != 2:
+        raise ValueError(f"Expected 2-D cost matrix, got shape {cost.shape}")
+    if not np.isfinite(cost).all():
+        raise ValueError("Cost matrix must contain only finite values")
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    num_rows, num_cols = cost.shape
+
+    # index 0 is a virtual column, rows and columns are 1-based below
+    u = np.zeros(num_rows + 1)
+    v = np.zeros(num_cols + 1)
+    col_to_row = np.zeros(num_cols + 1, dtype=np.int64)
+    way = np.zeros(num_cols + 1, dtype=np.int64)
+
+    for row in range(1, num_rows + 1):
+        col_to_row[0] = row
+        col = 0
+        min_slack = np.full(num_cols + 1, np.inf)
+        used = np.zeros(num_cols + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current_row = col_to_row[col]
+            free = ~used[1:]
+            slack = cost[current_row - 1] - u[current_row] - v[1:]
+            improved = free & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = col
+
+            free_slack = np.where(free, min_slack[1:], np.inf)
+            next_col = int(np.argmin(free_slack)) + 1
+            delta = free_slack[next_col - 1]
+
+            used_cols = np.flatnonzero(used)
+            u[col_to_row[used_cols]] += delta
+            v[used_cols] -= delta
+            min_slack[1:][free] -= delta
+
+            col = next_col
+            if col_to_row[col] == 0:
+                break
+
+        # augments matching along the found path
+        while col:
+            prev_col = way[col]
+            col_to_row[col] = col_to_row[prev_col]
+            col = prev_col
+
+    assigned_cols = np.flatnonzero(col_to_row[1:])
+    rows = col_to_row[1:][assigned_cols] - 1
+    if transposed:
+        rows, assigned_cols = assigned_cols, rows
+    order = np.argsort(rows)
+    return rows[order], assigned_cols[order]
@@ -1,6 +1,12 @@
+import functools
+import hashlib
+import json
+import types
 from abc import ABC, abstractmethod
-from typing import Generic, Literal, TypeVar
+from typing import Any, Generic, Literal, Sequence, TypeVar
 
+import numpy as np
+from pydantic import ConfigDict, Field
 from pydantic.main import BaseModel
 
 T_in = TypeVar("T_in")
@@ -37,9 +43,249 @@ class EvaluatorBase(ABC, Generic[T_in, T_out]):
     def name(self) -> str:
         return self.__name or self.__class__.__name__
 
+    @property
+    def io_bound(self) -> bool:
+        """Whether evaluation mostly waits for external services (e.g. LLM API) instead of CPU."""
+        return False
+
+    @property
+    def fingerprint(self) -> str | None:
+        """Identifies configuration of evaluator, which scores equal pairs equally as long as its
+        fingerprint doesn't change. Built from public attributes, see `_fingerprint_params`.
+
+        None when some parameter can't be fingerprinted (e.g. an opaque object), as then there's
+        no telling whether two evaluators score equally.
+        """
+        try:
+            params = self._fingerprint_params()
+        except (_UnfingerprintableError, RecursionError):
+            # RecursionError comes from self-referencing parameters, e.g. recursive closures
+            return None
+        payload = json.dumps(
+            [self.__class__.__module__, self.__class__.__qualname__, params],
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _fingerprint_params(self) -> dict[str, Any]:
+        """Parameters affecting scores, override when public attributes hold runtime objects."""
+        return {
+            attr: _fingerprint_value(value, owner=self)
+            for attr, value in vars(self).items()
+            if not attr.startswith("_")
+        }
+
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(name={self.name})"
 
 
 class ItemEvalOutput(BaseModel):
     score: float
+
+
+class ColumnEvalOutput(BaseModel):
+    """Outputs of a single evaluator over a column of items, stored as arrays.
+
+    Scores and remaining fields of `output_type` are kept as numpy arrays, item outputs are
+    materialized only on demand. Outputs which can't be stored column-wise (mixed types, outputs
+    without score) are kept as objects.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    scores: np.ndarray
+    output_type: type[BaseModel] = ItemEvalOutput
+    item_fields: dict[str, np.ndarray] = Field(default_factory=dict)
+    objects: list[Any] | None = None
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @classmethod
+    def from_items(cls, items: Sequence[Any]) -> "ColumnEvalOutput":
+        output_types = {type(item) for item in items}
+        if len(output_types) != 1 or not issubclass(
+            output_type := output_types.pop(), ItemEvalOutput
+        ):
+            return cls(
+                scores=np.array([getattr(item, "score", np.nan) for item in items], dtype=float),
+                objects=list(items),
+            )
+
+        return cls(
+            scores=np.array([item.score for item in items], dtype=float),
+            output_type=output_type,
+            item_fields={
+                field: _to_column([getattr(item, field) for item in items])
+                for field in output_type.model_fields
+                if field != "score"
+            },
+        )
+
+    @classmethod
+    def repeat(cls, item: Any, num_items: int) -> "ColumnEvalOutput":
+        return cls.from_items([item]).take(np.zeros(num_items, dtype=np.int64))
+
+    @classmethod
+    def concat(cls, columns: Sequence["ColumnEvalOutput"]) -> "ColumnEvalOutput":
+        non_empty = [col for col in columns if len(col)] or list(columns[:1])
+        first = non_empty[0]
+        if any(
+            col.objects is not None
+            or col.output_type is not first.output_type
+            or col.item_fields.keys() != first.item_fields.keys()
+            for col in non_empty
+        ):
+            return cls.from_items([item for col in non_empty for item in col.to_items()])
+
+        return cls(
+            scores=np.concatenate([col.scores for col in non_empty]),
+            output_type=first.output_type,
+            item_fields={
+                field: np.concatenate([col.item_fields[field] for col in non_empty])
+                for field in first.item_fields
+            },
+        )
+
+    @classmethod
+    def merge(
+        cls,
+        mask: np.ndarray,
+        masked: "ColumnEvalOutput",
+        unmasked: "ColumnEvalOutput",
+    ) -> "ColumnEvalOutput":
+        """Interleaves two columns, `masked` items go to positions where `mask` is True."""
+        assert mask.sum() == len(masked) and (~mask).sum() == len(unmasked)
+        positions = np.empty(len(mask), dtype=np.int64)
+        positions[mask] = np.arange(len(masked))
+        positions[~mask] = len(masked) + np.arange(len(unmasked))
+        return cls.concat([masked, unmasked]).take(positions)
+
+    def take(self, indices: np.ndarray) -> "ColumnEvalOutput":
+        return self.__class__(
+            scores=self.scores[indices],
+            output_type=self.output_type,
+            item_fields={field: values[indices] for field, values in self.item_fields.items()},
+            objects=[self.objects[i] for i in indices] if self.objects is not None else None,
+        )
+
+    def item(self, idx: int) -> Any:
+        if self.objects is not None:
+            return self.objects[idx]
+        return self.output_type(
+            score=float(self.scores[idx]),
+            **{field: _to_python(values[idx]) for field, values in self.item_fields.items()},
+        )
+
+    def to_items(self) -> list[Any]:
+        if self.objects is not None:
+            return list(self.objects)
+        fields = list(self.item_fields.keys())
+        columns = [self.scores.tolist()] + [self.item_fields[field].tolist() for field in fields]
+        return [
+            self.output_type(**dict(zip(["score", *fields], values, strict=True)))
+            for values in zip(*columns, strict=True)
+        ]
+
+
+def evaluate_as_column(
+    evaluator: EvaluatorBase,
+    pred: list[Any],
+    target: list[Any],
+) -> ColumnEvalOutput:
+    """Evaluates pairs with the fastest path evaluator provides, returning outputs as column."""
+    if not pred:
+        return ColumnEvalOutput.repeat(evaluator.zero_score, 0)
+    elif hasattr(evaluator, "evaluate_column"):
+        return evaluator.evaluate_column(pred, target)
+    elif hasattr(evaluator, "evaluate_batch"):
+        return ColumnEvalOutput.from_items(evaluator.evaluate_batch(pred, target))
+    return ColumnEvalOutput.from_items([evaluator(p, t) for p, t in zip(pred, target, strict=True)])
+
+
+class _UnfingerprintableError(Exception):
+    pass
+
+
+def _fingerprint_value(value: Any, owner: EvaluatorBase | None = None) -> Any:
+    """Returns JSON-serializable representation of `value`, which changes whenever `value` may
+    score differently, raises `_UnfingerprintableError` for values without such representation."""
+    if isinstance(value, EvaluatorBase):
+        if (fingerprint := value.fingerprint) is None:
+            raise _UnfingerprintableError(value)
+        return fingerprint
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, dict):
+        return {str(key): _fingerprint_value(item, owner) for key, item in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [_fingerprint_value(item, owner) for item in value]
+    elif isinstance(value, (set, frozenset)):
+        return sorted(json.dumps(_fingerprint_value(item, owner)) for item in value)
+    elif isinstance(value, functools.partial):
+        return {
+            "func": _fingerprint_value(value.func, owner),
+            "args": _fingerprint_value(value.args, owner),
+            "keywords": _fingerprint_value(value.keywords, owner),
+        }
+    elif isinstance(value, types.MethodType):
+        # configuration of the evaluator owning the method is fingerprinted by its other params
+        return {
+            "self": (
+                _qualified_name(type(value.__self__))
+                if value.__self__ is owner
+                else _fingerprint_value(value.__self__, owner)
+            ),
+            "func": _fingerprint_value(value.__func__, owner),
+        }
+    elif isinstance(value, types.FunctionType):
+        return {
+            "name": _qualified_name(value),
+            "code": _fingerprint_code(value.__code__),
+            "defaults": _fingerprint_value(value.__defaults__, owner),
+            "kwdefaults": _fingerprint_value(value.__kwdefaults__, owner),
+            "closure": [
+                _fingerprint_value(cell.cell_contents, owner) for cell in value.__closure__ or ()
+            ],
+        }
+    elif isinstance(value, (type, types.BuiltinFunctionType, np.ufunc)):
+        return _qualified_name(value)
+    # runtime objects (clients, caches, locks) and other callables can't be told apart by contents
+    raise _UnfingerprintableError(value)
+
+
+def _fingerprint_code(code: types.CodeType) -> Any:
+    return {
+        "bytecode": hashlib.sha256(code.co_code).hexdigest(),
+        "names": list(code.co_names),
+        "consts": [_fingerprint_const(const) for const in code.co_consts],
+    }
+
+
+def _fingerprint_const(const: Any) -> Any:
+    if isinstance(const, types.CodeType):
+        return _fingerprint_code(const)
+    elif isinstance(const, tuple):
+        return [_fingerprint_const(item) for item in const]
+    elif isinstance(const, frozenset):
+        # repr of sets depends on hash seed of the process
+        return sorted(json.dumps(_fingerprint_const(item)) for item in const)
+    return repr(const)
+
+
+def _qualified_name(value: Any) -> str:
+    return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+
+
+def _to_column(values: list[Any]) -> np.ndarray:
+    if all(isinstance(v, (bool, int, float, str)) for v in values):
+        column = np.array(values)
+        if column.ndim == 1:
+            return column
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _to_python(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
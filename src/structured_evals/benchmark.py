@@ -0,0 +1,95 @@
+"""Offline benchmark of LLM judge throughput, with BatchDictEval driven through a fake endpoint."""
+
+import random
+import string
+import time
+
+import numpy as np
+from pydantic import BaseModel
+
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_llm_as_judge import LlmAsJudge
+from structured_evals.fake_llm import FakeJudgeChatModel
+from structured_evals.rate_limiter import AdaptiveRateLimiter
+
+DEFAULT_CONCURRENCY_LEVELS = (8, 32, 128)
+
+
+class JudgeBenchmarkResult(BaseModel):
+    concurrency: int
+    num_judgements: int
+    num_requests: int
+    num_errors: int
+    wall_time: float
+    requests_per_second: float
+    latency_p50: float
+    latency_p99: float
+
+
+def run_judge_benchmark(
+    concurrency_levels: tuple[int, ...] = DEFAULT_CONCURRENCY_LEVELS,
+    num_records: int = 200,
+    num_fields: int = 5,
+    adaptive: bool = False,
+    pack_size: int = 1,
+    seed: int = 0,
+    **fake_llm_kwargs: float | int | None,
+) -> list[JudgeBenchmarkResult]:
+    """Evaluates the same random records with judges of each concurrency level.
+
+    Judges call `FakeJudgeChatModel` configured with `fake_llm_kwargs`, all fields share a single
+    judge, as fields of real schemas share the endpoint. With `adaptive`, concurrency levels are
+    initial concurrency of `AdaptiveRateLimiter`.
+    """
+    pred, target = _make_records(num_records, num_fields, seed)
+    results = []
+    for concurrency in concurrency_levels:
+        llm = FakeJudgeChatModel(seed=seed, **fake_llm_kwargs)  # type: ignore[arg-type]
+        rate_limiter = None
+        if adaptive:
+            rate_limiter = AdaptiveRateLimiter(
+                initial_concurrency=concurrency,
+                max_concurrency=max(concurrency, 1_024),
+            )
+        judge = LlmAsJudge(
+            llm=llm,
+            max_concurrent_calls=concurrency,
+            pack_size=pack_size,
+            rate_limiter=rate_limiter,
+        )
+        evaluator = BatchDictEval(eval_mapping={f"field_{i}": judge for i in range(num_fields)})
+
+        start = time.perf_counter()
+        evaluator(pred=pred, target=target)
+        wall_time = time.perf_counter() - start
+
+        latencies = np.array(llm.request_latencies)
+        results.append(
+            JudgeBenchmarkResult(
+                concurrency=concurrency,
+                num_judgements=num_records * num_fields,
+                num_requests=len(latencies),
+                num_errors=llm.num_errors,
+                wall_time=wall_time,
+                requests_per_second=len(latencies) / wall_time,
+                latency_p50=float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                latency_p99=float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+            )
+        )
+    return results
+
+
+def _make_records(
+    num_records: int, num_fields: int, seed: int
+) -> tuple[list[dict[str, str]], list[dict[str, str]]]:
+    # predictions never equal targets, so that each field of each record is judged by LLM
+    rng = random.Random(seed)
+
+    def random_text() -> str:
+        return "".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(5, 40)))
+
+    pred, target = [], []
+    for _ in range(num_records):
+        pred.append({f"field_{i}": f"pred {random_text()}" for i in range(num_fields)})
+        target.append({f"field_{i}": f"target {random_text()}" for i in range(num_fields)})
+    return pred, target
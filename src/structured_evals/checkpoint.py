@@ -0,0 +1,178 @@
+"""Checkpoints of evaluation runs, which let interrupted runs resume where they stopped."""
+
+import hashlib
+import json
+import pickle
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from structured_evals.base import ColumnEvalOutput
+
+_CLOSE = object()
+DEFAULT_MAX_PENDING_WRITES = 16
+
+
+class EvaluationCheckpoint:
+    """Persists completed work of an evaluation run in SQLite database.
+
+    Run is evaluated in chunks (a single one, when not streaming). Columns of keys are saved as
+    soon as they are evaluated, so that a resumed run evaluates only the remaining keys of the
+    interrupted chunk. After each chunk, aggregation state (folded over all completed chunks) and
+    size of raw scores file are saved, and columns of the chunk are dropped.
+
+    Writes are done by a background thread, so they block evaluation only when `max_pending_writes`
+    of them are pending, which bounds memory held by columns waiting to be saved; `close` waits for
+    them.
+    Checkpoint of a different run (see `get_run_id`) can't be resumed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        run_id: str,
+        resume: bool = False,
+        max_pending_writes: int = DEFAULT_MAX_PENDING_WRITES,
+    ) -> None:
+        self.path = Path(path)
+        self.run_id = run_id
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._create_tables()
+            stored_run_id = self._get_meta("run_id")
+            if resume and stored_run_id is not None and stored_run_id != run_id:
+                raise ValueError(
+                    f"Checkpoint {self.path} was created by a different run "
+                    "(e.g. input file, schema, chunk size or raw scores format changed), "
+                    "remove it or run without resume"
+                )
+            if not resume or stored_run_id is None:
+                self._clear()
+
+        self.num_completed_chunks = 0
+        self.state: Any = None
+        self.raw_scores_offset = 0
+        row = self._conn.execute(
+            "SELECT idx, state, raw_scores_offset FROM chunks ORDER BY idx DESC LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            self.num_completed_chunks = row[0] + 1
+            self.state = pickle.loads(row[1])
+            self.raw_scores_offset = row[2]
+
+        self._writes: queue.Queue = queue.Queue(maxsize=max_pending_writes)
+        self._error: BaseException | None = None
+        self._writer = threading.Thread(target=self._write, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def get_run_id(**params: Any) -> str:
+        """Identifies run by its parameters, e.g. input file (with size and mtime) and schema."""
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def chunk(self, idx: int) -> "ChunkCheckpoint":
+        return ChunkCheckpoint(self, idx)
+
+    def load_columns(self, chunk_idx: int) -> dict[str, ColumnEvalOutput]:
+        self._raise_error()
+        self._writes.join()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, column FROM columns WHERE chunk_idx = ?", (chunk_idx,)
+            ).fetchall()
+        return {key: pickle.loads(column) for key, column in rows}
+
+    def save_column(self, chunk_idx: int, key: str, column: ColumnEvalOutput) -> None:
+        self._raise_error()
+        self._writes.put(("column", chunk_idx, key, column))
+
+    def complete_chunk(self, chunk_idx: int, state: Any, raw_scores_offset: int = 0) -> None:
+        self._raise_error()
+        self._writes.put(("chunk", chunk_idx, state, raw_scores_offset))
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._writes.put(_CLOSE)
+            self._writer.join()
+        self._conn.close()
+        self._raise_error()
+
+    def remove(self) -> None:
+        """Closes and removes checkpoint, e.g. after the run has completed."""
+        self.close()
+        for suffix in ["", "-wal", "-shm"]:
+            Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+    def _write(self) -> None:
+        while (write := self._writes.get()) is not _CLOSE:
+            try:
+                if self._error is None:
+                    self._apply(write)
+            except BaseException as err:
+                # keeps draining the queue, error is raised by the next call of the evaluation
+                self._error = err
+            finally:
+                self._writes.task_done()
+        self._writes.task_done()
+
+    def _apply(self, write: tuple[Any, ...]) -> None:
+        # (de)serialization happens here, off the evaluation thread
+        kind, chunk_idx, *args = write
+        with self._lock, self._conn:
+            if kind == "column":
+                key, column = args
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO columns (chunk_idx, key, column) VALUES (?, ?, ?)",
+                    (chunk_idx, key, pickle.dumps(column)),
+                )
+            else:
+                state, raw_scores_offset = args
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO chunks (idx, state, raw_scores_offset) VALUES (?, ?, ?)",
+                    (chunk_idx, pickle.dumps(state), raw_scores_offset),
+                )
+                self._conn.execute("DELETE FROM columns WHERE chunk_idx <= ?", (chunk_idx,))
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _create_tables(self) -> None:
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks "
+            "(idx INTEGER PRIMARY KEY, state BLOB NOT NULL, raw_scores_offset INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS columns "
+            "(chunk_idx INTEGER, key TEXT, column BLOB NOT NULL, PRIMARY KEY (chunk_idx, key))"
+        )
+
+    def _get_meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _clear(self) -> None:
+        for table in ["meta", "chunks", "columns"]:
+            self._conn.execute(f"DELETE FROM {table}")
+        self._conn.execute("INSERT INTO meta (key, value) VALUES ('run_id', ?)", (self.run_id,))
+
+
+class ChunkCheckpoint:
+    """Checkpoint of a single chunk, to which BatchDictEval saves columns of evaluated keys."""
+
+    def __init__(self, checkpoint: EvaluationCheckpoint, idx: int) -> None:
+        self.checkpoint = checkpoint
+        self.idx = idx
+
+    def load_columns(self) -> dict[str, ColumnEvalOutput]:
+        return self.checkpoint.load_columns(self.idx)
+
+    def save_column(self, key: str, column: ColumnEvalOutput) -> None:
+        self.checkpoint.save_column(self.idx, key, column)
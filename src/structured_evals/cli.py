@@ -1,13 +1,13 @@
 """CLI for structured evaluations using typer."""
 
+import itertools
 import json
+from contextlib import AbstractContextManager, closing, nullcontext
 from pathlib import Path
-from typing import Annotated, Literal, Optional
+from typing import Annotated, Any, Iterable, Optional
 
 import typer
 import yaml
-from langchain.globals import set_llm_cache
-from langchain_community.cache import SQLiteCache
 from loguru import logger
 
 from structured_evals import (
@@ -16,55 +16,138 @@ from structured_evals import (
     infer_structured_evaluator_from_schema,
 )
 from structured_evals.aggregations import AverageAggregation
-from structured_evals.eval_batch import BatchDictEval
+from structured_evals.checkpoint import EvaluationCheckpoint
+from structured_evals.coercion import CoercionPlan
+from structured_evals.eval_batch import BatchDictEval, BatchDictEvalOutput
 from structured_evals.eval_dict import DictEval
+from structured_evals.infer_from_schema import T_text_evaluator, get_default_judge_rate_limiter
+from structured_evals.jsonl_index import JsonlIndex
+from structured_evals.judgement_cache import JudgementCache, get_default_judgement_cache
+from structured_evals.loader import ParseStats
+from structured_evals.raw_scores import T_raw_scores_format, write_raw_scores
 from structured_evals.report import EvaluationReport
+from structured_evals.result_store import ResultStore
+from structured_evals.sharding import (
+    ShardReport,
+    count_records,
+    get_shard_range,
+    merge_shard_reports,
+)
+from structured_evals.streaming import DEFAULT_CHUNK_SIZE, evaluate_streaming
 
 app = typer.Typer(help="Structured evaluations CLI for evaluating LLM structured outputs")
 
 
-def setup_cache() -> None:
-    """Setup LLM cache in user's home directory."""
-    cache_dir = Path.home() / ".cache" / "structured-evals"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    cache_file = cache_dir / "langchain_cache.db"
-    set_llm_cache(SQLiteCache(database_path=str(cache_file)))
-    logger.info(f"Using cache at {cache_file}")
+PredictionsFileArgument = Annotated[
+    Path, typer.Argument(help="Path to JSON file containing predictions and targets")
+]
+OutputFileOption = Annotated[
+    Optional[Path], typer.Option("--output", "-o", help="Output file for results")
+]
+PredKeyOption = Annotated[str, typer.Option("--pred-key", help="Key for predictions in JSON")]
+TargetKeyOption = Annotated[str, typer.Option("--target-key", help="Key for targets in JSON")]
+TextEvaluatorOption = Annotated[
+    T_text_evaluator,
+    typer.Option(
+        "--text-evaluator",
+        help="Text evaluator to use, cascade scores with n-grams and escalates uncertain "
+        "cases to llm",
+    ),
+]
+StreamOption = Annotated[
+    bool,
+    typer.Option(
+        "--stream",
+        help="Evaluate jsonl file in chunks with bounded memory, raw scores are written "
+        "to <output>.raw.jsonl",
+    ),
+]
+ChunkSizeOption = Annotated[
+    int, typer.Option("--chunk-size", help="Number of records per chunk in streaming mode")
+]
+WorkersOption = Annotated[
+    int, typer.Option("--workers", help="Number of processes for CPU-bound evaluators")
+]
+CheckpointOption = Annotated[
+    bool,
+    typer.Option(
+        "--checkpoint",
+        help="Checkpoint progress to <output>.checkpoint.db, so that an interrupted run can "
+        "be resumed with --resume",
+    ),
+]
+ResumeOption = Annotated[
+    bool,
+    typer.Option(
+        "--resume",
+        help="Resume interrupted evaluation from its checkpoint (<output>.checkpoint.db), "
+        "skipping already evaluated keys and chunks; implies --checkpoint",
+    ),
+]
+ResultStoreOption = Annotated[
+    Optional[Path],
+    typer.Option(
+        "--result-store",
+        help="SQLite store of evaluated pairs, repeated runs evaluate only pairs whose values "
+        "or evaluator changed",
+    ),
+]
+RawScoresFormatOption = Annotated[
+    Optional[T_raw_scores_format],
+    typer.Option(
+        "--raw-scores",
+        help="Format of per-item raw scores: json (inside output file), jsonl or parquet "
+        "(written to <output>.raw.<format>, output file holds only summary) or none; "
+        "defaults to json, or jsonl when streaming",
+    ),
+]
+ShardIndexOption = Annotated[
+    int, typer.Option("--shard-index", help="Index of shard of records to evaluate, from 0")
+]
+NumShardsOption = Annotated[
+    int,
+    typer.Option(
+        "--num-shards",
+        help="Number of shards records are split into, each evaluated by a separate run "
+        "into partial results, which are combined with merge command",
+    ),
+]
+VerboseOption = Annotated[bool, typer.Option("--verbose", "-v", help="Verbose output")]
+
+
+def setup_cache() -> JudgementCache:
+    """Setup cache of LLM judgements in user's home directory."""
+    cache = get_default_judgement_cache()
+    logger.info(f"Using judgement cache at {cache.path}")
+    return cache
 
 
 @app.command()
 def eval_from_schema(
-    predictions_file: Annotated[
-        Path, typer.Argument(help="Path to JSON file containing predictions and targets")
-    ],
+    predictions_file: PredictionsFileArgument,
     schema_file: Annotated[Path, typer.Argument(help="Path to YAML schema file")],
-    output_file: Annotated[
-        Optional[Path], typer.Option("--output", "-o", help="Output file for results")
-    ] = None,
-    pred_key: Annotated[
-        str, typer.Option("--pred-key", help="Key for predictions in JSON")
-    ] = "answer",
-    target_key: Annotated[
-        str, typer.Option("--target-key", help="Key for targets in JSON")
-    ] = "gold",
-    text_evaluator: Annotated[
-        Literal["ngram", "llm"], typer.Option("--text-evaluator", help="Text evaluator to use")
-    ] = "llm",
-    verbose: Annotated[bool, typer.Option("--verbose", "-v", help="Verbose output")] = False,
+    output_file: OutputFileOption = None,
+    pred_key: PredKeyOption = "answer",
+    target_key: TargetKeyOption = "gold",
+    text_evaluator: TextEvaluatorOption = "llm",
+    stream: StreamOption = False,
+    chunk_size: ChunkSizeOption = DEFAULT_CHUNK_SIZE,
+    workers: WorkersOption = 1,
+    checkpoint_enabled: CheckpointOption = False,
+    resume: ResumeOption = False,
+    result_store_file: ResultStoreOption = None,
+    raw_scores_format: RawScoresFormatOption = None,
+    shard_index: ShardIndexOption = 0,
+    num_shards: NumShardsOption = 1,
+    verbose: VerboseOption = False,
 ) -> None:
     """Evaluate predictions using a schema file to infer the evaluator structure."""
-    setup_cache()
-
-    if output_file is None:
-        output_file = Path("results.json")
+    cache = setup_cache() if text_evaluator in ["llm", "cascade"] else None
+    result_store = ResultStore(result_store_file) if result_store_file is not None else None
 
-    logger.info(f"Loading data from {predictions_file}")
-    eval_batch = EvaluationBatch.from_json(
-        path=str(predictions_file),
-        record_format="json",
-        pred_key=pred_key,
-        target_key=target_key,
-    )
+    records = _get_shard_records(predictions_file, shard_index, num_shards)
+    output_file = _get_output_file(output_file, records, shard_index, num_shards)
+    raw_scores_format = _get_raw_scores_format(raw_scores_format, stream)
 
     logger.info(f"Loading schema from {schema_file}")
     with open(schema_file, "r") as f:
@@ -73,70 +156,533 @@ def eval_from_schema(
     logger.info("Inferring evaluator from schema")
     item_evaluator = infer_structured_evaluator_from_schema(schema, text_evaluator=text_evaluator)
     assert isinstance(item_evaluator, DictEval)
+    coercion_plan = CoercionPlan.from_schema(schema)
 
-    evaluator = BatchDictEval.from_dict_eval(item_evaluator, verbose=verbose)
-
-    logger.info("Running evaluation")
-    results = evaluator(pred=eval_batch.pred, target=eval_batch.target)
-    report = EvaluationReport.from_batch_dict_eval_output(results, aggregation=AverageAggregation())
+    evaluator = BatchDictEval.from_dict_eval(
+        item_evaluator, verbose=verbose, workers=workers, result_store=result_store
+    )
+    checkpoint = _open_checkpoint(
+        output_file,
+        checkpoint_enabled or resume,
+        resume,
+        predictions_file=predictions_file,
+        # contents rather than path, so that edits of schema file aren't resumed
+        schema=schema,
+        pred_key=pred_key,
+        target_key=target_key,
+        text_evaluator=text_evaluator,
+        chunk_size=chunk_size if stream else None,
+        shard_index=shard_index,
+        num_shards=num_shards,
+        # raw scores of completed chunks are resumed from the file of this format
+        raw_scores_format=raw_scores_format,
+    )
 
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Saving results to {output_file}")
-    with open(output_file, "w") as f:
-        json.dump(report.model_dump(), f, indent=2, ensure_ascii=False)
+    # process pool of evaluator and writer of checkpoint are closed also when evaluation fails
+    with _closing(checkpoint), evaluator:
+        if stream:
+            logger.info(f"Streaming data from {predictions_file} in chunks of {chunk_size}")
+            chunks = EvaluationBatch.iter_chunks(
+                path=predictions_file,
+                chunk_size=chunk_size,
+                record_format="json",
+                pred_key=pred_key,
+                target_key=target_key,
+                skip_chunks=checkpoint.num_completed_chunks if checkpoint is not None else 0,
+                coercion_plan=coercion_plan,
+                workers=workers,
+                records=records,
+            )
+            report = _evaluate_streaming(
+                evaluator, chunks, output_file, checkpoint, raw_scores_format
+            )
+        else:
+            logger.info(f"Loading data from {predictions_file}")
+            eval_batch = EvaluationBatch.from_json(
+                path=str(predictions_file),
+                record_format="json",
+                pred_key=pred_key,
+                target_key=target_key,
+                coercion_plan=coercion_plan,
+                workers=workers,
+                records=records,
+            )
+            report = _evaluate_batch(
+                evaluator, eval_batch, output_file, checkpoint, raw_scores_format
+            )
 
-    logger.info("Evaluation completed")
+    _complete_run(
+        report, output_file, records, shard_index, num_shards, cache, result_store, checkpoint
+    )
 
 
 @app.command()
 def eval_from_predictions(
-    predictions_file: Annotated[
-        Path, typer.Argument(help="Path to JSON file containing predictions and targets")
-    ],
-    output_file: Annotated[
-        Optional[Path], typer.Option("--output", "-o", help="Output file for results")
-    ] = None,
-    pred_key: Annotated[
-        str, typer.Option("--pred-key", help="Key for predictions in JSON")
-    ] = "answer",
-    target_key: Annotated[
-        str, typer.Option("--target-key", help="Key for targets in JSON")
-    ] = "gold",
-    text_evaluator: Annotated[
-        Literal["ngram", "llm"], typer.Option("--text-evaluator", help="Text evaluator to use")
-    ] = "llm",
-    verbose: Annotated[bool, typer.Option("--verbose", "-v", help="Verbose output")] = False,
+    predictions_file: PredictionsFileArgument,
+    output_file: OutputFileOption = None,
+    pred_key: PredKeyOption = "answer",
+    target_key: TargetKeyOption = "gold",
+    text_evaluator: TextEvaluatorOption = "llm",
+    stream: StreamOption = False,
+    chunk_size: ChunkSizeOption = DEFAULT_CHUNK_SIZE,
+    workers: WorkersOption = 1,
+    checkpoint_enabled: CheckpointOption = False,
+    resume: ResumeOption = False,
+    result_store_file: ResultStoreOption = None,
+    raw_scores_format: RawScoresFormatOption = None,
+    shard_index: ShardIndexOption = 0,
+    num_shards: NumShardsOption = 1,
+    verbose: VerboseOption = False,
 ) -> None:
     """Evaluate predictions by inferring the evaluator structure from the target data."""
-    setup_cache()
+    cache = setup_cache() if text_evaluator in ["llm", "cascade"] else None
+    result_store = ResultStore(result_store_file) if result_store_file is not None else None
 
-    if output_file is None:
-        output_file = Path("results.json")
+    records = _get_shard_records(predictions_file, shard_index, num_shards)
+    output_file = _get_output_file(output_file, records, shard_index, num_shards)
+    raw_scores_format = _get_raw_scores_format(raw_scores_format, stream)
 
-    logger.info(f"Loading data from {predictions_file}")
-    eval_batch = EvaluationBatch.from_json(
-        path=str(predictions_file),
-        record_format="json",
+    checkpoint = _open_checkpoint(
+        output_file,
+        checkpoint_enabled or resume,
+        resume,
+        predictions_file=predictions_file,
         pred_key=pred_key,
         target_key=target_key,
+        text_evaluator=text_evaluator,
+        chunk_size=chunk_size if stream else None,
+        shard_index=shard_index,
+        num_shards=num_shards,
+        # raw scores of completed chunks are resumed from the file of this format
+        raw_scores_format=raw_scores_format,
+    )
+
+    # process pool of evaluator and writer of checkpoint are closed also when evaluation fails
+    with _closing(checkpoint):
+        num_completed_chunks = checkpoint.num_completed_chunks if checkpoint is not None else 0
+        if stream:
+            logger.info(f"Streaming data from {predictions_file} in chunks of {chunk_size}")
+            chunks = EvaluationBatch.iter_chunks(
+                path=predictions_file,
+                chunk_size=chunk_size,
+                record_format="json",
+                pred_key=pred_key,
+                target_key=target_key,
+                skip_chunks=num_completed_chunks,
+                workers=workers,
+                records=records,
+            )
+            first_chunk: EvaluationBatch | None
+            if records is None and not num_completed_chunks:
+                first_chunk = next(chunks, None)
+                if first_chunk is None:
+                    raise typer.BadParameter(
+                        "File has no records to evaluate", param_hint="PREDICTIONS_FILE"
+                    )
+                chunks = itertools.chain([first_chunk], chunks)
+            else:
+                # every shard, as well as a resumed run (possibly with all chunks already
+                # evaluated), infers the evaluator from the same first records of the file
+                first_chunk = _load_first_chunk(predictions_file, pred_key, target_key, chunk_size)
+            with _infer_batch_evaluator(
+                first_chunk, text_evaluator, verbose, workers, result_store
+            ) as evaluator:
+                report = _evaluate_streaming(
+                    evaluator, chunks, output_file, checkpoint, raw_scores_format
+                )
+        else:
+            logger.info(f"Loading data from {predictions_file}")
+            eval_batch = EvaluationBatch.from_json(
+                path=str(predictions_file),
+                record_format="json",
+                pred_key=pred_key,
+                target_key=target_key,
+                workers=workers,
+                records=records,
+            )
+            with _infer_batch_evaluator(
+                eval_batch
+                if records is None
+                else _load_first_chunk(predictions_file, pred_key, target_key, chunk_size),
+                text_evaluator,
+                verbose,
+                workers,
+                result_store,
+            ) as evaluator:
+                report = _evaluate_batch(
+                    evaluator, eval_batch, output_file, checkpoint, raw_scores_format
+                )
+
+    _complete_run(
+        report, output_file, records, shard_index, num_shards, cache, result_store, checkpoint
+    )
+
+
+@app.command()
+def merge(
+    shard_files: Annotated[
+        list[Path], typer.Argument(help="Partial results of all shards of an evaluation")
+    ],
+    output_file: OutputFileOption = None,
+) -> None:
+    """Merge partial results of shards (see --num-shards) into results of the whole evaluation."""
+    if output_file is None:
+        output_file = Path("results.json")
+
+    shard_reports = []
+    for shard_file in shard_files:
+        with open(shard_file) as f:
+            shard_report = ShardReport.model_validate(json.load(f))
+        if shard_report.raw_scores_path is not None:
+            # raw scores are looked up next to shard results, e.g. once copied from other machines
+            shard_report.raw_scores_path = str(
+                shard_file.parent / Path(shard_report.raw_scores_path).name
+            )
+        shard_reports.append(shard_report)
+
+    raw_scores_file = None
+    if shard_reports and shard_reports[0].raw_scores_path is not None:
+        raw_scores_suffix = Path(shard_reports[0].raw_scores_path).suffix
+        raw_scores_file = output_file.with_suffix(f".raw{raw_scores_suffix}")
+    logger.info(f"Merging results of {len(shard_reports)} shards")
+    try:
+        report = merge_shard_reports(shard_reports, raw_scores_file)
+    except ValueError as err:
+        raise typer.BadParameter(str(err), param_hint="SHARD_FILES") from err
+
+    _log_parse_stats(report.parse_stats)
+    _save_report(report, output_file)
+
+
+@app.command()
+def index_jsonl(
+    jsonl_file: Annotated[Path, typer.Argument(help="Path to JSONL file with predictions")],
+    hashes: Annotated[
+        bool, typer.Option("--hashes", help="Store hash of content of each record")
+    ] = False,
+) -> None:
+    """Build index of byte offsets of records of JSONL file, stored next to it."""
+    index = JsonlIndex.build(jsonl_file, with_hashes=hashes)
+    index.save()
+    logger.info(f"Indexed {len(index)} records in {JsonlIndex.get_index_path(jsonl_file)}")
+
+
+@app.command()
+def benchmark_judge(
+    concurrency: Annotated[
+        Optional[list[int]],
+        typer.Option(
+            "--concurrency", "-c", help="Concurrency levels to benchmark [default: 8, 32, 128]"
+        ),
+    ] = None,
+    num_records: Annotated[int, typer.Option("--num-records", help="Number of records")] = 200,
+    num_fields: Annotated[
+        int, typer.Option("--num-fields", help="Number of judged fields per record")
+    ] = 5,
+    latency: Annotated[
+        float, typer.Option("--latency", help="Median latency of requests in seconds")
+    ] = 0.05,
+    latency_sigma: Annotated[
+        float, typer.Option("--latency-sigma", help="Spread of log-normal latency")
+    ] = 0.5,
+    error_rate: Annotated[
+        float, typer.Option("--error-rate", help="Probability of 5xx responses")
+    ] = 0.0,
+    throttle_rate: Annotated[
+        float, typer.Option("--throttle-rate", help="Probability of 429 responses")
+    ] = 0.0,
+    endpoint_capacity: Annotated[
+        Optional[int],
+        typer.Option(
+            "--endpoint-capacity", help="Requests in flight above which endpoint responds 429"
+        ),
+    ] = None,
+    adaptive: Annotated[
+        bool, typer.Option("--adaptive", help="Use adaptive concurrency, starting at each level")
+    ] = False,
+    pack_size: Annotated[
+        int, typer.Option("--pack-size", help="Number of pairs judged per request")
+    ] = 1,
+    seed: Annotated[int, typer.Option("--seed", help="Random seed")] = 0,
+    output_file: OutputFileOption = None,
+) -> None:
+    """Benchmark LLM judge throughput offline, against a fake endpoint."""
+    from tabulate import tabulate
+
+    from structured_evals.benchmark import DEFAULT_CONCURRENCY_LEVELS, run_judge_benchmark
+
+    logger.info(f"Benchmarking judge on {num_records} records with {num_fields} fields")
+    results = run_judge_benchmark(
+        concurrency_levels=(
+            tuple(concurrency) if concurrency is not None else DEFAULT_CONCURRENCY_LEVELS
+        ),
+        num_records=num_records,
+        num_fields=num_fields,
+        adaptive=adaptive,
+        pack_size=pack_size,
+        seed=seed,
+        latency=latency,
+        latency_sigma=latency_sigma,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        max_concurrent_requests=endpoint_capacity,
     )
+    rows = [res.model_dump() for res in results]
+    logger.info(f"Results:\n{tabulate(rows, headers='keys', floatfmt='.3f')}")
 
+    if output_file is not None:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+def _infer_batch_evaluator(
+    eval_batch: EvaluationBatch,
+    text_evaluator: T_text_evaluator,
+    verbose: bool,
+    workers: int,
+    result_store: ResultStore | None = None,
+) -> BatchDictEval:
     logger.info("Inferring evaluator from raw predictions")
+    # targets which failed to parse are kept empty, see `EvaluationBatch`
+    target = next((target for target in eval_batch.target if target), None)
+    if target is None:
+        raise typer.BadParameter(
+            "No record with a parsable target to infer the evaluator from",
+            param_hint="PREDICTIONS_FILE",
+        )
     item_evaluator = infer_structured_evaluator_from_predictions(
-        eval_batch.target[0], text_evaluator=text_evaluator
+        target, text_evaluator=text_evaluator
     )
     assert isinstance(item_evaluator, DictEval)
+    return BatchDictEval.from_dict_eval(
+        item_evaluator, verbose=verbose, workers=workers, result_store=result_store
+    )
 
-    evaluator = BatchDictEval.from_dict_eval(item_evaluator, verbose=verbose)
 
+def _evaluate_batch(
+    evaluator: BatchDictEval,
+    eval_batch: EvaluationBatch,
+    output_file: Path,
+    checkpoint: EvaluationCheckpoint | None,
+    raw_scores_format: T_raw_scores_format,
+) -> EvaluationReport:
     logger.info("Running evaluation")
-    results = evaluator(pred=eval_batch.pred, target=eval_batch.target)
-    report = EvaluationReport.from_batch_dict_eval_output(results, aggregation=AverageAggregation())
+    results = evaluator.evaluate(
+        pred=eval_batch.pred,
+        target=eval_batch.target,
+        checkpoint=checkpoint.chunk(0) if checkpoint is not None else None,
+    )
+    report = _build_report(
+        results, output_file, raw_scores_format, excluded_items=eval_batch.failed_targets
+    )
+    # merged into empty stats to keep only first errors in the report
+    report.parse_stats = ParseStats().merge(eval_batch.parse_stats)
+    return report
+
+
+def _evaluate_streaming(
+    evaluator: BatchDictEval,
+    chunks: Iterable[EvaluationBatch],
+    output_file: Path,
+    checkpoint: EvaluationCheckpoint | None,
+    raw_scores_format: T_raw_scores_format,
+) -> EvaluationReport:
+    if raw_scores_format != "jsonl" and raw_scores_format != "parquet":
+        logger.info("Running streaming evaluation, without raw scores")
+        return evaluate_streaming(evaluator, chunks, checkpoint=checkpoint)
+
+    raw_scores_file = _get_raw_scores_file(output_file, raw_scores_format)
+    logger.info(f"Running streaming evaluation, writing raw scores to {raw_scores_file}")
+    return evaluate_streaming(
+        evaluator,
+        chunks,
+        raw_scores_path=raw_scores_file,
+        checkpoint=checkpoint,
+        raw_scores_format=raw_scores_format,
+    )
+
+
+def _build_report(
+    results: BatchDictEvalOutput,
+    output_file: Path,
+    raw_scores_format: T_raw_scores_format,
+    excluded_items: list[int],
+) -> EvaluationReport:
+    report = EvaluationReport.from_batch_dict_eval_output(
+        results,
+        aggregation=AverageAggregation(),
+        include_raw_scores=raw_scores_format == "json",
+        excluded_items=excluded_items,
+    )
+    if raw_scores_format == "jsonl" or raw_scores_format == "parquet":
+        raw_scores_file = _get_raw_scores_file(output_file, raw_scores_format)
+        logger.info(f"Writing raw scores to {raw_scores_file}")
+        write_raw_scores(results, raw_scores_file, raw_scores_format)
+        report.raw_scores_path = str(raw_scores_file)
+    return report
+
+
+def _complete_run(
+    report: EvaluationReport,
+    output_file: Path,
+    records: range | None,
+    shard_index: int,
+    num_shards: int,
+    cache: JudgementCache | None,
+    result_store: ResultStore | None,
+    checkpoint: EvaluationCheckpoint | None,
+) -> None:
+    """Adds statistics of the run to report, saves it and removes checkpoint of completed run."""
+    _log_parse_stats(report.parse_stats)
+    if cache is not None:
+        report.cache_stats = cache.stats.model_copy()
+        report.judge_throughput = get_default_judge_rate_limiter().stats
+    if result_store is not None:
+        report.result_store_stats = result_store.stats.model_copy(deep=True)
+        logger.info(
+            f"Reused {report.result_store_stats.num_reused} stored results, "
+            f"recomputed {report.result_store_stats.num_recomputed}"
+        )
+    if records is not None:
+        report = _to_shard_report(report, records, shard_index, num_shards)
+    _save_report(report, output_file)
+    if checkpoint is not None:
+        checkpoint.remove()
+
+
+def _get_output_file(
+    output_file: Path | None, records: range | None, shard_index: int, num_shards: int
+) -> Path:
+    if output_file is not None:
+        return output_file
+    elif records is None:
+        return Path("results.json")
+    return Path(f"results.shard-{shard_index}-of-{num_shards}.json")
+
+
+def _get_shard_records(predictions_file: Path, shard_index: int, num_shards: int) -> range | None:
+    if num_shards == 1 and shard_index == 0:
+        return None
+    try:
+        records = get_shard_range(count_records(predictions_file), shard_index, num_shards)
+    except ValueError as err:
+        raise typer.BadParameter(str(err), param_hint="--shard-index") from err
+    logger.info(
+        f"Evaluating shard {shard_index} of {num_shards}: records {records.start}-{records.stop}"
+    )
+    return records
+
+
+def _load_first_chunk(
+    predictions_file: Path, pred_key: str, target_key: str, chunk_size: int
+) -> EvaluationBatch:
+    """Loads first records of the file, from which every shard infers the same evaluator."""
+    return EvaluationBatch.from_json(
+        path=predictions_file,
+        record_format="json",
+        pred_key=pred_key,
+        target_key=target_key,
+        records=range(min(chunk_size, count_records(predictions_file))),
+    )
+
+
+def _to_shard_report(
+    report: EvaluationReport, records: range, shard_index: int, num_shards: int
+) -> ShardReport:
+    return ShardReport(
+        **dict(report),
+        shard_index=shard_index,
+        num_shards=num_shards,
+        start=records.start,
+        stop=records.stop,
+    )
+
+
+def _get_raw_scores_format(
+    raw_scores_format: T_raw_scores_format | None, stream: bool
+) -> T_raw_scores_format:
+    if raw_scores_format is None:
+        return "jsonl" if stream else "json"
+    elif stream and raw_scores_format == "json":
+        raise typer.BadParameter(
+            "Streaming evaluation can't keep raw scores inside output file, use jsonl or parquet",
+            param_hint="--raw-scores",
+        )
+    return raw_scores_format
+
+
+def _get_raw_scores_file(output_file: Path, raw_scores_format: T_raw_scores_format) -> Path:
+    return output_file.with_suffix(f".raw.{raw_scores_format}")
+
+
+def _open_checkpoint(
+    output_file: Path,
+    enabled: bool,
+    resume: bool,
+    predictions_file: Path,
+    **run_params: Any,
+) -> EvaluationCheckpoint | None:
+    if not enabled:
+        return None
+    checkpoint_file = output_file.with_suffix(".checkpoint.db")
+    stat = predictions_file.stat()
+    checkpoint = EvaluationCheckpoint(
+        checkpoint_file,
+        run_id=EvaluationCheckpoint.get_run_id(
+            predictions_file=str(predictions_file.resolve()),
+            predictions_size=stat.st_size,
+            predictions_mtime=stat.st_mtime_ns,
+            **run_params,
+        ),
+        resume=resume,
+    )
+    if resume:
+        logger.info(
+            f"Resuming from checkpoint {checkpoint_file}, "
+            f"{checkpoint.num_completed_chunks} chunks already evaluated"
+        )
+    return checkpoint
+
+
+def _closing(
+    checkpoint: EvaluationCheckpoint | None,
+) -> AbstractContextManager[EvaluationCheckpoint | None]:
+    # closed checkpoint keeps progress of a failed run, so that it can be resumed
+    return closing(checkpoint) if checkpoint is not None else nullcontext()
+
+
+def _log_parse_stats(parse_stats: ParseStats | None) -> None:
+    if parse_stats is None or not parse_stats.num_failed_records:
+        return
+    logger.warning(
+        f"Failed to parse {parse_stats.num_failed_records} of {parse_stats.num_records} records "
+        f"({parse_stats.failure_rate:.2%}): {parse_stats.num_failed_preds} predictions, "
+        f"{parse_stats.num_failed_targets} targets (excluded from aggregated scores), "
+        "see parse_stats in report"
+    )
+
 
+def _save_report(report: EvaluationReport, output_file: Path) -> None:
     output_file.parent.mkdir(parents=True, exist_ok=True)
     logger.info(f"Saving results to {output_file}")
     with open(output_file, "w") as f:
-        json.dump(report.model_dump(), f, indent=2, ensure_ascii=False)
+        exclude = {
+            field
+            for field in [
+                "raw_scores",
+                "raw_scores_path",
+                "cache_stats",
+                "judge_throughput",
+                "result_store_stats",
+                "parse_stats",
+            ]
+            if getattr(report, field) is None
+        }
+        if not isinstance(report, ShardReport):
+            # aggregation state is needed only to merge results of shards
+            exclude.add("aggregation_state")
+        json.dump(report.model_dump(exclude=exclude), f, indent=2, ensure_ascii=False)
 
     logger.info("Evaluation completed")
 
@@ -0,0 +1,135 @@
+"""Conversions of parsed records to types expected by evaluators.
+
+With a schema, `CoercionPlan` converts exactly the fields which need it (e.g. date strings of date
+fields, also nested in lists and dicts). Without it, `coerce_iso_dates` converts top-level values
+which look like ISO dates, as types are inferred from values then.
+"""
+
+import datetime
+import re
+from functools import partial
+from typing import Any, Callable
+
+import yaml
+
+Converter = Callable[[Any], Any]
+
+# cheap check before calling fromisoformat, which otherwise raises for most values
+_ISO_DATE_PREFIX = re.compile(r"\d{4}-?\d{2}-?\d{2}")
+
+
+class CoercionPlan:
+    """Converts values of dict fields with converters compiled from schema, see `from_schema`.
+
+    Schema types are the ones of `infer_structured_evaluator_from_schema`:
+    - `date` and `string` with `format: date`: ISO strings (and datetimes) to dates,
+    - `string`: dates (which YAML parses from date-like strings) back to ISO strings,
+    - `integer`, `float`, `number`: numeric strings (e.g. `1e3`, a string in YAML) to numbers,
+    - `enum`: values which YAML parses from choices (e.g. `yes` to True) back to choices,
+    - `array`, `list` and `object`, `dict`: items and properties, recursively.
+    Values which can't be converted, nulls and fields missing from schema are kept as they are.
+    Plans are picklable, so that records can be parsed in worker processes.
+    """
+
+    def __init__(self, converters: dict[str, Converter]) -> None:
+        self.converters = converters
+
+    @classmethod
+    def from_schema(cls, schema: dict[str, Any]) -> "CoercionPlan":
+        return cls({key: _compile(item_schema) for key, item_schema in schema.items()})
+
+    def __call__(self, record: Any) -> Any:
+        """Converts fields of record in place, returns the record."""
+        if not isinstance(record, dict):
+            return record
+        for key, convert in self.converters.items():
+            value = record.get(key)
+            if value is not None:
+                record[key] = convert(value)
+        return record
+
+
+def coerce_iso_dates(record: Any) -> Any:
+    """Converts top-level values of record which are ISO dates (or datetimes) to dates, in place."""
+    if not isinstance(record, dict):
+        return record
+    for key, value in record.items():
+        if isinstance(value, str) and _ISO_DATE_PREFIX.match(value):
+            try:
+                record[key] = datetime.datetime.fromisoformat(value).date()
+            except ValueError:
+                pass
+    return record
+
+
+def _compile(item_schema: dict[str, Any]) -> Converter:
+    item_type = item_schema["type"]
+    if item_type == "date" or (item_type == "string" and item_schema.get("format") == "date"):
+        return _to_date
+    elif item_type == "string":
+        return _to_string
+    elif item_type in ["integer", "float", "number"]:
+        return _to_number
+    elif item_type == "enum":
+        return partial(_to_choice, _get_choice_lookup(item_schema["choices"]))
+    elif item_type in ["array", "list"]:
+        return partial(_to_list, _compile(item_schema["items"]))
+    elif item_type in ["object", "dict"]:
+        return CoercionPlan.from_schema(item_schema["properties"])
+    raise ValueError(f"Unsupported type encountered during coercion plan compilation: {item_type}")
+
+
+def _to_date(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    elif isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value).date()
+        except ValueError:
+            return value
+    return value
+
+
+def _to_string(value: Any) -> Any:
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _to_number(value: Any) -> Any:
+    if isinstance(value, str):
+        for number_type in (int, float):
+            try:
+                return number_type(value)
+            except ValueError:
+                pass
+    return value
+
+
+def _get_choice_lookup(choices: list[Any]) -> dict[tuple[type, Any], Any]:
+    """Maps (type, value) of values which YAML or JSON may produce for each choice to the choice,
+    types keep e.g. True and 1 apart."""
+    lookup: dict[tuple[type, Any], Any] = {}
+    for choice in reversed(choices):
+        variants = [choice, str(choice)]
+        if isinstance(choice, str):
+            try:
+                variants.append(yaml.safe_load(choice))
+            except yaml.YAMLError:
+                pass
+        for variant in variants:
+            if isinstance(variant, (str, int, float, bool)):
+                lookup[(type(variant), variant)] = choice
+    return lookup
+
+
+def _to_choice(lookup: dict[tuple[type, Any], Any], value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)):
+        return lookup.get((type(value), value), value)
+    return value
+
+
+def _to_list(convert: Converter, value: Any) -> Any:
+    if isinstance(value, list):
+        return [convert(item) if item is not None else None for item in value]
+    return value
@@ -1,144 +1,477 @@
+import asyncio
+import math
+import multiprocessing
+import pickle
 from collections import defaultdict
-from typing import Any, Literal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Coroutine, Literal, Sequence, TypeVar
 
-from pydantic import BaseModel, computed_field
+import numpy as np
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, Field, computed_field, model_validator
 from tabulate import tabulate
 from tqdm import tqdm
 
-from structured_evals.base import EvaluatorBase, ItemEvalOutput
+from structured_evals.base import ColumnEvalOutput, EvaluatorBase, evaluate_as_column
+from structured_evals.checkpoint import ChunkCheckpoint
 from structured_evals.eval_dict import DictEval, DictEvalOutput
+from structured_evals.result_store import ResultStore
+
+MIN_PAIRS_PER_TASK = 64
+TASKS_PER_WORKER = 4
+MAX_KEY_THREADS = 16
+PATH_SEP = "."
+T = TypeVar("T")
+_MISSING = object()
 
 
 class BatchDictEvalOutput(BaseModel):
+    """Columnar outputs of BatchDictEval.
+
+    Scores are stored in (num_items x num_keys) float32 matrix and missing keys in a boolean mask
+    of the same shape. Extra keys are kept as a sparse table mapping each extra key to sorted
+    indices of items it occurred in. Per-item `DictEvalOutput` are materialized only on access,
+    from `columns` which hold non-score fields of each key's outputs (e.g. `prohibited_value`).
+
+    Keys of nested dicts are stored as flat leaf paths, `key_paths` map them to their components,
+    so that item outputs are reassembled into nested `DictEvalOutput`.
+
+    Can be also constructed from `item_results`, which are converted into columnar form.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     schema_keys: list[str]
-    item_results: list[DictEvalOutput]
+    score_matrix: np.ndarray
+    missing_mask: np.ndarray
+    extra_keys_table: dict[str, np.ndarray]
+    columns: dict[str, ColumnEvalOutput]
+    key_paths: dict[str, list[str]] = Field(default_factory=dict)
+
+    def __init__(self, **data: Any) -> None:
+        # explicit signature, as data may hold `item_results` instead of columnar fields
+        super().__init__(**data)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _convert_item_results(cls, data: Any) -> Any:
+        if isinstance(data, dict) and "item_results" in data:
+            data = dict(data)
+            item_results: list[DictEvalOutput] = data.pop("item_results")
+            schema_keys: list[str] = data["schema_keys"]
+            key_paths: dict[str, list[str]] = data.get("key_paths", {})
+            extra_keys_table: dict[str, list[int]] = defaultdict(list)
+            leaves: dict[str, list[Any]] = defaultdict(list)
+            missing = np.zeros((len(item_results), len(schema_keys)), dtype=bool)
+            for i, item_res in enumerate(item_results):
+                for key in item_res.extra_keys:
+                    extra_keys_table[key].append(i)
+                for j, key in enumerate(schema_keys):
+                    leaf, missing[i, j] = _get_leaf_output(item_res, key_paths.get(key, [key]))
+                    leaves[key].append(leaf)
+            return cls._columnar_fields(
+                schema_keys=schema_keys,
+                columns={key: ColumnEvalOutput.from_items(leaves[key]) for key in schema_keys},
+                missing_mask=missing,
+                extra_keys_table={
+                    key: np.array(indices, dtype=np.int64)
+                    for key, indices in extra_keys_table.items()
+                },
+                key_paths=key_paths,
+            )
+        return data
+
+    @classmethod
+    def from_columns(
+        cls,
+        schema_keys: list[str],
+        columns: dict[str, ColumnEvalOutput],
+        missing_mask: np.ndarray,
+        extra_keys_table: dict[str, np.ndarray],
+        key_paths: dict[str, list[str]] | None = None,
+    ) -> "BatchDictEvalOutput":
+        return cls(
+            **cls._columnar_fields(
+                schema_keys=schema_keys,
+                columns=columns,
+                missing_mask=missing_mask,
+                extra_keys_table=extra_keys_table,
+                key_paths=key_paths or {},
+            )
+        )
+
+    @staticmethod
+    def _columnar_fields(
+        schema_keys: list[str],
+        columns: dict[str, ColumnEvalOutput],
+        missing_mask: np.ndarray,
+        extra_keys_table: dict[str, np.ndarray],
+        key_paths: dict[str, list[str]],
+    ) -> dict[str, Any]:
+        num_items = missing_mask.shape[0]
+        score_matrix = np.empty((num_items, len(schema_keys)), dtype=np.float32)
+        for j, key in enumerate(schema_keys):
+            score_matrix[:, j] = columns[key].scores
+        return {
+            "schema_keys": schema_keys,
+            "score_matrix": score_matrix,
+            "missing_mask": missing_mask,
+            "extra_keys_table": extra_keys_table,
+            "key_paths": key_paths,
+            # columns share scores with the matrix, so memory is not duplicated
+            "columns": {
+                key: columns[key].model_copy(update={"scores": score_matrix[:, j]})
+                for j, key in enumerate(schema_keys)
+            },
+        }
 
     @computed_field  # type: ignore[prop-decorator]
     @property
     def num_items(self) -> int:
-        return len(self.item_results)
+        return self.score_matrix.shape[0]
 
     @property
     def scores(self) -> dict[str, list[float]]:
-        scores: dict[str, list[float]] = {key: [] for key in self.schema_keys}
-        for item_res in self.item_results:
-            for key, score in item_res.results.items():
-                scores[key].append(score.score)
-        return scores
+        return {key: self.score_matrix[:, j].tolist() for j, key in enumerate(self.schema_keys)}
 
     @property
     def missing_keys(self) -> dict[str, list[float]]:
-        missing_keys: dict[str, list[float]] = {key: [] for key in self.schema_keys}
-        for item_res in self.item_results:
-            for key, missing_key in item_res.missing_keys.items():
-                missing_keys[key].append(missing_key)
-        return missing_keys
+        return {
+            key: self.missing_mask[:, j].astype(float).tolist()
+            for j, key in enumerate(self.schema_keys)
+        }
 
     @property
     def num_times_extra_keys(self) -> dict[str, int]:
-        extra_keys: dict[str, int] = defaultdict(lambda: 0)
-        for item_res in self.item_results:
-            for key in item_res.extra_keys.keys():
-                extra_keys[key] += 1
-        return extra_keys
+        return {key: len(indices) for key, indices in self.extra_keys_table.items()}
+
+    @property
+    def num_extra_keys_per_item(self) -> np.ndarray:
+        num_extra = np.zeros(self.num_items, dtype=np.int64)
+        for indices in self.extra_keys_table.values():
+            num_extra[indices] += 1
+        return num_extra
+
+    @property
+    def item_results(self) -> list[DictEvalOutput]:
+        """Materializes outputs of all items, prefer `item_result` or columns for large batches."""
+        items_per_key = {key: col.to_items() for key, col in self.columns.items()}
+        extra_keys: list[dict[str, float]] = [{} for _ in range(self.num_items)]
+        for key, indices in self.extra_keys_table.items():
+            for i in indices.tolist():
+                extra_keys[i][key] = 1
+        missing = self.missing_mask.astype(int).tolist()
+        return [
+            self._nested_output(
+                results=[items_per_key[key][i] for key in self.schema_keys],
+                missing=missing[i],
+                extra_keys=extra_keys[i],
+            )
+            for i in range(self.num_items)
+        ]
+
+    def item_result(self, idx: int) -> DictEvalOutput:
+        return self._nested_output(
+            results=[self.columns[key].item(idx) for key in self.schema_keys],
+            missing=self.missing_mask[idx].astype(int).tolist(),
+            extra_keys={
+                key: 1
+                for key, indices in self.extra_keys_table.items()
+                if _sorted_contains(indices, idx)
+            },
+        )
+
+    def drop_items(self, indices: Sequence[int]) -> "BatchDictEvalOutput":
+        """Returns outputs without items at `indices`, e.g. of records excluded from aggregation."""
+        if not len(indices):
+            return self
+        keep = np.ones(self.num_items, dtype=bool)
+        keep[np.asarray(indices, dtype=np.int64)] = False
+        kept_idx = np.flatnonzero(keep)
+        # positions of kept items after dropping, extra keys tables stay sorted
+        positions = np.cumsum(keep) - 1
+        extra_keys_table = {}
+        for key, item_indices in self.extra_keys_table.items():
+            kept = item_indices[keep[item_indices]]
+            if len(kept):
+                extra_keys_table[key] = positions[kept]
+        return self.from_columns(
+            schema_keys=self.schema_keys,
+            columns={key: col.take(kept_idx) for key, col in self.columns.items()},
+            missing_mask=self.missing_mask[kept_idx],
+            extra_keys_table=extra_keys_table,
+            key_paths=self.key_paths,
+        )
+
+    def _nested_output(
+        self, results: list[Any], missing: list[int], extra_keys: dict[str, float]
+    ) -> DictEvalOutput:
+        leaves = [
+            (self.key_paths.get(key, [key]), result, is_missing)
+            for key, result, is_missing in zip(self.schema_keys, results, missing, strict=True)
+        ]
+        return _nest_leaf_outputs(leaves, extra_keys)
 
 
 class BatchDictEval(EvaluatorBase[list[dict[str, Any]], BatchDictEvalOutput]):
+    """Evaluates batch of dicts column-wise, i.e. each key of eval_mapping over all items at once.
+
+    Nested DictEval in eval_mapping are flattened into leaf paths (e.g. `borrower.address.city`),
+    each evaluated as a separate column, hence schema keys of outputs are leaf paths. A leaf is
+    missing when its path doesn't exist in prediction; null values along the path are treated as
+    null leaves.
+
+    All keys are evaluated concurrently, see `_evaluate_keys`. With `workers` > 1, pairs of
+    CPU-bound keys (i.e. neither io-bound nor vectorized) are split into chunks evaluated in
+    a process pool, started by the first `evaluate` call and reused by the following ones (e.g.
+    for chunks of a stream) until `close`. Evaluators are sent to workers once, pickled, hence
+    later changes of evaluators aren't seen by workers; workers return results as columns.
+
+    With `result_store`, outputs of evaluated pairs are stored, and only pairs which weren't
+    evaluated by an evaluator of the same fingerprint before are evaluated again. Keys of
+    evaluators without fingerprint (see `EvaluatorBase.fingerprint`) bypass the store.
+    """
+
     def __init__(
         self,
         eval_mapping: dict[str, EvaluatorBase],
         error_strategy: Literal["raise", "ignore"] = "raise",
         verbose: bool = False,
+        workers: int = 1,
+        result_store: ResultStore | None = None,
     ) -> None:
         super().__init__()
         self.eval_mapping = eval_mapping
-        self.schema_keys = list(eval_mapping.keys())
+        self.key_paths = _flatten_eval_mapping(eval_mapping)
+        self.key_tree = _get_key_tree(eval_mapping)
+        self.leaf_evaluators = {
+            key: _get_evaluator(eval_mapping, path) for key, path in self.key_paths.items()
+        }
+        self.schema_keys = list(self.key_paths.keys())
         self.error_strategy = error_strategy
         self.verbose = verbose
+        self.workers = workers
+        self.result_store = result_store
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_started = False
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_pool_started"] = False
+        return state
+
+    def __enter__(self) -> "BatchDictEval":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down process pool of workers, a following `evaluate` call starts a new one."""
+        if self._pool is not None:
+            self._pool.shutdown()
+        self._pool = None
+        self._pool_started = False
 
     @property
     def zero_score(self) -> BatchDictEvalOutput:
-        return BatchDictEvalOutput(schema_keys=self.schema_keys, item_results=[])
+        return BatchDictEvalOutput(
+            schema_keys=self.schema_keys, key_paths=self.nested_key_paths, item_results=[]
+        )
 
     @property
     def max_score(self) -> BatchDictEvalOutput:
-        return BatchDictEvalOutput(schema_keys=self.schema_keys, item_results=[])
+        return BatchDictEvalOutput(
+            schema_keys=self.schema_keys, key_paths=self.nested_key_paths, item_results=[]
+        )
+
+    @property
+    def nested_key_paths(self) -> dict[str, list[str]]:
+        return {key: list(path) for key, path in self.key_paths.items() if len(path) > 1}
 
     def evaluate(
         self,
         pred: list[dict[str, Any]],
         target: list[dict[str, Any]],
+        checkpoint: ChunkCheckpoint | None = None,
     ) -> BatchDictEvalOutput:
+        """Evaluates batch, with `checkpoint` columns of keys are saved as soon as they are ready,
+        and columns saved by an interrupted evaluation of the same batch are reused."""
         # TODO: handle cases when pred wasn't parsed
 
-        num_items = len(target)
-        schema_keys = list(self.eval_mapping.keys())
+        schema_keys = self.schema_keys
+        _check_batch(pred, target, self.key_tree)
+        missing_mask, valid_pairs = _split_valid_pairs(pred, target, self.key_paths)
 
-        for target_item in target:
-            unspecified_keys = {key for key in target_item if key not in self.eval_mapping}
-            if unspecified_keys:
-                raise ValueError(
-                    f"Target dict contains keys not present in eval_mapping: {unspecified_keys}"
-                )
-
-        valid_results = {}
-        missing_results: dict[str, list[ItemEvalOutput]] = {key: [] for key in schema_keys}
-        missing_mask: dict[str, list[int]] = {key: [] for key in schema_keys}
-
-        with tqdm(
-            self.eval_mapping.items(),
-            disable=not self.verbose,
-        ) as pbar:
-            for key, evaluator in pbar:
-                pbar.set_description(f"Evaluating key: {key} ({evaluator.name})")
-                eval_pairs: list[tuple[dict[str, Any], dict[str, Any]]] = []
-                for pred_item, target_item in zip(pred, target, strict=True):
-                    if key not in pred_item:
-                        missing_mask[key].append(1)
-                        missing_results[key].append(evaluator.zero_score)
-                    else:
-                        missing_mask[key].append(0)
-                        eval_pairs.append((pred_item[key], target_item[key]))
-
-                if hasattr(evaluator, "evaluate_batch"):
-                    valid_results[key] = evaluator.evaluate_batch(*zip(*eval_pairs))
-                else:
-                    valid_results[key] = [evaluator.evaluate(*pair) for pair in eval_pairs]
-
-        assert all(
-            len(missing_results[key]) + len(valid_results[key]) == num_items for key in schema_keys
-        )
-
-        results = []
-        valid_res_idx: dict[str, int] = dict.fromkeys(schema_keys, 0)
-        missing_res_idx: dict[str, int] = dict.fromkeys(schema_keys, 0)
-        for i in range(num_items):
-            item_res = {}
-
-            for key in schema_keys:
-                if missing_mask[key][i]:
-                    item_res[key] = missing_results[key][missing_res_idx[key]]
-                    missing_res_idx[key] += 1
-                else:
-                    item_res[key] = valid_results[key][valid_res_idx[key]]
-                    valid_res_idx[key] += 1
-
-            results.append(
-                DictEvalOutput(
-                    results=item_res,
-                    missing_keys={key: missing_mask[key][i] for key in schema_keys},
-                    extra_keys={key: 1 for key in pred[i].keys() if key not in schema_keys},
+        valid_columns: dict[str, ColumnEvalOutput] = {}
+        if checkpoint is not None:
+            valid_columns = {
+                key: column
+                for key, column in checkpoint.load_columns().items()
+                if key in valid_pairs and len(column) == len(valid_pairs[key][0])
+            }
+        pending_pairs = {
+            key: pairs for key, pairs in valid_pairs.items() if key not in valid_columns
+        }
+        pool = self._get_pool() if pending_pairs else None
+        with tqdm(total=len(pending_pairs), disable=not self.verbose) as pbar:
+            valid_columns |= _run_sync(
+                self._evaluate_keys(
+                    pending_pairs,
+                    pool,
+                    pbar,
+                    on_column=checkpoint.save_column if checkpoint is not None else None,
                 )
             )
 
-        return BatchDictEvalOutput(
+        columns = {
+            key: ColumnEvalOutput.merge(
+                ~missing_mask[:, j],
+                valid_columns[key],
+                ColumnEvalOutput.repeat(
+                    self.leaf_evaluators[key].zero_score, int(missing_mask[:, j].sum())
+                ),
+            )
+            for j, key in enumerate(schema_keys)
+        }
+        return BatchDictEvalOutput.from_columns(
             schema_keys=schema_keys,
-            item_results=results,
+            columns=columns,
+            missing_mask=missing_mask,
+            extra_keys_table=_get_extra_keys_table(pred, self.key_tree),
+            key_paths=self.nested_key_paths,
         )
 
     def check_dtype(self, pred: list[dict[str, Any]], target: list[dict[str, Any]]) -> bool:
         return isinstance(pred, list) and isinstance(target, list) and len(pred) == len(target)
 
+    async def _evaluate_keys(
+        self,
+        valid_pairs: dict[str, tuple[list[Any], list[Any]]],
+        pool: Executor | None,
+        pbar: tqdm,
+        on_column: Callable[[str, ColumnEvalOutput], None] | None = None,
+    ) -> dict[str, ColumnEvalOutput]:
+        """Evaluates all keys concurrently, so that e.g. LLM requests of all keys are in flight at
+        once and CPU-bound keys are evaluated meanwhile.
+
+        Evaluators providing `async_evaluate_batch` run on the event loop (limiting concurrency
+        on their own), the remaining ones in threads (or in the process pool).
+        """
+        loop = asyncio.get_running_loop()
+        num_threads = min(len(valid_pairs), MAX_KEY_THREADS) or 1
+
+        async def evaluate_pairs(
+            key: str, pred: list[Any], target: list[Any], threads: Executor
+        ) -> ColumnEvalOutput:
+            evaluator = self.leaf_evaluators[key]
+            if pred and hasattr(evaluator, "async_evaluate_batch"):
+                return ColumnEvalOutput.from_items(
+                    await evaluator.async_evaluate_batch(pred, target)
+                )
+            elif pred and pool is not None and self._is_parallelizable(evaluator):
+                return await loop.run_in_executor(
+                    threads, _evaluate_in_pool, pool, self.workers, key, pred, target
+                )
+            return await loop.run_in_executor(threads, evaluate_as_column, evaluator, pred, target)
+
+        async def evaluate_key(key: str, threads: Executor) -> ColumnEvalOutput:
+            evaluator = self.leaf_evaluators[key]
+            pred, target = valid_pairs[key]
+            fingerprint = evaluator.fingerprint if self.result_store is not None else None
+            if fingerprint is None or not pred:
+                column = await evaluate_pairs(key, pred, target, threads)
+            else:
+                hashes, stored = await loop.run_in_executor(
+                    threads, self._load_stored, key, fingerprint, pred, target
+                )
+                changed = np.array([value_hashes not in stored for value_hashes in hashes])
+                changed_idx = np.flatnonzero(changed).tolist()
+                changed_column = await evaluate_pairs(
+                    key, [pred[i] for i in changed_idx], [target[i] for i in changed_idx], threads
+                )
+                await loop.run_in_executor(
+                    threads,
+                    self._store,
+                    key,
+                    fingerprint,
+                    [hashes[i] for i in changed_idx],
+                    changed_column,
+                )
+                column = ColumnEvalOutput.merge(
+                    changed,
+                    changed_column,
+                    ColumnEvalOutput.from_items(
+                        [stored[value_hashes] for value_hashes in hashes if value_hashes in stored]
+                    ),
+                )
+            pbar.set_description(f"Evaluated key: {key} ({evaluator.name})")
+            pbar.update()
+            if on_column is not None:
+                on_column(key, column)
+            return column
+
+        with ThreadPoolExecutor(max_workers=num_threads) as threads:
+            columns = await asyncio.gather(*[evaluate_key(key, threads) for key in valid_pairs])
+        return dict(zip(valid_pairs, columns, strict=True))
+
+    def _load_stored(
+        self, key: str, fingerprint: str, pred: list[Any], target: list[Any]
+    ) -> tuple[list[tuple[str, str]], dict[tuple[str, str], Any]]:
+        assert self.result_store is not None
+        hash_value = self.result_store.hash_value
+        hashes = [(hash_value(p), hash_value(t)) for p, t in zip(pred, target, strict=True)]
+        return hashes, self.result_store.get_many(fingerprint, key, hashes)
+
+    def _store(
+        self,
+        key: str,
+        fingerprint: str,
+        hashes: list[tuple[str, str]],
+        column: ColumnEvalOutput,
+    ) -> None:
+        assert self.result_store is not None
+        self.result_store.set_many(
+            fingerprint, key, dict(zip(hashes, column.to_items(), strict=True))
+        )
+
+    @staticmethod
+    def _is_parallelizable(evaluator: EvaluatorBase) -> bool:
+        # vectorized evaluators would only pay for (de)serialization in worker processes
+        return not evaluator.io_bound and not hasattr(evaluator, "evaluate_column")
+
+    def _get_pool(self) -> ProcessPoolExecutor | None:
+        if not self._pool_started:
+            self._pool = self._start_pool()
+            self._pool_started = True
+        return self._pool
+
+    def _start_pool(self) -> ProcessPoolExecutor | None:
+        if self.workers <= 1:
+            return None
+        parallel_evaluators = {
+            key: evaluator
+            for key, evaluator in self.leaf_evaluators.items()
+            if self._is_parallelizable(evaluator)
+        }
+        if not parallel_evaluators:
+            return None
+
+        try:
+            evaluators_spec = pickle.dumps(parallel_evaluators)
+        except (pickle.PicklingError, TypeError, AttributeError) as err:
+            logger.warning(f"Evaluators can't be pickled, running in a single process: {err}")
+            return None
+
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_mp_context(),
+            initializer=_init_worker,
+            initargs=(evaluators_spec,),
+        )
+
     def __repr__(self) -> str:
         table = []
         for key, evaluator in self.eval_mapping.items():
@@ -151,10 +484,306 @@ class BatchDictEval(EvaluatorBase[list[dict[str, Any]], BatchDictEvalOutput]):
         )
         return f"DictEval(error_strategy={self.error_strategy})\n{table_str}"
 
+    def compile(self) -> "CompiledDictEval":
+        """Returns flat plan of this evaluator, see `CompiledDictEval`."""
+        return CompiledDictEval(self)
+
     @classmethod
-    def from_dict_eval(cls, dict_eval: DictEval, verbose: bool) -> "BatchDictEval":
+    def from_dict_eval(
+        cls,
+        dict_eval: DictEval,
+        verbose: bool,
+        workers: int = 1,
+        result_store: ResultStore | None = None,
+    ) -> "BatchDictEval":
         return cls(
             eval_mapping=dict_eval.eval_mapping,
             error_strategy=dict_eval.error_strategy,
             verbose=verbose,
+            workers=workers,
+            result_store=result_store,
+        )
+
+
+class CompiledDictEval:
+    """Flat execution plan of `BatchDictEval`, for low-overhead evaluation of small batches, e.g.
+    in training loops. Built with `BatchDictEval.compile` or `from_dict_eval`.
+
+    Evaluation dispatch is resolved once: each leaf key gets a kernel evaluating all its values
+    at once (`evaluate_column`, which dispatches on types column-wise, when evaluator provides
+    it) and a column of its zero output, shared by values missing from predictions. Keys are
+    evaluated in the calling thread, only evaluators providing `async_evaluate_batch` run
+    concurrently on an event loop; there is no process pool, checkpoint or result store.
+
+    Outputs equal those of `BatchDictEval.evaluate`. Plan can be reused across calls, and is
+    picklable as long as its evaluators are.
+    """
+
+    def __init__(self, evaluator: BatchDictEval) -> None:
+        self.key_tree = evaluator.key_tree
+        self.key_paths = evaluator.key_paths
+        self.nested_key_paths = evaluator.nested_key_paths
+        self.schema_keys = list(evaluator.schema_keys)
+        self.kernels: dict[str, Callable[[list[Any], list[Any]], ColumnEvalOutput]] = {}
+        self.async_kernels: dict[str, Callable[[list[Any], list[Any]], Awaitable[list[Any]]]] = {}
+        self.zero_columns: dict[str, ColumnEvalOutput] = {}
+        for key, leaf_evaluator in evaluator.leaf_evaluators.items():
+            if hasattr(leaf_evaluator, "async_evaluate_batch"):
+                self.async_kernels[key] = leaf_evaluator.async_evaluate_batch
+            elif hasattr(leaf_evaluator, "evaluate_column"):
+                self.kernels[key] = leaf_evaluator.evaluate_column
+            else:
+                self.kernels[key] = partial(evaluate_as_column, leaf_evaluator)
+            self.zero_columns[key] = ColumnEvalOutput.from_items([leaf_evaluator.zero_score])
+
+    @classmethod
+    def from_dict_eval(cls, dict_eval: DictEval) -> "CompiledDictEval":
+        return cls(BatchDictEval.from_dict_eval(dict_eval, verbose=False))
+
+    def __call__(
+        self, pred: list[dict[str, Any]], target: list[dict[str, Any]]
+    ) -> BatchDictEvalOutput:
+        return self.evaluate(pred, target)
+
+    def evaluate(
+        self, pred: list[dict[str, Any]], target: list[dict[str, Any]]
+    ) -> BatchDictEvalOutput:
+        _check_batch(pred, target, self.key_tree)
+        missing_mask, valid_pairs = _split_valid_pairs(pred, target, self.key_paths)
+
+        valid_columns: dict[str, ColumnEvalOutput] = {}
+        async_keys = [key for key in self.async_kernels if valid_pairs[key][0]]
+        if async_keys:
+            valid_columns |= _run_sync(self._evaluate_async(async_keys, valid_pairs))
+        for key, (key_pred, key_target) in valid_pairs.items():
+            if key in valid_columns:
+                continue
+            elif key_pred and key in self.kernels:
+                valid_columns[key] = self.kernels[key](key_pred, key_target)
+            else:
+                valid_columns[key] = self._zeros(key, 0)
+
+        return BatchDictEvalOutput.from_columns(
+            schema_keys=self.schema_keys,
+            columns={
+                key: ColumnEvalOutput.merge(
+                    ~missing_mask[:, j],
+                    valid_columns[key],
+                    self._zeros(key, int(missing_mask[:, j].sum())),
+                )
+                for j, key in enumerate(self.schema_keys)
+            },
+            missing_mask=missing_mask,
+            extra_keys_table=_get_extra_keys_table(pred, self.key_tree),
+            key_paths=self.nested_key_paths,
         )
+
+    def _zeros(self, key: str, num_items: int) -> ColumnEvalOutput:
+        return self.zero_columns[key].take(np.zeros(num_items, dtype=np.int64))
+
+    async def _evaluate_async(
+        self, keys: list[str], valid_pairs: dict[str, tuple[list[Any], list[Any]]]
+    ) -> dict[str, ColumnEvalOutput]:
+        items = await asyncio.gather(*[self.async_kernels[key](*valid_pairs[key]) for key in keys])
+        return {key: ColumnEvalOutput.from_items(key_items) for key, key_items in zip(keys, items)}
+
+
+def _run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _run_in_new_loop(coro)
+    # called from within running event loop (e.g. notebook), runs the coroutine in own loop
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_run_in_new_loop, coro).result()
+
+
+def _run_in_new_loop(coro: Coroutine[Any, Any, T]) -> T:
+    """Runs coroutine like `asyncio.run`, which on each call formats repr of its task (i.e. of the
+    whole result) when checking its SIGINT handler, costing more than evaluation of small batches.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            if pending := asyncio.all_tasks(loop):
+                for task in pending:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+_WORKER_EVALUATORS: dict[str, EvaluatorBase] = {}
+
+
+def get_mp_context() -> multiprocessing.context.BaseContext:
+    # fork is unsafe when threads are running (e.g. torch, streaming evaluation)
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # workers are forked from server with evaluators' modules already imported
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _init_worker(evaluators_spec: bytes) -> None:
+    _WORKER_EVALUATORS.update(pickle.loads(evaluators_spec))
+
+
+def _evaluate_chunk(key: str, pred: list[Any], target: list[Any]) -> ColumnEvalOutput:
+    return evaluate_as_column(_WORKER_EVALUATORS[key], pred, target)
+
+
+def _evaluate_in_pool(
+    pool: Executor,
+    num_workers: int,
+    key: str,
+    pred: list[Any],
+    target: list[Any],
+) -> ColumnEvalOutput:
+    """Splits pairs into contiguous chunks evaluated by workers, results are kept in order."""
+    chunk_size = max(MIN_PAIRS_PER_TASK, math.ceil(len(pred) / (num_workers * TASKS_PER_WORKER)))
+    starts = range(0, len(pred), chunk_size)
+    chunks = pool.map(
+        _evaluate_chunk,
+        [key] * len(starts),
+        [pred[start : start + chunk_size] for start in starts],
+        [target[start : start + chunk_size] for start in starts],
+    )
+    return ColumnEvalOutput.concat(list(chunks))
+
+
+def _check_batch(
+    pred: list[dict[str, Any]], target: list[dict[str, Any]], key_tree: dict[str, Any]
+) -> None:
+    for target_item in target:
+        unspecified_keys = _find_extra_keys(target_item, key_tree)
+        if unspecified_keys:
+            raise ValueError(
+                f"Target dict contains keys not present in eval_mapping: {unspecified_keys}"
+            )
+    if len(pred) != len(target):
+        raise ValueError(f"Got {len(pred)} predictions for {len(target)} targets")
+
+
+def _split_valid_pairs(
+    pred: list[dict[str, Any]],
+    target: list[dict[str, Any]],
+    key_paths: dict[str, tuple[str, ...]],
+) -> tuple[np.ndarray, dict[str, tuple[list[Any], list[Any]]]]:
+    """Returns mask of keys missing from predictions, and pairs of present values of each key."""
+    missing_mask = np.zeros((len(target), len(key_paths)), dtype=bool)
+    valid_pairs: dict[str, tuple[list[Any], list[Any]]] = {}
+    for j, (key, path) in enumerate(key_paths.items()):
+        pred_values = [_get_path(item, path) for item in pred]
+        missing_mask[:, j] = [value is _MISSING for value in pred_values]
+        present_idx = np.flatnonzero(~missing_mask[:, j]).tolist()
+        valid_pairs[key] = (
+            [pred_values[i] for i in present_idx],
+            [_get_path(target[i], path, default=None) for i in present_idx],
+        )
+    return missing_mask, valid_pairs
+
+
+def _get_extra_keys_table(
+    pred: list[dict[str, Any]], key_tree: dict[str, Any]
+) -> dict[str, np.ndarray]:
+    extra_keys_table: dict[str, list[int]] = defaultdict(list)
+    for i, pred_item in enumerate(pred):
+        for key in _find_extra_keys(pred_item, key_tree):
+            extra_keys_table[key].append(i)
+    return {key: np.array(indices, dtype=np.int64) for key, indices in extra_keys_table.items()}
+
+
+def _flatten_eval_mapping(
+    eval_mapping: dict[str, EvaluatorBase], prefix: tuple[str, ...] = ()
+) -> dict[str, tuple[str, ...]]:
+    """Maps leaf keys (paths joined with `PATH_SEP`) to paths through nested DictEval."""
+    key_paths: dict[str, tuple[str, ...]] = {}
+    for key, evaluator in eval_mapping.items():
+        if isinstance(evaluator, DictEval):
+            key_paths |= _flatten_eval_mapping(evaluator.eval_mapping, (*prefix, key))
+        else:
+            path = (*prefix, key)
+            key_paths[PATH_SEP.join(path)] = path
+    return key_paths
+
+
+def _get_evaluator(eval_mapping: dict[str, EvaluatorBase], path: tuple[str, ...]) -> EvaluatorBase:
+    evaluator = eval_mapping[path[0]]
+    for key in path[1:]:
+        assert isinstance(evaluator, DictEval)
+        evaluator = evaluator.eval_mapping[key]
+    return evaluator
+
+
+def _get_path(item: Any, path: tuple[str, ...], default: Any = _MISSING) -> Any:
+    """Returns value under path, None if any value along the path is None."""
+    for key in path:
+        if item is None:
+            return None
+        elif not isinstance(item, dict) or key not in item:
+            return default
+        item = item[key]
+    return item
+
+
+def _get_key_tree(eval_mapping: dict[str, EvaluatorBase]) -> dict[str, Any]:
+    """Maps keys of eval_mapping to key trees of nested DictEval, or to None for leaves."""
+    return {
+        key: _get_key_tree(evaluator.eval_mapping) if isinstance(evaluator, DictEval) else None
+        for key, evaluator in eval_mapping.items()
+    }
+
+
+def _find_extra_keys(item: dict[str, Any], key_tree: dict[str, Any], prefix: str = "") -> list[str]:
+    """Returns paths of keys of (nested) item, which are not present in key tree of eval_mapping."""
+    extra_keys = []
+    for key, value in item.items():
+        if key not in key_tree:
+            extra_keys.append(prefix + key)
+        elif (subtree := key_tree[key]) is not None and isinstance(value, dict):
+            extra_keys.extend(_find_extra_keys(value, subtree, prefix + key + PATH_SEP))
+    return extra_keys
+
+
+def _nest_leaf_outputs(
+    leaves: list[tuple[list[str], Any, int]], extra_keys: dict[str, float]
+) -> DictEvalOutput:
+    """Builds nested DictEvalOutput from (path, output, is_missing) of leaves.
+
+    Nested dict is reported as missing when all of its leaves are missing, extra keys are kept
+    at the top level (as paths).
+    """
+    results: dict[str, Any] = {}
+    missing_keys: dict[str, float] = {}
+    subtrees: dict[str, list[tuple[list[str], Any, int]]] = {}
+    for path, result, is_missing in leaves:
+        if len(path) == 1:
+            results[path[0]] = result
+            missing_keys[path[0]] = is_missing
+        else:
+            # placeholder keeps order of keys
+            results.setdefault(path[0], None)
+            subtrees.setdefault(path[0], []).append((path[1:], result, is_missing))
+    for key, subtree in subtrees.items():
+        results[key] = _nest_leaf_outputs(subtree, extra_keys={})
+        missing_keys[key] = int(all(is_missing for _, _, is_missing in subtree))
+    return DictEvalOutput(results=results, missing_keys=missing_keys, extra_keys=extra_keys)
+
+
+def _get_leaf_output(item_res: DictEvalOutput, path: list[str]) -> tuple[Any, bool]:
+    for key in path[:-1]:
+        item_res = item_res.results[key]  # type: ignore[assignment]
+    return item_res.results[path[-1]], bool(item_res.missing_keys.get(path[-1], 0))
+
+
+def _sorted_contains(indices: np.ndarray, idx: int) -> bool:
+    pos = np.searchsorted(indices, idx)
+    return bool(pos < len(indices) and indices[pos] == idx)
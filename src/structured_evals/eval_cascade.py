@@ -0,0 +1,162 @@
+import asyncio
+from typing import Any, Literal, cast
+
+import numpy as np
+
+from structured_evals.base import (
+    ColumnEvalOutput,
+    EvaluatorBase,
+    ItemEvalOutput,
+    evaluate_as_column,
+)
+from structured_evals.eval_primitive import type_mask
+from structured_evals.ngram_score_fn import chrf_batch
+
+T_cascade_tier = Literal["rule", "exact", "ngram", "escalation"]
+
+DEFAULT_CASCADE_N_CHAR_ORDER = 6
+DEFAULT_HIGH_THRESHOLD = 0.9
+DEFAULT_LOW_THRESHOLD = 0.1
+# only sentence-final punctuation is ignored, other one (signs, currencies, suffixes like in
+# "C++") changes meaning of short answers
+_SENTENCE_END = ".!?"
+
+
+class CascadeEvalOutput(ItemEvalOutput):
+    tier: T_cascade_tier
+
+
+class CascadeTextEval(EvaluatorBase[str, CascadeEvalOutput]):
+    """Decides cheap cases of text comparison itself, and escalates only uncertain ones.
+
+    Pairs are scored in tiers: nulls and non-strings by rules, then equal pairs after
+    normalization (case, whitespace, trailing `.`, `!` or `?`) get 1.0, then pairs with chrF at or
+    above `high_threshold` get 1.0 and at or below `low_threshold` get 0.0. Remaining pairs are
+    scored by `escalation_evaluator` (usually `LlmAsJudge`). Outputs record the deciding tier.
+    """
+
+    def __init__(
+        self,
+        escalation_evaluator: EvaluatorBase,
+        high_threshold: float = DEFAULT_HIGH_THRESHOLD,
+        low_threshold: float = DEFAULT_LOW_THRESHOLD,
+        n_char_order: int = DEFAULT_CASCADE_N_CHAR_ORDER,
+    ) -> None:
+        super().__init__(f"CascadeTextEval({escalation_evaluator.name})")
+        if not 0 <= low_threshold < high_threshold <= 1:
+            raise ValueError("Expected 0 <= low_threshold < high_threshold <= 1")
+        self.escalation_evaluator = escalation_evaluator
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.n_char_order = n_char_order
+
+    @property
+    def zero_score(self) -> CascadeEvalOutput:
+        return CascadeEvalOutput(score=0.0, tier="rule")
+
+    @property
+    def max_score(self) -> CascadeEvalOutput:
+        return CascadeEvalOutput(score=1.0, tier="rule")
+
+    @property
+    def io_bound(self) -> bool:
+        return self.escalation_evaluator.io_bound
+
+    def evaluate(self, pred: str | None, target: str | None) -> CascadeEvalOutput:
+        return self.evaluate_column([pred], [target]).item(0)
+
+    def evaluate_batch(
+        self, pred: list[str | None], target: list[str | None]
+    ) -> list[CascadeEvalOutput]:
+        return self.evaluate_column(pred, target).to_items()
+
+    def evaluate_column(self, pred: list[str | None], target: list[str | None]) -> ColumnEvalOutput:
+        scores, tiers, uncertain = self._prescreen(pred, target)
+        escalated = evaluate_as_column(
+            self.escalation_evaluator,
+            [pred[i] for i in uncertain],
+            [target[i] for i in uncertain],
+        )
+        scores[uncertain] = escalated.scores
+        return self._to_column(scores, tiers)
+
+    async def async_evaluate_batch(
+        self, pred: list[str | None], target: list[str | None]
+    ) -> list[CascadeEvalOutput]:
+        """Evaluates batch within running event loop, escalating asynchronously when possible.
+
+        Prescreening (chrF of the whole batch) runs in a thread, not to block requests of other
+        keys on the loop.
+        """
+        scores, tiers, uncertain = await asyncio.to_thread(self._prescreen, pred, target)
+        uncertain_pred = [pred[i] for i in uncertain]
+        uncertain_target = [target[i] for i in uncertain]
+        if len(uncertain) and hasattr(self.escalation_evaluator, "async_evaluate_batch"):
+            escalated = await self.escalation_evaluator.async_evaluate_batch(
+                uncertain_pred, uncertain_target
+            )
+            scores[uncertain] = [out.score for out in escalated]
+        elif len(uncertain):
+            column = await asyncio.to_thread(
+                evaluate_as_column, self.escalation_evaluator, uncertain_pred, uncertain_target
+            )
+            scores[uncertain] = column.scores
+        return self._to_column(scores, tiers).to_items()
+
+    def is_null(self, item: str | None) -> bool:
+        return item is None or item == ""
+
+    def check_dtype(self, pred: Any, target: Any) -> bool:
+        return isinstance(pred, str) and isinstance(target, str)
+
+    def _prescreen(
+        self, pred: list[str | None], target: list[str | None]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns scores and tiers of decided pairs, and indices of pairs left to escalate."""
+        pred_null = np.fromiter((self.is_null(p) for p in pred), dtype=bool, count=len(pred))
+        target_null = np.fromiter((self.is_null(t) for t in target), dtype=bool, count=len(target))
+        valid = ~pred_null & ~target_null & type_mask(pred, (str,)) & type_mask(target, (str,))
+
+        scores = (pred_null & target_null).astype(float)
+        tiers = np.full(len(pred), "rule", dtype=object)
+        valid_idx = np.flatnonzero(valid)
+        exact = np.array(
+            [_is_exact_match(cast(str, pred[i]), cast(str, target[i])) for i in valid_idx],
+            dtype=bool,
+        )
+        scores[valid_idx[exact]] = 1.0
+        tiers[valid_idx[exact]] = "exact"
+
+        screened = valid_idx[~exact]
+        chrf = chrf_batch(
+            cast(list[str], [pred[i] for i in screened]),
+            cast(list[str], [target[i] for i in screened]),
+            n_char_order=self.n_char_order,
+        )
+        high = chrf >= self.high_threshold
+        low = chrf <= self.low_threshold
+        scores[screened[high]] = 1.0
+        scores[screened[low]] = 0.0
+        tiers[screened[high | low]] = "ngram"
+
+        uncertain = screened[~(high | low)]
+        tiers[uncertain] = "escalation"
+        return scores, tiers, uncertain
+
+    @staticmethod
+    def _to_column(scores: np.ndarray, tiers: np.ndarray) -> ColumnEvalOutput:
+        return ColumnEvalOutput(
+            scores=scores,
+            output_type=CascadeEvalOutput,
+            item_fields={"tier": tiers.astype(str)},
+        )
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split()).rstrip(_SENTENCE_END).rstrip()
+
+
+def _is_exact_match(pred: str, target: str) -> bool:
+    # texts empty after normalization (e.g. "!!!" and "?") are left to later tiers
+    normalized_pred = _normalize(pred)
+    return bool(normalized_pred) and normalized_pred == _normalize(target)
@@ -8,7 +8,8 @@ from structured_evals.base import EvaluatorBase, ItemEvalOutput
 
 
 class DictEvalOutput(BaseModel):
-    results: dict[str, ItemEvalOutput]
+    # nested DictEval yields nested DictEvalOutput
+    results: dict[str, "ItemEvalOutput | DictEvalOutput"]
     missing_keys: dict[str, float]
     extra_keys: dict[str, float]
 
@@ -23,6 +24,10 @@ class DictEval(EvaluatorBase[dict[str, Any], DictEvalOutput]):
         self.eval_mapping = eval_mapping
         self.error_strategy = error_strategy
 
+    @property
+    def io_bound(self) -> bool:
+        return any(evaluator.io_bound for evaluator in self.eval_mapping.values())
+
     @property
     def zero_score(self) -> DictEvalOutput:
         return DictEvalOutput(
@@ -45,7 +50,7 @@ class DictEval(EvaluatorBase[dict[str, Any], DictEvalOutput]):
                 "Target dict contains keys not present in eval_mapping, you must provide a target coherent with eval_mapping"
             )
 
-        results = {}
+        results: dict[str, ItemEvalOutput | DictEvalOutput] = {}
         missing: dict[str, float] = defaultdict(float)
         extra: dict[str, float] = defaultdict(float)
 
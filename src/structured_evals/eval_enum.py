@@ -1,6 +1,9 @@
 from typing import Collection
 
-from structured_evals.base import EvaluatorBase, ItemEvalOutput, T_in
+import numpy as np
+
+from structured_evals.base import ColumnEvalOutput, EvaluatorBase, ItemEvalOutput, T_in
+from structured_evals.eval_primitive import type_mask
 
 T_enum = str | int | float | None
 
@@ -13,6 +16,7 @@ class EnumEval(EvaluatorBase[T_enum, EnumItemOutput]):
     def __init__(self, allowed_values: Collection[T_enum], name: str | None = None) -> None:
         super().__init__(name)
         self.allowed_values = set(allowed_values)
+        self._value_codes = {value: code for code, value in enumerate(self.allowed_values)}
 
     @property
     def zero_score(self) -> EnumItemOutput:
@@ -35,6 +39,38 @@ class EnumEval(EvaluatorBase[T_enum, EnumItemOutput]):
 
         return EnumItemOutput(score=0.0, prohibited_value=pred_prohibited)
 
+    def evaluate_batch(self, pred: list[T_enum], target: list[T_enum]) -> list[EnumItemOutput]:
+        return self.evaluate_column(pred, target).to_items()
+
+    def evaluate_column(self, pred: list[T_enum], target: list[T_enum]) -> ColumnEvalOutput:
+        """Vectorized counterpart of `evaluate`.
+
+        Allowed values are looked up once per value and encoded as integer codes
+        (-1 for values outside of `allowed_values`), which are then compared column-wise.
+        """
+        enum_types = (str, int, float, type(None))
+        valid = type_mask(pred, enum_types) & type_mask(target, enum_types)
+        null = type_mask(pred, (type(None),)) & type_mask(target, (type(None),))
+
+        pred_codes = self._encode(pred, valid)
+        target_codes = self._encode(target, valid)
+
+        pred_prohibited = valid & ~null & (pred_codes < 0)
+        match = valid & (pred_codes >= 0) & (pred_codes == target_codes)
+        return ColumnEvalOutput(
+            scores=(null | match).astype(float),
+            output_type=EnumItemOutput,
+            item_fields={"prohibited_value": pred_prohibited.astype(int)},
+        )
+
+    def _encode(self, values: list[T_enum], valid: np.ndarray) -> np.ndarray:
+        codes = self._value_codes
+        return np.fromiter(
+            (codes.get(v, -1) if is_valid else -1 for v, is_valid in zip(values, valid)),
+            dtype=np.int64,
+            count=len(values),
+        )
+
     def is_null(self, item: T_enum) -> bool:
         return item is None
 
@@ -2,9 +2,11 @@ from typing import Any, Literal
 
 import numpy as np
 
-from structured_evals.base import EvaluatorBase, ItemEvalOutput
+from structured_evals.assignment import linear_sum_assignment
+from structured_evals.base import EvaluatorBase, ItemEvalOutput, evaluate_as_column
 
 T_list_aggregation = Literal["average", "sum"]
+T_list_matching = Literal["hungarian", "greedy"]
 
 
 class ListEvalOutput(ItemEvalOutput):
@@ -13,14 +15,28 @@ class ListEvalOutput(ItemEvalOutput):
 
 
 class ListEval(EvaluatorBase[list[Any], ListEvalOutput]):
+    """Matches target items to predicted items and averages similarity of matched pairs.
+
+    Matching is either `greedy` (default), i.e. each target item (in order) takes the most similar
+    of remaining predicted items, or optimal w.r.t. the total similarity (`hungarian`), which
+    scores differently ordered lists equally but changes scores of existing evaluations. Pairs
+    with zero similarity don't count as matched.
+    """
+
     def __init__(
         self,
         item_evaluator: EvaluatorBase[Any, ItemEvalOutput],
         aggregation: T_list_aggregation = "average",
+        matching: T_list_matching = "greedy",
     ) -> None:
         super().__init__()
         self.item_evaluator = item_evaluator
         self.aggregation = aggregation
+        self.matching = matching
+
+    @property
+    def io_bound(self) -> bool:
+        return getattr(self.item_evaluator, "io_bound", False)
 
     @property
     def zero_score(self) -> ListEvalOutput:
@@ -31,6 +47,60 @@ class ListEval(EvaluatorBase[list[Any], ListEvalOutput]):
         return ListEvalOutput(score=1.0, num_missing_items=0, num_extra_items=0)
 
     def evaluate(self, pred: list[Any], target: list[Any]) -> ListEvalOutput:
+        output = self._evaluate_without_matching(pred, target)
+        if output is not None:
+            return output
+        return self._match(self.similarity_matrix(pred, target))
+
+    def evaluate_batch(
+        self, pred: list[list[Any]], target: list[list[Any]]
+    ) -> list[ListEvalOutput]:
+        """Evaluates pairs of lists, scoring item pairs of all lists as a single batch.
+
+        Item pairs are deduplicated across lists, so that item evaluator (e.g. LLM judge) scores
+        each distinct pair once, and all of them in one call.
+        """
+        outputs: list[ListEvalOutput | None] = []
+        pair_ids: list[list[int]] = []
+        unique_pairs: dict[Any, int] = {}
+        unique_pred: list[Any] = []
+        unique_target: list[Any] = []
+        for pred_list, target_list in zip(pred, target, strict=True):
+            outputs.append(self._evaluate_without_matching(pred_list, target_list))
+            ids = []
+            if outputs[-1] is None:
+                for target_item in target_list:
+                    for pred_item in pred_list:
+                        idx = _pair_id(unique_pairs, pred_item, target_item, len(unique_pred))
+                        if idx == len(unique_pred):
+                            unique_pred.append(pred_item)
+                            unique_target.append(target_item)
+                        ids.append(idx)
+            pair_ids.append(ids)
+
+        scores = evaluate_as_column(self.item_evaluator, unique_pred, unique_target).scores
+        return [
+            output
+            if output is not None
+            else self._match(scores[ids].astype(float).reshape(len(target_list), len(pred_list)))
+            for output, ids, pred_list, target_list in zip(
+                outputs, pair_ids, pred, target, strict=True
+            )
+        ]
+
+    def similarity_matrix(self, pred: list[Any], target: list[Any]) -> np.ndarray:
+        """Returns (len(target), len(pred)) matrix of item scores, evaluated as a single batch."""
+        column = evaluate_as_column(
+            self.item_evaluator,
+            [pred_item for _ in target for pred_item in pred],
+            [target_item for target_item in target for _ in pred],
+        )
+        return column.scores.astype(float).reshape(len(target), len(pred))
+
+    def _evaluate_without_matching(
+        self, pred: list[Any], target: list[Any]
+    ) -> ListEvalOutput | None:
+        """Returns output of pairs which don't need item matching (null or invalid lists)."""
         if self.is_null(pred) and self.is_null(target):
             return self.max_score
         elif self.is_null(pred) and not self.is_null(target):
@@ -43,17 +113,29 @@ class ListEval(EvaluatorBase[list[Any], ListEvalOutput]):
             return score
         elif not self.check_dtype(pred, target):
             return self.zero_score
-
-        # TODO: implement with hungarian algorithm instead of greedy matching
-        target_pred_similarity = []
-
-        for target_item in target:
-            pred_similarities = []
-            for pred_item in pred:
-                pred_similarities.append(self.item_evaluator(pred_item, target_item).score)
-            target_pred_similarity.append(pred_similarities)
-
-        sim = np.array(target_pred_similarity, dtype=float)
+        return None
+
+    def _match(self, sim: np.ndarray) -> ListEvalOutput:
+        if self.matching == "hungarian":
+            return self._match_optimal(sim)
+        elif self.matching == "greedy":
+            return self._match_greedy(sim)
+        else:
+            raise ValueError(f"Unsupported matching: {self.matching}")
+
+    @staticmethod
+    def _match_optimal(sim: np.ndarray) -> ListEvalOutput:
+        target_idx, pred_idx = linear_sum_assignment(-sim)
+        matched_scores = sim[target_idx, pred_idx]
+        num_matched = int((matched_scores > 0.0).sum())
+        return ListEvalOutput(
+            score=float(matched_scores.sum() / sim.shape[0]),
+            num_missing_items=sim.shape[0] - num_matched,
+            num_extra_items=sim.shape[1] - num_matched,
+        )
+
+    @staticmethod
+    def _match_greedy(sim: np.ndarray) -> ListEvalOutput:
         preds_queue = list(range(sim.shape[1]))
         results = {
             "score": 0,
@@ -85,4 +167,18 @@ class ListEval(EvaluatorBase[list[Any], ListEvalOutput]):
         return isinstance(pred, list) and isinstance(target, list)
 
     def __repr__(self) -> str:
-        return f"ListEval(item_evaluator={self.item_evaluator}, aggregation={self.aggregation})"
+        return (
+            f"ListEval(item_evaluator={self.item_evaluator}, aggregation={self.aggregation}, "
+            f"matching={self.matching})"
+        )
+
+
+def _pair_id(unique_pairs: dict[Any, int], pred_item: Any, target_item: Any, new_id: int) -> int:
+    """Returns id of already seen (pred, target) pair, or registers it with `new_id`."""
+    # types are part of the key, as e.g. 1 == 1.0 == True might be scored differently
+    key = (type(pred_item), pred_item, type(target_item), target_item)
+    try:
+        return unique_pairs.setdefault(key, new_id)
+    except TypeError:
+        # unhashable items (e.g. dicts) are not deduplicated
+        return new_id
@@ -1,16 +1,27 @@
 import asyncio
+from contextlib import AbstractAsyncContextManager
+from itertools import chain
 from typing import Any
 
+from langchain_core.exceptions import OutputParserException
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import SystemMessage
 from langchain_core.messages.base import BaseMessage
 from langchain_core.prompts.chat import ChatPromptTemplate, HumanMessagePromptTemplate
 from langchain_core.prompts.message import BaseMessagePromptTemplate
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from pydantic.fields import Field
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from structured_evals.base import EvaluatorBase, ItemEvalOutput
+from structured_evals.judgement_cache import JudgementCache
+from structured_evals.rate_limiter import AdaptiveRateLimiter, is_throttling_error
 
 DEFAULT_MAX_CONCURRENT_CALLS = 30
 DEFAULT_SYSTEM_PROMPT = "You are a judge that scores the quality of the prediction."
@@ -19,34 +30,135 @@ Score the quality of the prediction based on Reference Answer.
 Reference Answer: {target}
 Prediction: {pred}
 """
+DEFAULT_PACKED_PROMPT = """
+Score the quality of each prediction based on its Reference Answer.
+Each pair is scored independently, return a score for every pair id.
+{pairs}
+"""
+DEFAULT_MAX_PACK_TOKENS = 2_000
+# rough number of characters per token, sufficient to budget size of packed prompts
+CHARS_PER_TOKEN = 4
 
 
 class JudgeScore(BaseModel):
     score: float = Field(..., description="The score of the prediction, either 0 or 1")
 
 
+class PairScore(BaseModel):
+    id: int = Field(..., description="The id of the scored pair")
+    score: float = Field(..., description="The score of the prediction, either 0 or 1")
+
+
+class JudgeScores(BaseModel):
+    scores: list[PairScore] = Field(..., description="Scores of all pairs")
+
+
+_wait_exponential = wait_exponential(multiplier=1, min=1, max=10)
+
+
+def _wait_before_retry(retry_state: RetryCallState) -> float:
+    """Exponential backoff, except for requests throttled by endpoint of a judge with rate limiter,
+    which already pauses them (e.g. for Retry-After) before the retried request starts."""
+    judge = retry_state.args[0]
+    err = retry_state.outcome.exception() if retry_state.outcome is not None else None
+    if judge.rate_limiter is not None and err is not None and is_throttling_error(err):
+        return 0.0
+    return _wait_exponential(retry_state)
+
+
 class LlmAsJudge(EvaluatorBase[str, ItemEvalOutput]):
+    """Scores predictions with LLM, comparing them to references.
+
+    With `pack_size` > 1, batches are judged in packed mode: up to `pack_size` pairs (fewer when
+    they would exceed `max_pack_tokens`) are sent in a single request built from `packed_prompt`,
+    and the LLM returns a list of scores. Pairs of packs which fail to parse or miss a score are
+    judged one by one.
+
+    Concurrent requests are limited by `max_concurrent_calls`, unless `rate_limiter` is given,
+    which adapts concurrency to the endpoint within its request and token budgets.
+    """
+
     def __init__(
         self,
         llm: BaseChatModel,
         prompt: str = DEFAULT_PROMPT,
         system_prompt: str | None = DEFAULT_SYSTEM_PROMPT,
         max_concurrent_calls: int = DEFAULT_MAX_CONCURRENT_CALLS,
+        cache: JudgementCache | None = None,
+        pack_size: int = 1,
+        packed_prompt: str = DEFAULT_PACKED_PROMPT,
+        max_pack_tokens: int = DEFAULT_MAX_PACK_TOKENS,
+        rate_limiter: AdaptiveRateLimiter | None = None,
     ) -> None:
         super().__init__(f"LlmAsJudge(llm={getattr(llm, 'model_name', '<unknown>')})")
+        if pack_size < 1:
+            raise ValueError(f"pack_size must be positive, got {pack_size}")
         self.llm = llm
+        self.prompt = prompt
+        self.system_prompt = system_prompt
+        self.max_concurrent_calls = max_concurrent_calls
+        self.cache = cache
+        self.pack_size = pack_size
+        self.packed_prompt = packed_prompt
+        self.max_pack_tokens = max_pack_tokens
+        self.rate_limiter = rate_limiter
+        self.model_id = _get_model_id(llm)
+        self._build_chain()
+
+    def _build_chain(self) -> None:
+        self.prompt_template = self._build_prompt_template(self.prompt)
+        self.chain = self.prompt_template | self.llm.with_structured_output(JudgeScore)
+        self.packed_chain = None
+        if self.pack_size > 1:
+            self.packed_chain = self._build_prompt_template(
+                self.packed_prompt
+            ) | self.llm.with_structured_output(JudgeScores)
 
+        self.semaphore = asyncio.Semaphore(self.max_concurrent_calls)
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+    def _build_prompt_template(self, prompt: str) -> ChatPromptTemplate:
         messages: list[BaseMessage | BaseMessagePromptTemplate] = []
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
+        if self.system_prompt:
+            messages.append(SystemMessage(content=self.system_prompt))
         messages.append(
             HumanMessagePromptTemplate.from_template(prompt, template_format="f-string")
         )
+        return ChatPromptTemplate.from_messages(messages)
 
-        self.prompt_template = ChatPromptTemplate.from_messages(messages)
-        self.chain = self.prompt_template | self.llm.with_structured_output(JudgeScore)
+    def __getstate__(self) -> dict[str, Any]:
+        """Pickles judge as a spec, the chain and semaphore are rebuilt after unpickling."""
+        state = self.__dict__.copy()
+        for attr in [
+            "prompt_template",
+            "chain",
+            "packed_chain",
+            "semaphore",
+            "_semaphore_loop",
+        ]:
+            state.pop(attr)
+        state["llm"] = _ChatModelSpec.from_chat_model(self.llm)
+        return state
 
-        self.semaphore = asyncio.Semaphore(max_concurrent_calls)
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.llm = state["llm"].build()
+        self._build_chain()
+
+    def _fingerprint_params(self) -> dict[str, Any]:
+        # same parameters as keys of judgement cache, limits don't change judgements
+        params = {
+            "model_id": self.model_id,
+            "prompt": self.prompt,
+            "system_prompt": self.system_prompt,
+        }
+        if self.pack_size > 1:
+            params["packed_prompt"] = self.packed_prompt
+        return params
+
+    @property
+    def io_bound(self) -> bool:
+        return True
 
     @property
     def zero_score(self) -> ItemEvalOutput:
@@ -59,22 +171,57 @@ class LlmAsJudge(EvaluatorBase[str, ItemEvalOutput]):
     def evaluate_batch(self, pred: list[str], target: list[str]) -> list[ItemEvalOutput]:
         return asyncio.run(self._async_evaluate_batch(pred, target))
 
+    async def async_evaluate_batch(
+        self, pred: list[str], target: list[str]
+    ) -> list[ItemEvalOutput]:
+        """Evaluates batch within already running event loop (e.g. together with other keys)."""
+        return await self._async_evaluate_batch(pred, target)
+
     async def _async_evaluate_batch(
         self,
         pred: list[str],
         target: list[str],
     ) -> list[ItemEvalOutput]:
-        return await asyncio.gather(
-            *[self.async_evaluate(pred, target) for pred, target in zip(pred, target, strict=True)]
-        )
+        if self.cache is None and self.pack_size == 1:
+            return await asyncio.gather(
+                *[self.async_evaluate(p, t) for p, t in zip(pred, target, strict=True)]
+            )
+
+        outputs = [self._bypass_llm(p, t) for p, t in zip(pred, target, strict=True)]
+        keys = {
+            idx: self._cache_key(pred[idx], target[idx])
+            for idx, out in enumerate(outputs)
+            if out is None
+        }
+        # single lookup for the whole batch, only missing (unique) pairs are sent to LLM
+        scores: dict[str, float] = {}
+        if self.cache is not None:
+            scores = await asyncio.to_thread(self.cache.get_many, keys.values())
+        to_judge = {key: idx for idx, key in keys.items() if key not in scores}
+        judged = await self._async_judge([(pred[idx], target[idx]) for idx in to_judge.values()])
+        new_scores = dict(zip(to_judge, judged, strict=True))
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set_many, new_scores)
+        scores |= new_scores
+
+        return [
+            out if out is not None else ItemEvalOutput(score=scores[keys[idx]])
+            for idx, out in enumerate(outputs)
+        ]
 
     def evaluate(self, pred: str, target: str) -> ItemEvalOutput:
         bypass_output = self._bypass_llm(pred, target)
         if bypass_output is not None:
             return bypass_output
 
-        res = self._call_llm(pred=pred, target=target)
-        return ItemEvalOutput(score=res.score)
+        if self.cache is None:
+            return ItemEvalOutput(score=self._call_llm(pred=pred, target=target).score)
+
+        key = self._cache_key(pred, target)
+        if (score := self.cache.get_many([key]).get(key)) is None:
+            score = self._call_llm(pred=pred, target=target).score
+            self.cache.set_many({key: score})
+        return ItemEvalOutput(score=score)
 
     async def async_evaluate(self, pred: str, target: str) -> ItemEvalOutput:
         bypass_output = self._bypass_llm(pred, target)
@@ -84,12 +231,74 @@ class LlmAsJudge(EvaluatorBase[str, ItemEvalOutput]):
         res = await self._async_call_llm(pred=pred, target=target)
         return ItemEvalOutput(score=res.score)
 
+    async def _async_judge(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self.pack_size == 1:
+            judged = await asyncio.gather(
+                *[self._async_call_llm(pred=pred, target=target) for pred, target in pairs]
+            )
+            return [res.score for res in judged]
+
+        packed_scores = await asyncio.gather(
+            *[self._async_judge_pack(pack) for pack in self._make_packs(pairs)]
+        )
+        return list(chain.from_iterable(packed_scores))
+
+    async def _async_judge_pack(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Judges pairs in a single request, pairs without a valid score are judged separately."""
+        scores: dict[int, float] = {}
+        if len(pairs) > 1:
+            try:
+                res = await self._async_call_packed_llm(pairs=_format_pairs(pairs))
+            except (OutputParserException, ValidationError):
+                res = None
+            if isinstance(res, JudgeScores):
+                scores = {item.id: item.score for item in res.scores}
+
+        missing = [pair_id for pair_id in range(1, len(pairs) + 1) if pair_id not in scores]
+        fallback = await asyncio.gather(
+            *[
+                self._async_call_llm(pred=pairs[pair_id - 1][0], target=pairs[pair_id - 1][1])
+                for pair_id in missing
+            ]
+        )
+        scores |= {pair_id: res.score for pair_id, res in zip(missing, fallback, strict=True)}
+        return [scores[pair_id] for pair_id in range(1, len(pairs) + 1)]
+
+    def _make_packs(self, pairs: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+        """Splits pairs into packs of at most `pack_size` pairs, fitting within token budget."""
+        packs: list[list[tuple[str, str]]] = []
+        pack: list[tuple[str, str]] = []
+        pack_tokens = 0
+        for pair in pairs:
+            num_tokens = _estimate_num_tokens(_format_pairs([pair]))
+            if pack and (
+                len(pack) == self.pack_size or pack_tokens + num_tokens > self.max_pack_tokens
+            ):
+                packs.append(pack)
+                pack, pack_tokens = [], 0
+            pack.append(pair)
+            pack_tokens += num_tokens
+        if pack:
+            packs.append(pack)
+        return packs
+
     def is_null(self, item: str | None) -> bool:
         return item is None or item == ""
 
     def check_dtype(self, pred: Any, target: Any) -> bool:
         return isinstance(pred, str) and isinstance(target, str)
 
+    def _cache_key(self, pred: str, target: str) -> str:
+        return JudgementCache.make_key(
+            model=self.model_id,
+            prompt=self.prompt,
+            system_prompt=self.system_prompt,
+            pred=pred,
+            target=target,
+            # packed judgements differ from single-pair ones, they are cached separately
+            packed_prompt=self.packed_prompt if self.pack_size > 1 else None,
+        )
+
     def _bypass_llm(self, pred: str, target: str) -> ItemEvalOutput | None:
         if pred == target:
             return ItemEvalOutput(score=1.0)
@@ -109,9 +318,79 @@ class LlmAsJudge(EvaluatorBase[str, ItemEvalOutput]):
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
+        wait=_wait_before_retry,
         reraise=True,
     )
     async def _async_call_llm(self, **template_kwargs: Any) -> JudgeScore:
-        async with self.semaphore:
+        async with self._limit(self.prompt, template_kwargs):
             return await self.chain.ainvoke(template_kwargs)  # type: ignore
+
+    @retry(
+        # malformed packs are judged pair by pair instead of retrying
+        retry=retry_if_not_exception_type((OutputParserException, ValidationError)),
+        stop=stop_after_attempt(3),
+        wait=_wait_before_retry,
+        reraise=True,
+    )
+    async def _async_call_packed_llm(self, **template_kwargs: Any) -> JudgeScores | None:
+        async with self._limit(self.packed_prompt, template_kwargs):
+            return await self.packed_chain.ainvoke(template_kwargs)  # type: ignore
+
+    def _limit(
+        self, prompt: str, template_kwargs: dict[str, Any]
+    ) -> AbstractAsyncContextManager[Any]:
+        if self.rate_limiter is None:
+            return self._get_semaphore()
+        request = "".join([self.system_prompt or "", prompt, *map(str, template_kwargs.values())])
+        return self.rate_limiter.limit(num_tokens=_estimate_num_tokens(request))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to a single event loop, while each `evaluate_batch` runs
+        # its own one, hence semaphore is recreated for each new loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self.semaphore = asyncio.Semaphore(self.max_concurrent_calls)
+            self._semaphore_loop = loop
+        return self.semaphore
+
+
+def _format_pairs(pairs: list[tuple[str, str]]) -> str:
+    return "\n".join(
+        f"Pair {pair_id}:\nReference Answer: {target}\nPrediction: {pred}\n"
+        for pair_id, (pred, target) in enumerate(pairs, start=1)
+    )
+
+
+def _estimate_num_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _get_model_id(llm: BaseChatModel) -> str:
+    model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    return f"{type(llm).__name__}({model_name})"
+
+
+class _ChatModelSpec:
+    """Picklable spec of a chat model: class and explicitly set, serializable fields.
+
+    Chat models hold API clients (with locks), which can't be pickled.
+    """
+
+    def __init__(self, model_cls: type[BaseChatModel], kwargs: dict[str, Any]) -> None:
+        self.model_cls = model_cls
+        self.kwargs = kwargs
+
+    @classmethod
+    def from_chat_model(cls, llm: BaseChatModel) -> "_ChatModelSpec":
+        fields = type(llm).model_fields
+        return cls(
+            model_cls=type(llm),
+            kwargs={
+                name: getattr(llm, name)
+                for name in llm.model_fields_set
+                if name in fields and not fields[name].exclude
+            },
+        )
+
+    def build(self) -> BaseChatModel:
+        return self.model_cls(**self.kwargs)
@@ -1,10 +1,17 @@
 import datetime
+from typing import Any, cast
 
-from structured_evals.base import EvaluatorBase, ItemEvalOutput, T_in
+import numpy as np
+
+from structured_evals.base import ColumnEvalOutput, EvaluatorBase, ItemEvalOutput, T_in
 
 T_numeric = int | float | None
 T_date = datetime.datetime | datetime.date | None
 
+# date formats which can be compared as truncated datetime64 values instead of strftime
+DATE_FMT_UNITS = {"%Y-%m-%d": "D", "%Y-%m": "M", "%Y": "Y"}
+UNIX_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
 
 class NumEval(EvaluatorBase[T_numeric, ItemEvalOutput]):
     @property
@@ -21,6 +28,24 @@ class NumEval(EvaluatorBase[T_numeric, ItemEvalOutput]):
             return ItemEvalOutput(score=0.0)
         return ItemEvalOutput(score=float(pred == target))
 
+    def evaluate_batch(
+        self, pred: list[T_numeric], target: list[T_numeric]
+    ) -> list[ItemEvalOutput]:
+        return self.evaluate_column(pred, target).to_items()
+
+    def evaluate_column(self, pred: list[T_numeric], target: list[T_numeric]) -> ColumnEvalOutput:
+        """Vectorized counterpart of `evaluate`."""
+        valid = type_mask(pred, (int, float, type(None))) & type_mask(
+            target, (int, float, type(None))
+        )
+        valid_idx = np.flatnonzero(valid)
+        scores = np.zeros(len(pred), dtype=float)
+        # object arrays keep exact int comparison (no float64 rounding of large ints)
+        scores[valid_idx] = np.equal(
+            to_object_array(pred)[valid_idx], to_object_array(target)[valid_idx]
+        ).astype(bool)
+        return ColumnEvalOutput(scores=scores)
+
     def check_dtype(self, pred: T_in, target: T_in) -> bool:
         return isinstance(pred, T_numeric) and isinstance(target, T_numeric)
 
@@ -51,6 +76,38 @@ class DateEval(EvaluatorBase[T_date, ItemEvalOutput]):
             score=float(pred.strftime(self.date_fmt) == target.strftime(self.date_fmt))
         )
 
+    def evaluate_batch(self, pred: list[T_date], target: list[T_date]) -> list[ItemEvalOutput]:
+        return self.evaluate_column(pred, target).to_items()
+
+    def evaluate_column(self, pred: list[T_date], target: list[T_date]) -> ColumnEvalOutput:
+        """Vectorized counterpart of `evaluate`.
+
+        Dates are compared as datetime64 values truncated to the unit implied by `date_fmt`,
+        formats without such unit fall back to per-pair `strftime` comparison.
+        """
+        date_types = (datetime.datetime, datetime.date)
+        pred_valid = type_mask(pred, date_types)
+        target_valid = type_mask(target, date_types)
+        both_null = type_mask(pred, (type(None),)) & type_mask(target, (type(None),))
+        valid = pred_valid & target_valid
+
+        equal = np.zeros(len(pred), dtype=bool)
+        if valid.any():
+            valid_idx = np.flatnonzero(valid)
+            pred_dates = cast(list[datetime.date], [pred[i] for i in valid_idx])
+            target_dates = cast(list[datetime.date], [target[i] for i in valid_idx])
+            if (unit := DATE_FMT_UNITS.get(self.date_fmt)) is not None:
+                equal[valid_idx] = to_datetime64(pred_dates, unit) == to_datetime64(
+                    target_dates, unit
+                )
+            else:
+                equal[valid_idx] = [
+                    p.strftime(self.date_fmt) == t.strftime(self.date_fmt)
+                    for p, t in zip(pred_dates, target_dates, strict=True)
+                ]
+
+        return ColumnEvalOutput(scores=(both_null | equal).astype(float))
+
     def is_null(self, item: T_date) -> bool:
         return item is None
 
@@ -58,3 +115,21 @@ class DateEval(EvaluatorBase[T_date, ItemEvalOutput]):
         return isinstance(pred, (datetime.datetime, datetime.date)) and isinstance(
             target, (datetime.datetime, datetime.date)
         )
+
+
+def type_mask(values: list[Any], types: tuple[type, ...]) -> np.ndarray:
+    """Returns boolean mask of values being instances of given types."""
+    return np.fromiter((isinstance(v, types) for v in values), dtype=bool, count=len(values))
+
+
+def to_object_array(values: list[Any]) -> np.ndarray:
+    """Builds 1-D object array without numpy unpacking nested sequences."""
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def to_datetime64(dates: list[datetime.date], unit: str) -> np.ndarray:
+    """Converts dates (time part is dropped) to datetime64 truncated to given unit."""
+    days = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates))
+    return (days - UNIX_EPOCH_ORDINAL).astype("datetime64[D]").astype(f"datetime64[{unit}]")
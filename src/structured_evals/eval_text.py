@@ -1,6 +1,15 @@
-from typing import Any, Callable
+from typing import Any, Callable, cast
 
-from structured_evals.base import EvaluatorBase, ItemEvalOutput
+import numpy as np
+
+from structured_evals.base import ColumnEvalOutput, EvaluatorBase, ItemEvalOutput
+from structured_evals.eval_primitive import type_mask
+from structured_evals.ngram_score_fn import (
+    DEFAULT_BETA,
+    DEFAULT_N_CHAR_ORDER,
+    DEFAULT_N_WORD_ORDER,
+    chrf_batch,
+)
 
 
 class EvalTextualMetric(EvaluatorBase[str, ItemEvalOutput]):
@@ -32,3 +41,46 @@ class EvalTextualMetric(EvaluatorBase[str, ItemEvalOutput]):
 
     def check_dtype(self, pred: Any, target: Any) -> bool:
         return isinstance(pred, str) and isinstance(target, str)
+
+
+class ChrfEval(EvalTextualMetric):
+    """chrF score (chrF++ when `n_word_order` > 0), with vectorized evaluation of columns."""
+
+    def __init__(
+        self,
+        n_char_order: int = DEFAULT_N_CHAR_ORDER,
+        n_word_order: int = DEFAULT_N_WORD_ORDER,
+        beta: float = DEFAULT_BETA,
+    ) -> None:
+        super().__init__(self._score_pair, "chrf")
+        self.n_char_order = n_char_order
+        self.n_word_order = n_word_order
+        self.beta = beta
+
+    def evaluate_batch(
+        self, pred: list[str | None], target: list[str | None]
+    ) -> list[ItemEvalOutput]:
+        return self.evaluate_column(pred, target).to_items()
+
+    def evaluate_column(self, pred: list[str | None], target: list[str | None]) -> ColumnEvalOutput:
+        """Vectorized counterpart of `evaluate`."""
+        pred_null = np.fromiter((self.is_null(p) for p in pred), dtype=bool, count=len(pred))
+        target_null = np.fromiter((self.is_null(t) for t in target), dtype=bool, count=len(target))
+        valid = ~pred_null & ~target_null & type_mask(pred, (str,)) & type_mask(target, (str,))
+
+        scores = (pred_null & target_null).astype(float)
+        valid_idx = np.flatnonzero(valid)
+        if len(valid_idx):
+            scores[valid_idx] = chrf_batch(
+                cast(list[str], [pred[i] for i in valid_idx]),
+                cast(list[str], [target[i] for i in valid_idx]),
+                n_char_order=self.n_char_order,
+                n_word_order=self.n_word_order,
+                beta=self.beta,
+            )
+        return ColumnEvalOutput(scores=scores)
+
+    def _score_pair(self, pred: str, target: str) -> float:
+        return float(
+            chrf_batch([pred], [target], self.n_char_order, self.n_word_order, self.beta)[0]
+        )
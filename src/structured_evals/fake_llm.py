@@ -0,0 +1,166 @@
+"""Fake chat model judging offline, for tests and benchmarks of LLM judges without paid endpoint."""
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+_PAIR_HEADER = re.compile(r"^Pair (\d+):", flags=re.MULTILINE)
+_REFERENCE = "Reference Answer:"
+
+
+class FakeApiError(Exception):
+    """Error mimicking errors of API clients, with status code and headers of the response."""
+
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeJudgeChatModel(BaseChatModel):
+    """Chat model answering structured output (tool) calls of judges with deterministic scores.
+
+    Score of a pair is derived from hash of its reference and prediction, hence repeated runs (with
+    and without packing) give identical results.
+    Latency of requests is log-normal with median `latency` seconds and `latency_sigma` spread.
+    Requests fail with 5xx with `error_rate` probability, and are throttled (429 with
+    `retry_after`) with `throttle_rate` probability or when there are more than
+    `max_concurrent_requests` requests in flight.
+    """
+
+    model_name: str = "fake-judge"
+    latency: float = 0.05
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    max_concurrent_requests: int | None = None
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+    _in_flight: int = PrivateAttr(default=0)
+    _latencies: list[float] = PrivateAttr(default_factory=list)
+    _num_errors: int = PrivateAttr(default=0)
+
+    def model_post_init(self, context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-judge"
+
+    @property
+    def request_latencies(self) -> list[float]:
+        """Latencies of all (including failed) requests, in seconds."""
+        return list(self._latencies)
+
+    @property
+    def num_errors(self) -> int:
+        return self._num_errors
+
+    def bind_tools(
+        self,
+        tools: Sequence[dict[str, Any] | type | Callable | BaseTool],
+        *,
+        tool_choice: str | None = None,
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        start = time.perf_counter()
+        self._in_flight += 1
+        try:
+            failure, delay = self._sample_outcome()
+            time.sleep(delay)
+            return self._respond(failure, messages, kwargs.get("tools", []))
+        finally:
+            self._in_flight -= 1
+            self._latencies.append(time.perf_counter() - start)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        start = time.perf_counter()
+        self._in_flight += 1
+        try:
+            failure, delay = self._sample_outcome()
+            await asyncio.sleep(delay)
+            return self._respond(failure, messages, kwargs.get("tools", []))
+        finally:
+            self._in_flight -= 1
+            self._latencies.append(time.perf_counter() - start)
+
+    def _sample_outcome(self) -> tuple[FakeApiError | None, float]:
+        delay = self.latency * math.exp(self.latency_sigma * self._rng.gauss(0, 1))
+        outcome = self._rng.random()
+        overloaded = (
+            self.max_concurrent_requests is not None
+            and self._in_flight > self.max_concurrent_requests
+        )
+        if overloaded or outcome < self.throttle_rate:
+            # throttled requests are rejected right away
+            return FakeApiError(429, {"retry-after": str(self.retry_after)}), 0.0
+        elif outcome < self.throttle_rate + self.error_rate:
+            return FakeApiError(500), delay
+        return None, delay
+
+    def _respond(
+        self,
+        failure: FakeApiError | None,
+        messages: list[BaseMessage],
+        tools: list[dict[str, Any]],
+    ) -> ChatResult:
+        if failure is not None:
+            self._num_errors += 1
+            raise failure
+        if not tools:
+            raise ValueError("FakeJudgeChatModel supports only structured output (tool) calls")
+
+        prompt = str(messages[-1].content)
+        tool_name = tools[0]["function"]["name"]
+        if "scores" in tools[0]["function"]["parameters"]["properties"]:
+            args: dict[str, Any] = {"scores": self._pack_scores(prompt)}
+        else:
+            # custom prompts without references are scored as a whole
+            args = {"score": _hash_score(prompt[max(prompt.find(_REFERENCE), 0) :])}
+        message = AIMessage(content="", tool_calls=[{"name": tool_name, "args": args, "id": "0"}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _pack_scores(prompt: str) -> list[dict[str, Any]]:
+        # parts are: text before the first pair, then (pair id, pair text) for each pair
+        parts = _PAIR_HEADER.split(prompt)
+        return [
+            {"id": int(pair_id), "score": _hash_score(pair_text)}
+            for pair_id, pair_text in zip(parts[1::2], parts[2::2], strict=True)
+        ]
+
+
+def _hash_score(text: str) -> float:
+    return float(hashlib.sha256(text.strip().encode()).digest()[0] % 2)
@@ -0,0 +1,57 @@
+"""JSON decoding with the fastest available backend: orjson or msgspec when installed, stdlib json
+otherwise."""
+
+import json
+from typing import Any, Callable
+
+_fast_loads: Callable[[str | bytes | memoryview], Any]
+_decode_errors: tuple[type[Exception], ...]
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+    _fast_loads = orjson.loads
+    _decode_errors = (orjson.JSONDecodeError,)
+except ImportError:
+    try:
+        import msgspec
+
+        JSON_BACKEND = "msgspec"
+        _fast_loads = msgspec.json.decode
+        _decode_errors = (msgspec.DecodeError,)
+    except ImportError:
+        JSON_BACKEND = "json"
+        _fast_loads = json.loads  # type: ignore[assignment]
+        _decode_errors = (json.JSONDecodeError,)
+
+_FENCE = "```"
+
+
+def loads(data: str | bytes | memoryview) -> Any:
+    """Decodes JSON document, raising `json.JSONDecodeError` when it's invalid."""
+    if isinstance(data, memoryview) and JSON_BACKEND == "json":
+        # stdlib decoder doesn't accept buffers, which the others decode without copying
+        data = bytes(data)
+    try:
+        return _fast_loads(data)
+    except _decode_errors:
+        if JSON_BACKEND == "json":
+            raise
+    # stdlib decoder is more lenient, e.g. it accepts NaN and Infinity
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def loads_bare_or_fenced(text: str) -> Any:
+    """Decodes text which is either bare JSON or a single fenced (```json) block.
+
+    The kind of text is told from its first and last characters, without searching. Raises
+    `json.JSONDecodeError` for any other text, for which a tolerant parser is needed.
+    """
+    text = text.strip()
+    if text.startswith(_FENCE) and text.endswith(_FENCE) and len(text) > 2 * len(_FENCE):
+        # skips info string of the fence, e.g. "json"
+        start = text.find("\n")
+        if start == -1:
+            raise json.JSONDecodeError("Fenced block without content", text, 0)
+        text = text[start + 1 : -len(_FENCE)]
+    return loads(text)
@@ -1,16 +1,18 @@
-from typing import Any, Literal
-
-from dotenv import dotenv_values
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Any, Literal
 
 from structured_evals.base import EvaluatorBase
+from structured_evals.eval_cascade import CascadeTextEval
 from structured_evals.eval_dict import DictEval
 from structured_evals.eval_enum import EnumEval
 from structured_evals.eval_list import ListEval, T_list_aggregation
-from structured_evals.eval_llm_as_judge import LlmAsJudge
 from structured_evals.eval_primitive import DateEval, NumEval
-from structured_evals.eval_text import EvalTextualMetric
-from structured_evals.ngram_score_fn import chrf_eval
+from structured_evals.eval_text import ChrfEval
+
+if TYPE_CHECKING:
+    from structured_evals.eval_llm_as_judge import LlmAsJudge
+    from structured_evals.rate_limiter import AdaptiveRateLimiter
+
+T_text_evaluator = Literal["ngram", "llm", "cascade"]
 
 DEFAULT_BATCH_AGGREGATION = "average"
 DEFAULT_LIST_AGGREGATION: T_list_aggregation = "average"
@@ -19,7 +21,7 @@ DEFAULT_ERROR_STRATEGY: Literal["raise", "ignore"] = "raise"
 
 def infer_structured_evaluator_from_schema(
     schema: dict[str, Any],
-    text_evaluator: Literal["ngram", "llm"],
+    text_evaluator: T_text_evaluator,
 ) -> EvaluatorBase:
     if isinstance(schema, dict):
         assert len(schema) > 0, "Schema must not be empty to infer evaluator"
@@ -33,7 +35,7 @@ def infer_structured_evaluator_from_schema(
 
 
 def _infer_evaluator(
-    item_schema: dict[str, Any], text_evaluator: Literal["ngram", "llm"]
+    item_schema: dict[str, Any], text_evaluator: T_text_evaluator
 ) -> EvaluatorBase:
     assert "type" in item_schema, "Schema must contain 'type' key"
 
@@ -42,9 +44,11 @@ def _infer_evaluator(
             # handles case when schema is compatible with json_schema
             return DateEval()
         elif text_evaluator == "ngram":
-            return EvalTextualMetric(chrf_eval, "chrf")
+            return ChrfEval()
         elif text_evaluator == "llm":
             return get_default_llm_as_judge()
+        elif text_evaluator == "cascade":
+            return CascadeTextEval(escalation_evaluator=get_default_llm_as_judge())
         else:
             raise ValueError(f"Invalid text_evaluator: {text_evaluator}")
     elif item_schema["type"] == "date":
@@ -59,13 +63,22 @@ def _infer_evaluator(
             item_evaluator=_infer_evaluator(item_schema["items"], text_evaluator),
             aggregation=DEFAULT_LIST_AGGREGATION,
         )
+    elif item_schema["type"] in ["object", "dict"]:
+        return infer_structured_evaluator_from_schema(item_schema["properties"], text_evaluator)
     else:
         raise ValueError(
             f"Unsupported type encountered during structured evaluator inference: {item_schema['type']}"
         )
 
 
-def get_default_llm_as_judge() -> LlmAsJudge:
+def get_default_llm_as_judge() -> "LlmAsJudge":
+    # LLM backends are imported only when needed, as they take seconds to import
+    from dotenv import dotenv_values
+    from langchain_openai import ChatOpenAI
+
+    from structured_evals.eval_llm_as_judge import LlmAsJudge
+    from structured_evals.judgement_cache import get_default_judgement_cache
+
     config = dotenv_values()
     return LlmAsJudge(
         llm=ChatOpenAI(
@@ -73,4 +86,20 @@ def get_default_llm_as_judge() -> LlmAsJudge:
             base_url=config["OPENAI_BASE_URL"],  # type: ignore
             api_key=config["OPENAI_API_KEY"],  # type: ignore
         ),
+        cache=get_default_judgement_cache(),
+        pack_size=int(config.get("JUDGE_PACK_SIZE") or 1),
+        rate_limiter=get_default_judge_rate_limiter(),
+    )
+
+
+def get_default_judge_rate_limiter() -> "AdaptiveRateLimiter":
+    """Returns limiter of default judges, with budgets configured in .env file."""
+    from dotenv import dotenv_values
+
+    from structured_evals.rate_limiter import get_default_rate_limiter
+
+    config = dotenv_values()
+    return get_default_rate_limiter(
+        requests_per_minute=float(config.get("JUDGE_REQUESTS_PER_MINUTE") or 0) or None,
+        tokens_per_minute=float(config.get("JUDGE_TOKENS_PER_MINUTE") or 0) or None,
     )
@@ -1,16 +1,13 @@
 import datetime
 from typing import Any, Literal
 
-from dotenv import dotenv_values
-from langchain_openai import ChatOpenAI
-
 from structured_evals.base import EvaluatorBase
+from structured_evals.eval_cascade import CascadeTextEval
 from structured_evals.eval_dict import DictEval
 from structured_evals.eval_list import ListEval, T_list_aggregation
-from structured_evals.eval_llm_as_judge import LlmAsJudge
 from structured_evals.eval_primitive import DateEval, NumEval
-from structured_evals.eval_text import EvalTextualMetric
-from structured_evals.ngram_score_fn import chrf_eval
+from structured_evals.eval_text import ChrfEval
+from structured_evals.infer_from_schema import T_text_evaluator, get_default_llm_as_judge
 
 DEFAULT_BATCH_AGGREGATION = "average"
 DEFAULT_LIST_AGGREGATION: T_list_aggregation = "average"
@@ -19,7 +16,7 @@ DEFAULT_ERROR_STRATEGY: Literal["raise", "ignore"] = "raise"
 
 def infer_structured_evaluator_from_predictions(
     data: Any,
-    text_evaluator: Literal["ngram", "llm"],
+    text_evaluator: T_text_evaluator,
 ) -> EvaluatorBase:
     if isinstance(data, dict):
         assert len(data) > 0, "Dict must not be empty to infer evaluator"
@@ -31,9 +28,11 @@ def infer_structured_evaluator_from_predictions(
         )
     elif isinstance(data, str):
         if text_evaluator == "ngram":
-            return EvalTextualMetric(chrf_eval, "chrf")
+            return ChrfEval()
         elif text_evaluator == "llm":
             return get_default_llm_as_judge()
+        elif text_evaluator == "cascade":
+            return CascadeTextEval(escalation_evaluator=get_default_llm_as_judge())
         else:
             raise ValueError(f"Invalid text_evaluator: {text_evaluator}")
     elif isinstance(data, float):
@@ -52,14 +51,3 @@ def infer_structured_evaluator_from_predictions(
         raise ValueError(
             f"Unsupported type encountered during structured evaluator inference: {type(data)}"
         )
-
-
-def get_default_llm_as_judge() -> LlmAsJudge:
-    config = dotenv_values()
-    return LlmAsJudge(
-        llm=ChatOpenAI(
-            model=config["OPENAI_MODEL"],  # type: ignore
-            base_url=config["OPENAI_BASE_URL"],  # type: ignore
-            api_key=config["OPENAI_API_KEY"],  # type: ignore
-        ),
-    )
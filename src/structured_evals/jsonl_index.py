@@ -0,0 +1,142 @@
+"""Sidecar index of byte offsets of jsonl records, which lets records be read by position without
+reading the whole file (e.g. a range of records of a shard, or records to be re-scored)."""
+
+import hashlib
+import mmap
+import os
+from array import array
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from structured_evals import fast_json
+
+INDEX_SUFFIX = ".idx.npz"
+
+
+class JsonlIndex:
+    """Byte offset and length of each record (non-blank line) of jsonl file, and optionally a hash
+    of its content, which tells records changed between versions of the file.
+
+    Index is stored next to the file (`<file>.idx.npz`) together with size and modification time
+    of the file, it's rebuilt by `open` when the file changed. Records are read through `mmap`,
+    each one is decoded straight from a slice of the mapped file.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        offsets: np.ndarray,
+        lengths: np.ndarray,
+        hashes: np.ndarray | None = None,
+        file_size: int = 0,
+        file_mtime_ns: int = 0,
+    ) -> None:
+        self.path = Path(path)
+        self.offsets = offsets
+        self.lengths = lengths
+        self.hashes = hashes
+        self.file_size = file_size
+        self.file_mtime_ns = file_mtime_ns
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @staticmethod
+    def get_index_path(path: str | Path) -> Path:
+        return Path(f"{path}{INDEX_SUFFIX}")
+
+    @classmethod
+    def open(cls, path: str | Path, with_hashes: bool = False) -> "JsonlIndex":
+        """Loads stored index of the file, or builds and stores it when it's missing or stale."""
+        index = cls.load(path)
+        if index is None or (with_hashes and index.hashes is None):
+            index = cls.build(path, with_hashes)
+            try:
+                index.save()
+            except OSError:
+                # e.g. read-only directory, index is used without storing it then
+                pass
+        return index
+
+    @classmethod
+    def build(cls, path: str | Path, with_hashes: bool = False) -> "JsonlIndex":
+        """Scans the file, skipping blank lines as `iter_jsonl_chunks` does."""
+        path = Path(path)
+        if path.suffix != ".jsonl":
+            raise ValueError(f"Only jsonl files can be indexed, got: {path}")
+
+        stat = path.stat()
+        offsets, lengths = array("q"), array("q")
+        hashes = bytearray()
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                content = line.rstrip()
+                if content:
+                    offsets.append(offset)
+                    lengths.append(len(content))
+                    if with_hashes:
+                        hashes += hashlib.blake2b(content, digest_size=16).digest()
+                offset += len(line)
+        return cls(
+            path,
+            offsets=np.frombuffer(offsets, dtype=np.int64),
+            lengths=np.frombuffer(lengths, dtype=np.int64),
+            hashes=np.frombuffer(bytes(hashes), dtype="S16") if with_hashes else None,
+            file_size=stat.st_size,
+            file_mtime_ns=stat.st_mtime_ns,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "JsonlIndex | None":
+        """Loads stored index, returns None when there is none or the file changed since."""
+        index_path = cls.get_index_path(path)
+        if not index_path.exists():
+            return None
+        stat = Path(path).stat()
+        with np.load(index_path) as data:
+            if (int(data["file_size"]), int(data["file_mtime_ns"])) != (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                return None
+            return cls(
+                path,
+                offsets=data["offsets"],
+                lengths=data["lengths"],
+                hashes=data["hashes"] if "hashes" in data else None,
+                file_size=stat.st_size,
+                file_mtime_ns=stat.st_mtime_ns,
+            )
+
+    def save(self) -> None:
+        """Stores index next to the file, replacing it atomically."""
+        arrays: dict[str, Any] = {
+            "offsets": self.offsets,
+            "lengths": self.lengths,
+            "file_size": np.int64(self.file_size),
+            "file_mtime_ns": np.int64(self.file_mtime_ns),
+        }
+        if self.hashes is not None:
+            arrays["hashes"] = self.hashes
+        index_path = self.get_index_path(self.path)
+        tmp_path = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, index_path)
+
+    def read_records(self, indices: Sequence[int]) -> list[dict[str, Any]]:
+        """Reads records at given positions (e.g. a range), in the given order."""
+        positions = np.asarray(indices, dtype=np.int64)
+        if len(positions) == 0:
+            return []
+        offsets = self.offsets[positions].tolist()
+        lengths = self.lengths[positions].tolist()
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return [
+                    fast_json.loads(view[offset : offset + length])
+                    for offset, length in zip(offsets, lengths)
+                ]
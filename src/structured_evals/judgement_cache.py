@@ -0,0 +1,190 @@
+"""Persistent cache of LLM judgements, with in-memory LRU tier in front of SQLite store."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable
+
+from pydantic import BaseModel, computed_field
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "structured-evals" / "judgements.db"
+DEFAULT_MAX_MEMORY_ITEMS = 100_000
+DEFAULT_MAX_DISK_ITEMS = 10_000_000
+# SQLite limits number of parameters of a single statement
+_MAX_QUERY_PARAMS = 500
+
+_default_cache: "JudgementCache | None" = None
+
+
+class CacheStats(BaseModel):
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_rate(self) -> float:
+        num_lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / num_lookups if num_lookups else 0.0
+
+
+class JudgementCache:
+    """Caches scores of judged (pred, target) pairs under keys built with `make_key`.
+
+    Lookups go to an in-process LRU first, and then (in batches) to SQLite database in WAL mode,
+    so that several evaluation processes can read it while one of them writes. Entries older than
+    `ttl` seconds are treated as missing, and when the database exceeds `max_disk_items`, the
+    oldest entries are evicted. Without `path`, the cache is kept in memory only.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = DEFAULT_CACHE_PATH,
+        ttl: float | None = None,
+        max_memory_items: int = DEFAULT_MAX_MEMORY_ITEMS,
+        max_disk_items: int = DEFAULT_MAX_DISK_ITEMS,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_conn"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt: str,
+        system_prompt: str | None,
+        pred: Any,
+        target: Any,
+        packed_prompt: str | None = None,
+    ) -> str:
+        """Key of judgement, `packed_prompt` is given for judgements of packed requests."""
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        fields = [model, prompt_hash, system_prompt, pred, target]
+        if packed_prompt is not None:
+            # appended only in packed mode, keeping keys of single-pair judgements unchanged
+            fields.append(hashlib.sha256(packed_prompt.encode()).hexdigest())
+        payload = json.dumps(fields, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, float]:
+        """Returns scores of cached keys, missing keys are omitted."""
+        now = time.time()
+        found: dict[str, float] = {}
+        to_fetch: list[str] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._memory.get(key)
+                if entry is not None and not self._is_expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+                    self.stats.memory_hits += 1
+                else:
+                    to_fetch.append(key)
+
+            num_disk_hits = 0
+            for key, (score, created_at) in self._fetch(to_fetch).items():
+                if not self._is_expired(created_at, now):
+                    found[key] = score
+                    num_disk_hits += 1
+                    self._remember(key, score, created_at)
+            self.stats.disk_hits += num_disk_hits
+            self.stats.misses += len(to_fetch) - num_disk_hits
+        return found
+
+    def set_many(self, scores: dict[str, float]) -> None:
+        if not scores:
+            return
+        now = time.time()
+        with self._lock:
+            for key, score in scores.items():
+                self._remember(key, score, now)
+            if (conn := self._connect()) is not None:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO judgements (key, score, created_at) VALUES (?, ?, ?)",
+                        [(key, score, now) for key, score in scores.items()],
+                    )
+                    self._evict(conn)
+
+    def _remember(self, key: str, score: float, created_at: float) -> None:
+        self._memory[key] = (score, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _fetch(self, keys: list[str]) -> dict[str, tuple[float, float]]:
+        if not keys or (conn := self._connect()) is None:
+            return {}
+        rows = []
+        for start in range(0, len(keys), _MAX_QUERY_PARAMS):
+            batch = keys[start : start + _MAX_QUERY_PARAMS]
+            rows += conn.execute(
+                "SELECT key, score, created_at FROM judgements "
+                f"WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+        return {key: (score, created_at) for key, score, created_at in rows}
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if self.ttl is not None:
+            conn.execute("DELETE FROM judgements WHERE created_at < ?", (time.time() - self.ttl,))
+        # rowids grow with insertion order (replaced entries get new ones, leaving gaps), hence
+        # the table can exceed the limit only when span of rowids does, which is checked without
+        # a table scan; entries beyond the newest `max_disk_items` ones are the oldest ones
+        (rowid_span,) = conn.execute(
+            "SELECT COALESCE(MAX(rowid) - MIN(rowid) + 1, 0) FROM judgements"
+        ).fetchone()
+        if rowid_span > self.max_disk_items:
+            conn.execute(
+                "DELETE FROM judgements WHERE rowid IN "
+                "(SELECT rowid FROM judgements ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_items,),
+            )
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # connection is shared by threads of evaluation, access is guarded by the lock
+            self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS judgements "
+                "(key TEXT PRIMARY KEY, score REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS judgements_created_at ON judgements (created_at)"
+            )
+        return self._conn
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+
+def get_default_judgement_cache() -> JudgementCache:
+    """Returns cache shared by judges of the process, stored in user's cache directory."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = JudgementCache()
+    return _default_cache
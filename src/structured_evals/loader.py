@@ -1,17 +1,75 @@
 import json
-from datetime import datetime
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Any, Callable, Literal
+from typing import Any, Callable, Iterator, Literal, Sequence
 
-from langchain_core.utils.json import parse_json_markdown
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
 
+from structured_evals import fast_json
+from structured_evals.coercion import CoercionPlan, coerce_iso_dates
+from structured_evals.jsonl_index import JsonlIndex
 from structured_evals.parsing import parse_yaml
 
+MIN_RECORDS_PER_TASK = 64
+TASKS_PER_WORKER = 4
+MAX_REPORTED_PARSE_ERRORS = 100
+
+
+class ParseError(BaseModel):
+    index: int
+    field: Literal["pred", "target"]
+    message: str
+
+
+class ParseStats(BaseModel):
+    """Counts of records which failed to parse, with errors of (at most `max_errors`) records."""
+
+    num_records: int = 0
+    num_failed_records: int = 0
+    num_failed_preds: int = 0
+    num_failed_targets: int = 0
+    errors: list[ParseError] = Field(default_factory=list)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def failure_rate(self) -> float:
+        return self.num_failed_records / self.num_records if self.num_records else 0.0
+
+    def merge(
+        self, other: "ParseStats", max_errors: int = MAX_REPORTED_PARSE_ERRORS
+    ) -> "ParseStats":
+        return ParseStats(
+            num_records=self.num_records + other.num_records,
+            num_failed_records=self.num_failed_records + other.num_failed_records,
+            num_failed_preds=self.num_failed_preds + other.num_failed_preds,
+            num_failed_targets=self.num_failed_targets + other.num_failed_targets,
+            errors=(self.errors + other.errors)[:max_errors],
+        )
+
 
 class EvaluationBatch(BaseModel):
+    """Parsed predictions and targets.
+
+    Records which fail to parse don't abort loading, they are listed in `parse_stats`. Records
+    with unparsable prediction are kept with empty prediction (i.e. all keys missing), records
+    with unparsable target are kept with empty prediction and target, hence items stay aligned
+    with positions of records (e.g. rows of raw scores). As such records can't be scored, their
+    positions are listed in `failed_targets`, and they are excluded from aggregation (see
+    `BatchDictEvalOutput.drop_items`). Records missing prediction or target key are an error of
+    configuration rather than of a record, they raise `KeyError`.
+
+    Loaders build batches with `model_construct`, as records are already parsed into dicts and
+    validation would only copy them.
+    """
+
     pred: list[dict[str, Any]]
     target: list[dict[str, Any]]
+    parse_stats: ParseStats = Field(default_factory=ParseStats)
+    failed_targets: list[int] = Field(default_factory=list)
 
     @classmethod
     def from_json(
@@ -20,34 +78,128 @@ class EvaluationBatch(BaseModel):
         record_format: Literal["json", "yaml", None],
         pred_key: str = "pred",
         target_key: str = "target",
+        coercion_plan: CoercionPlan | None = None,
+        workers: int = 1,
+        records: Sequence[int] | None = None,
+    ) -> "EvaluationBatch":
+        """Loads json or jsonl file, with `coercion_plan` (e.g. compiled from schema) records are
+        converted to expected types, see `get_record_parser`. With `workers` > 1, records are
+        parsed in a process pool.
+
+        With `records` (e.g. a range), only records at these positions are loaded. Records of jsonl
+        file are read through its `JsonlIndex`, which is built on first use.
+        """
+        if records is None:
+            data = load_results_file(path)
+        elif Path(path).suffix == ".jsonl":
+            data = JsonlIndex.open(path).read_records(records)
+        else:
+            all_data = load_results_file(path)
+            data = [all_data[i] for i in records]
+        parser = get_record_parser(record_format, coercion_plan)
+        with _start_parse_pool(workers, len(data)) or nullcontext() as pool:
+            return cls.from_records(data, parser, pred_key, target_key, pool, workers, records)
+
+    @classmethod
+    def iter_chunks(
+        cls,
+        path: str | Path,
+        chunk_size: int,
+        record_format: Literal["json", "yaml", None],
+        pred_key: str = "pred",
+        target_key: str = "target",
+        skip_chunks: int = 0,
+        coercion_plan: CoercionPlan | None = None,
+        workers: int = 1,
+        records: range | None = None,
+    ) -> Iterator["EvaluationBatch"]:
+        """Lazily reads and parses jsonl file in batches of at most `chunk_size` records.
+
+        First `skip_chunks` chunks (e.g. already evaluated ones) are skipped without parsing.
+        With `workers` > 1, records of each chunk are parsed in a process pool. With `records`,
+        only the given range of records is read, seeking to it through `JsonlIndex` of the file.
+        """
+        parser = get_record_parser(record_format, coercion_plan)
+        with _start_parse_pool(workers, chunk_size) or nullcontext() as pool:
+            for indices, chunk in _iter_indexed_chunks(path, chunk_size, skip_chunks, records):
+                yield cls.from_records(chunk, parser, pred_key, target_key, pool, workers, indices)
+
+    @classmethod
+    def from_records(
+        cls,
+        records: list[dict[str, Any]],
+        parser: Callable[[Any], Any],
+        pred_key: str = "pred",
+        target_key: str = "target",
+        pool: Executor | None = None,
+        workers: int = 1,
+        indices: Sequence[int] | None = None,
     ) -> "EvaluationBatch":
-        data = load_results_file(path)
-        parser: Callable[[Any], Any]
-        if record_format == "yaml":
-            parser = parse_yaml
-        elif record_format == "json":
-            parser = parse_json
-        elif record_format is None:
-            parser = identity
+        """Parses predictions and targets of records, `indices` are positions of records in the
+        file used in parse errors, consecutive from 0 by default."""
+        if pool is not None:
+            task_size = max(
+                MIN_RECORDS_PER_TASK, math.ceil(len(records) / (workers * TASKS_PER_WORKER))
+            )
+            tasks = [
+                records[start : start + task_size] for start in range(0, len(records), task_size)
+            ]
+            parse_task = partial(_parse_records, parser, pred_key, target_key)
+            parsed = [pair for task_pairs in pool.map(parse_task, tasks) for pair in task_pairs]
         else:
-            raise ValueError(f"Unsupported format: {record_format}")
+            parsed = _parse_records(parser, pred_key, target_key, records)
 
-        preds = [parser(item[pred_key]) for item in data]
-        targets = [parser(item[target_key]) for item in data]
-        return cls(pred=preds, target=targets)
+        preds, targets, failed_targets = [], [], []
+        stats = ParseStats(num_records=len(records))
+        indices = range(len(records)) if indices is None else indices
+        for pos, (i, ((pred, pred_error), (target, target_error))) in enumerate(
+            zip(indices, parsed)
+        ):
+            if pred_error is not None:
+                stats.errors.append(ParseError(index=i, field="pred", message=pred_error))
+                stats.num_failed_preds += 1
+            if target_error is not None:
+                stats.errors.append(ParseError(index=i, field="target", message=target_error))
+                stats.num_failed_targets += 1
+                failed_targets.append(pos)
+            preds.append(pred if pred_error is None and target_error is None else {})
+            targets.append(target if target_error is None else {})
+            stats.num_failed_records += pred_error is not None or target_error is not None
+        return cls.model_construct(
+            pred=preds, target=targets, parse_stats=stats, failed_targets=failed_targets
+        )
 
 
-def parse_json(text: str) -> dict[str, Any]:
-    """Parses JSON, trying parse dates as isoformat."""
-    json_dict = parse_json_markdown(text)
+def get_record_parser(
+    record_format: Literal["json", "yaml", None], coercion_plan: CoercionPlan | None = None
+) -> Callable[[Any], Any]:
+    if record_format == "yaml":
+        return partial(parse_yaml, coercion_plan=coercion_plan)
+    elif record_format == "json":
+        return partial(parse_json, coercion_plan=coercion_plan)
+    elif record_format is None:
+        return coercion_plan or identity
+    else:
+        raise ValueError(f"Unsupported format: {record_format}")
 
-    for key, value in json_dict.items():
-        try:
-            json_dict[key] = datetime.fromisoformat(value).date()
-        except (ValueError, TypeError):
-            pass
 
-    return json_dict
+def parse_json(text: str, coercion_plan: CoercionPlan | None = None) -> dict[str, Any]:
+    """Parses JSON, converting values with `coercion_plan` when given, otherwise trying to parse
+    top-level values as ISO dates.
+
+    Bare and fenced JSON are decoded directly, the tolerant parser (which searches for fenced
+    block and repairs partial JSON) is used only when that fails.
+    """
+    try:
+        json_dict = fast_json.loads_bare_or_fenced(text)
+    except json.JSONDecodeError:
+        from langchain_core.utils.json import parse_json_markdown
+
+        json_dict = parse_json_markdown(text)
+
+    if coercion_plan is not None:
+        return coercion_plan(json_dict)
+    return coerce_iso_dates(json_dict)
 
 
 def load_results_file(path: str | Path) -> list[dict[str, Any]]:
@@ -67,14 +219,78 @@ def load_results_file(path: str | Path) -> list[dict[str, Any]]:
 
 
 def load_jsonl(path: str | Path) -> list[dict[str, Any]]:
-    with open(path) as f:
-        return [json.loads(line) for line in f]
+    with open(path, "rb") as f:
+        return [fast_json.loads(line) for line in f]
+
+
+def iter_jsonl_chunks(
+    path: str | Path, chunk_size: int, skip_chunks: int = 0
+) -> Iterator[list[dict[str, Any]]]:
+    """Reads jsonl file in chunks of at most `chunk_size` records, skipping blank lines."""
+    assert chunk_size > 0, "Chunk size must be positive"
+    if Path(path).suffix != ".jsonl":
+        raise ValueError(f"Only jsonl files can be read in chunks, got: {path}")
+
+    with open(path, "rb") as f:
+        lines = (line for line in f if line.strip())
+        next(islice(lines, skip_chunks * chunk_size, skip_chunks * chunk_size), None)
+        while chunk := list(islice(lines, chunk_size)):
+            yield [fast_json.loads(line) for line in chunk]
 
 
 def load_json(path: str | Path) -> dict[str, Any]:
-    with open(path) as f:
-        return json.loads(f.read())
+    with open(path, "rb") as f:
+        return fast_json.loads(f.read())
 
 
 def identity(x: Any) -> Any:
     return x
+
+
+def _iter_indexed_chunks(
+    path: str | Path, chunk_size: int, skip_chunks: int, records: range | None
+) -> Iterator[tuple[Sequence[int], list[dict[str, Any]]]]:
+    """Yields positions and records of chunks, read sequentially or through index of the file."""
+    if records is None:
+        start = skip_chunks * chunk_size
+        for chunk in iter_jsonl_chunks(path, chunk_size, skip_chunks):
+            yield range(start, start + len(chunk)), chunk
+            start += len(chunk)
+        return
+
+    assert chunk_size > 0, "Chunk size must be positive"
+    index = JsonlIndex.open(path)
+    for start in range(skip_chunks * chunk_size, len(records), chunk_size):
+        indices = records[start : start + chunk_size]
+        yield indices, index.read_records(indices)
+
+
+def _start_parse_pool(workers: int, num_records: int) -> ProcessPoolExecutor | None:
+    if workers <= 1 or num_records <= MIN_RECORDS_PER_TASK:
+        return None
+    from structured_evals.eval_batch import get_mp_context
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_mp_context())
+
+
+def _parse_records(
+    parser: Callable[[Any], Any], pred_key: str, target_key: str, records: list[dict[str, Any]]
+) -> list[tuple[tuple[Any, str | None], tuple[Any, str | None]]]:
+    """Returns (parsed value, error message) of prediction and target of each record."""
+    return [
+        (_try_parse(parser, record, pred_key), _try_parse(parser, record, target_key))
+        for record in records
+    ]
+
+
+def _try_parse(
+    parser: Callable[[Any], Any], record: dict[str, Any], key: str
+) -> tuple[Any, str | None]:
+    text = record[key]
+    try:
+        value = parser(text)
+    except Exception as err:
+        return None, f"{type(err).__name__}: {err}"
+    if not isinstance(value, dict):
+        return None, f"Expected dict, got {type(value).__name__}"
+    return value, None
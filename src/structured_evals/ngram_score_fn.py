@@ -1,5 +1,164 @@
-from torchmetrics.functional.text import chrf_score
+"""Native chrF/chrF++ scores (Popović, 2015, 2017), computed for whole columns of pairs at once.
+
+Scores are numerically equivalent to sentence-level `torchmetrics.functional.text.chrf_score`
+(computed in float32), without per-pair tensor overhead nor torch dependency.
+"""
+
+from itertools import chain
+
+import numpy as np
+
+DEFAULT_N_CHAR_ORDER = 1
+DEFAULT_N_WORD_ORDER = 0
+DEFAULT_BETA = 2.0
+
+_EPS_SMOOTHING = np.float32(1e-16)
+# Taken from https://github.com/mjpost/sacrebleu/blob/master/sacrebleu/metrics/chrf.py
+_PUNCTUATIONS = set("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
 
 
 def chrf_eval(pred: str, target: str) -> float:
-    return chrf_score([pred], [target], n_char_order=1, n_word_order=0).item()  # type: ignore
+    return float(chrf_batch([pred], [target])[0])
+
+
+def chrf_batch(
+    preds: list[str],
+    targets: list[str],
+    n_char_order: int = DEFAULT_N_CHAR_ORDER,
+    n_word_order: int = DEFAULT_N_WORD_ORDER,
+    beta: float = DEFAULT_BETA,
+    lowercase: bool = False,
+    whitespace: bool = False,
+) -> np.ndarray:
+    """Computes sentence-level chrF (chrF++ when `n_word_order` > 0) of each (pred, target) pair.
+
+    Returns:
+        float32 array of scores, aligned with input pairs
+    """
+    if len(preds) != len(targets):
+        raise ValueError(f"Got {len(preds)} predictions for {len(targets)} targets")
+    if n_char_order < 1:
+        raise ValueError("Expected `n_char_order` to be an integer greater than or equal to 1.")
+    if n_word_order < 0:
+        raise ValueError("Expected `n_word_order` to be an integer greater than or equal to 0.")
+
+    if lowercase:
+        preds = [p.lower() for p in preds]
+        targets = [t.lower() for t in targets]
+
+    # sums over char and word orders are accumulated separately, as in the reference implementation
+    char_f_score = np.zeros(len(preds), dtype=np.float32)
+    word_f_score = np.zeros(len(preds), dtype=np.float32)
+    if not preds:
+        return char_f_score
+
+    char_tokens = _char_tokens(preds, whitespace), _char_tokens(targets, whitespace)
+    for n in range(1, n_char_order + 1):
+        char_f_score += _ngram_f_score(*char_tokens, n, beta)
+
+    if n_word_order:
+        pred_words, target_words = _split_rows(_word_tokens(preds + targets), len(preds))
+        for n in range(1, n_word_order + 1):
+            word_f_score += _ngram_f_score(pred_words, target_words, n, beta)
+
+    return (char_f_score + word_f_score) / np.float32(n_char_order + n_word_order)
+
+
+# Tokens of a column are kept as a flat array of token ids, with (num_rows + 1) row offsets
+_Tokens = tuple[np.ndarray, np.ndarray]
+
+
+def _char_tokens(sentences: list[str], whitespace: bool) -> _Tokens:
+    if not whitespace:
+        sentences = [s.strip().replace(" ", "") for s in sentences]
+    # utf-32 code units are exactly code points, i.e. python characters
+    codes = np.frombuffer("".join(sentences).encode("utf-32-le"), dtype=np.uint32)
+    return codes.astype(np.int64), _offsets([len(s) for s in sentences])
+
+
+def _word_tokens(sentences: list[str]) -> _Tokens:
+    vocab: dict[str, int] = {}
+    rows = [
+        [vocab.setdefault(word, len(vocab)) for word in _get_words_and_punctuation(s)]
+        for s in sentences
+    ]
+    ids = np.fromiter(chain.from_iterable(rows), dtype=np.int64)
+    return ids, _offsets([len(row) for row in rows])
+
+
+def _split_rows(tokens: _Tokens, num_first: int) -> tuple[_Tokens, _Tokens]:
+    ids, offsets = tokens
+    split = offsets[num_first]
+    return (ids[:split], offsets[: num_first + 1]), (ids[split:], offsets[num_first:] - split)
+
+
+def _offsets(lengths: list[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _get_words_and_punctuation(sentence: str) -> list[str]:
+    words = []
+    for word in sentence.strip().split():
+        if len(word) > 1 and word[-1] in _PUNCTUATIONS:
+            words.extend([word[:-1], word[-1]])
+        elif len(word) > 1 and word[0] in _PUNCTUATIONS:
+            words.extend([word[0], word[1:]])
+        else:
+            words.append(word)
+    return words
+
+
+def _ngram_f_score(pred: _Tokens, target: _Tokens, n: int, beta: float) -> np.ndarray:
+    """Computes n-gram F-beta score of each pair of rows, from n-gram count tables."""
+    num_rows = len(pred[1]) - 1
+    pred_rows, pred_grams = _ngrams(*pred, n)
+    target_rows, target_grams = _ngrams(*target, n)
+
+    # n-grams of both sides share ids, so that (row, n-gram) pairs can be encoded as single keys
+    _, gram_ids = np.unique(np.concatenate([pred_grams, target_grams]), axis=0, return_inverse=True)
+    num_grams = int(gram_ids.max(initial=-1)) + 1
+    gram_ids = gram_ids.reshape(-1)
+    pred_keys, pred_counts = np.unique(
+        pred_rows * num_grams + gram_ids[: len(pred_rows)], return_counts=True
+    )
+    target_keys, target_counts = np.unique(
+        target_rows * num_grams + gram_ids[len(pred_rows) :], return_counts=True
+    )
+    _, pred_idx, target_idx = np.intersect1d(
+        pred_keys, target_keys, assume_unique=True, return_indices=True
+    )
+
+    num_matching = np.bincount(
+        pred_keys[pred_idx] // max(num_grams, 1),
+        weights=np.minimum(pred_counts[pred_idx], target_counts[target_idx]),
+        minlength=num_rows,
+    ).astype(np.float32)
+    num_pred = np.bincount(pred_rows, minlength=num_rows).astype(np.float32)
+    num_target = np.bincount(target_rows, minlength=num_rows).astype(np.float32)
+
+    precision = _safe_divide(num_matching, num_pred)
+    recall = _safe_divide(num_matching, num_target)
+    beta_sq = np.float32(beta**2)
+    denominator = np.maximum(beta_sq * precision + recall, _EPS_SMOOTHING)
+    return (np.float32(1) + beta_sq) * precision * recall / denominator
+
+
+def _ngrams(ids: np.ndarray, offsets: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns row index and (num_ngrams, n) token ids of n-grams not crossing row boundaries."""
+    row_lengths = np.diff(offsets)
+    rows = np.repeat(np.arange(len(row_lengths), dtype=np.int64), row_lengths)
+    starts = np.arange(len(ids), dtype=np.int64)
+    valid = starts + n <= offsets[1:][rows]
+    starts = starts[valid]
+    return rows[valid], ids[starts[:, None] + np.arange(n, dtype=np.int64)]
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros_like(numerator),
+        where=denominator > 0,
+    )
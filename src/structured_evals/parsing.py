@@ -1,14 +1,18 @@
 import re
-from datetime import datetime
 from typing import Any
 
 import yaml
 
+from structured_evals.coercion import CoercionPlan, coerce_iso_dates
+
+# libyaml loader is an order of magnitude faster, when PyYAML was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 yaml_pattern: re.Pattern = re.compile(r"```(?:ya?ml)?(?P<yaml>[^`]*)", re.MULTILINE | re.DOTALL)
 
 
-def parse_yaml(text: str) -> dict[str, Any]:
-    """YAML parser taken from langchain.
+def parse_yaml(text: str, coercion_plan: CoercionPlan | None = None) -> dict[str, Any]:
+    """YAML parser taken from langchain, values are converted with `coercion_plan` when given,
+    otherwise top-level ISO dates are converted to dates.
     Credit: https://github.com/langchain-ai/langchain.
     """
     match = re.search(yaml_pattern, text.strip())
@@ -17,14 +21,10 @@ def parse_yaml(text: str) -> dict[str, Any]:
     else:
         yaml_str = text
 
-    res = yaml.safe_load(yaml_str)
+    res = yaml.load(yaml_str, Loader=YamlLoader)
     if res is None:
         return {}
 
-    for key, value in res.items():
-        try:
-            res[key] = datetime.fromisoformat(value).date()
-        except (ValueError, TypeError):
-            pass
-
-    return res
+    if coercion_plan is not None:
+        return coercion_plan(res)
+    return coerce_iso_dates(res)
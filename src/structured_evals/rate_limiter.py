@@ -0,0 +1,269 @@
+"""Adaptive limits of concurrent LLM requests, within request and token budgets per minute."""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator
+
+from pydantic import BaseModel, computed_field
+
+DEFAULT_INITIAL_CONCURRENCY = 30
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 256
+DEFAULT_DECREASE_FACTOR = 0.5
+# pause of all requests after throttling, when the response doesn't say how long to wait
+DEFAULT_BACKOFF = 1.0
+
+_default_rate_limiters: dict[tuple[float | None, float | None], "AdaptiveRateLimiter"] = {}
+
+
+class ThroughputStats(BaseModel):
+    num_requests: int = 0
+    num_throttled: int = 0
+    num_failed: int = 0
+    num_tokens: int = 0
+    elapsed: float = 0.0
+    concurrency: float = 0.0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def requests_per_minute(self) -> float:
+        return 60 * self.num_requests / self.elapsed if self.elapsed else 0.0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def tokens_per_minute(self) -> float:
+        return 60 * self.num_tokens / self.elapsed if self.elapsed else 0.0
+
+
+class AdaptiveRateLimiter:
+    """Limits concurrency of LLM requests with AIMD, within requests and tokens per minute budgets.
+
+    Concurrency grows by one per window of successful requests, and is multiplied by
+    `decrease_factor` when the endpoint throttles (429) or fails (5xx); throttling makes all
+    requests wait for `Retry-After` (or `DEFAULT_BACKOFF`) seconds, instead of retrying at once.
+    Budgets are enforced with token buckets refilled continuously. A single limiter should be shared
+    by all judges calling the same endpoint.
+
+    State of the limiter is guarded by a thread lock, hence it's shared by requests of different
+    event loops (e.g. judges of list keys run their own loops in worker threads); waiting requests
+    are woken through futures of their own loops.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+        min_concurrency: int = DEFAULT_MIN_CONCURRENCY,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+    ) -> None:
+        if not 1 <= min_concurrency <= initial_concurrency <= max_concurrency:
+            raise ValueError(
+                "Expected 1 <= min_concurrency <= initial_concurrency <= max_concurrency"
+            )
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+        self.concurrency = float(initial_concurrency)
+
+        self._request_bucket = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._token_bucket = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._stats = ThroughputStats()
+        self._first_start: float | None = None
+        self._last_end = 0.0
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"], state["_waiters"]
+        state["_in_flight"] = 0
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    @property
+    def stats(self) -> ThroughputStats:
+        with self._lock:
+            return self._stats.model_copy(
+                update={
+                    "elapsed": self._last_end - self._first_start if self._first_start else 0.0,
+                    "concurrency": self.concurrency,
+                }
+            )
+
+    @asynccontextmanager
+    async def limit(self, num_tokens: int = 0) -> AsyncIterator[None]:
+        """Waits for a free slot within budgets, and adapts limits to the outcome of the request."""
+        started = await self._acquire(num_tokens)
+        try:
+            yield
+        except Exception as err:
+            self._on_failure(err, started)
+            raise
+        else:
+            self._on_success(num_tokens)
+        finally:
+            await self._release()
+
+    async def _acquire(self, num_tokens: int) -> float:
+        await self._acquire_slot()
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    if (delay := self._get_delay(num_tokens, now)) <= 0:
+                        for bucket, amount in [
+                            (self._request_bucket, 1),
+                            (self._token_bucket, num_tokens),
+                        ]:
+                            if bucket is not None:
+                                bucket.consume(amount, now)
+                        if self._first_start is None:
+                            self._first_start = now
+                        return now
+                await asyncio.sleep(delay)
+        except BaseException:
+            await self._release()
+            raise
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._in_flight < int(self.concurrency):
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    async def _release(self) -> None:
+        with self._lock:
+            self._last_end = time.monotonic()
+            self._in_flight -= 1
+            waiters, self._waiters = self._waiters, []
+        # all waiters check for a free slot again, as concurrency may have changed meanwhile
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # loop of the waiter is already closed
+                pass
+
+    def _get_delay(self, num_tokens: int, now: float) -> float:
+        delays = [self._paused_until - now]
+        if self._request_bucket is not None:
+            delays.append(self._request_bucket.get_delay(1, now))
+        if self._token_bucket is not None:
+            delays.append(self._token_bucket.get_delay(num_tokens, now))
+        return max(delays)
+
+    def _on_success(self, num_tokens: int) -> None:
+        with self._lock:
+            self._stats.num_requests += 1
+            self._stats.num_tokens += num_tokens
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def _on_failure(self, err: Exception, started: float) -> None:
+        throttled = is_throttling_error(err)
+        retry_after = _get_retry_after(err)
+        with self._lock:
+            if not throttled:
+                self._stats.num_failed += 1
+                return
+
+            self._stats.num_throttled += 1
+            now = time.monotonic()
+            # requests in flight fail together, concurrency is decreased once per such a wave
+            if started >= self._last_decrease:
+                self.concurrency = max(
+                    self.min_concurrency, self.concurrency * self.decrease_factor
+                )
+                self._last_decrease = now
+            pause = retry_after if retry_after is not None else DEFAULT_BACKOFF
+            self._paused_until = max(self._paused_until, now + pause)
+
+
+def _wake(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def get_delay(self, amount: float, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+def is_throttling_error(err: BaseException) -> bool:
+    """Whether the endpoint throttled (429) or failed (5xx), i.e. limiter backs off on `err`."""
+    status_code = _get_status_code(err)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+def _get_status_code(err: BaseException) -> int | None:
+    # duck-typed, to support errors of any client (openai, httpx) without importing them
+    for obj in [err, getattr(err, "response", None)]:
+        status_code = getattr(obj, "status_code", None)
+        if isinstance(status_code, int):
+            return status_code
+    return None
+
+
+def _get_retry_after(err: Exception) -> float | None:
+    headers = getattr(getattr(err, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if (retry_after_ms := headers.get("retry-after-ms")) is not None:
+            return float(retry_after_ms) / 1000
+        if (retry_after := headers.get("retry-after")) is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return parsedate_to_datetime(retry_after).timestamp() - time.time()
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def get_default_rate_limiter(
+    requests_per_minute: float | None = None,
+    tokens_per_minute: float | None = None,
+) -> AdaptiveRateLimiter:
+    """Returns limiter shared by judges of the process with the same budgets, i.e. each budget
+    configuration (e.g. of a different endpoint) gets its own limiter."""
+    key = (requests_per_minute, tokens_per_minute)
+    if key not in _default_rate_limiters:
+        _default_rate_limiters[key] = AdaptiveRateLimiter(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
+    return _default_rate_limiters[key]
@@ -0,0 +1,146 @@
+"""Files of per-item raw scores, written chunk by chunk alongside summary of evaluation."""
+
+import shutil
+from pathlib import Path
+from typing import Any, Literal, Protocol
+
+from structured_evals.eval_batch import BatchDictEvalOutput
+
+# json keeps raw scores inside the report, the remaining formats write them to a separate file
+T_raw_scores_format = Literal["json", "jsonl", "parquet", "none"]
+T_raw_scores_file_format = Literal["jsonl", "parquet"]
+
+MISSING_SUFFIX = ".missing"
+NUM_EXTRA_KEYS_COLUMN = "num_extra_keys"
+
+
+class RawScoresFile(Protocol):
+    def write(self, outs: BatchDictEvalOutput) -> int:
+        """Appends raw scores of consecutive items, returns offset at which next chunk starts."""
+        ...
+
+    def close(self) -> None: ...
+
+
+class JsonlRawScoresFile:
+    """Writes `DictEvalOutput` of each item as a line, can be reopened at offset of a chunk."""
+
+    def __init__(self, path: str | Path, offset: int = 0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "r+" if offset else "w", encoding="utf-8")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    def write(self, outs: BatchDictEvalOutput) -> int:
+        self._file.writelines(item_res.model_dump_json() + "\n" for item_res in outs.item_results)
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetRawScoresFile:
+    """Writes raw scores as a table with score and missing flag columns of each key, and a number
+    of extra keys of each item. Each chunk becomes a row group, item outputs aren't materialized.
+
+    Requires `pyarrow`. Parquet file is readable only once closed, hence it can't be resumed.
+    """
+
+    def __init__(self, path: str | Path, offset: int = 0) -> None:
+        if offset:
+            raise ValueError("Parquet raw scores can't be resumed, use jsonl raw scores instead")
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as err:
+            raise ImportError(
+                "Parquet raw scores require pyarrow, install structured-evals[parquet]"
+            ) from err
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer: Any = None
+        self._num_rows = 0
+
+    def write(self, outs: BatchDictEvalOutput) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns: dict[str, Any] = {}
+        for j, key in enumerate(outs.schema_keys):
+            columns[key] = pa.array(outs.score_matrix[:, j])
+            columns[key + MISSING_SUFFIX] = pa.array(outs.missing_mask[:, j])
+        columns[NUM_EXTRA_KEYS_COLUMN] = pa.array(outs.num_extra_keys_per_item)
+        table = pa.table(columns)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self._num_rows += table.num_rows
+        return self._num_rows
+
+    def close(self) -> None:
+        if self._writer is None:
+            # keeps the file readable when nothing was evaluated
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.table({}), self.path)
+        else:
+            self._writer.close()
+
+
+def open_raw_scores_file(
+    path: str | Path, raw_scores_format: T_raw_scores_file_format, offset: int = 0
+) -> RawScoresFile:
+    if raw_scores_format == "jsonl":
+        return JsonlRawScoresFile(path, offset)
+    elif raw_scores_format == "parquet":
+        return ParquetRawScoresFile(path, offset)
+    raise ValueError(f"Unknown raw scores format: {raw_scores_format}")
+
+
+def write_raw_scores(
+    outs: BatchDictEvalOutput, path: str | Path, raw_scores_format: T_raw_scores_file_format
+) -> None:
+    raw_scores_file = open_raw_scores_file(path, raw_scores_format)
+    try:
+        raw_scores_file.write(outs)
+    finally:
+        raw_scores_file.close()
+
+
+def concat_raw_scores_files(
+    paths: list[Path], path: str | Path, raw_scores_format: T_raw_scores_file_format
+) -> None:
+    """Writes raw scores of given files one after another to a single file, e.g. of shards."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if raw_scores_format == "jsonl":
+        with open(path, "wb") as f_out:
+            for part_path in paths:
+                with open(part_path, "rb") as f_in:
+                    shutil.copyfileobj(f_in, f_out)
+    elif raw_scores_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer: Any = None
+        try:
+            for part_path in paths:
+                part = pq.ParquetFile(part_path)
+                if not part.schema_arrow.names:
+                    # shard without items, see `ParquetRawScoresFile.close`
+                    continue
+                # row groups (i.e. chunks) are copied one by one, to keep memory bounded
+                for i in range(part.num_row_groups):
+                    table = part.read_row_group(i)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            pq.write_table(pa.table({}), path)
+    else:
+        raise ValueError(f"Unknown raw scores format: {raw_scores_format}")
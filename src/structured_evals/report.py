@@ -1,23 +1,47 @@
-from typing import Any
+from typing import Any, Sequence
 
-from pydantic import BaseModel
+from pydantic import BaseModel, SerializeAsAny
 
 from structured_evals import DictEvalOutput
-from structured_evals.aggregations import Aggregation
+from structured_evals.aggregations import Aggregation, AggregationState
 from structured_evals.eval_batch import BatchDictEvalOutput
+from structured_evals.judgement_cache import CacheStats
+from structured_evals.loader import ParseStats
+from structured_evals.rate_limiter import ThroughputStats
+from structured_evals.result_store import ResultStoreStats
 
 
 class EvaluationReport(BaseModel):
+    """Aggregated scores, with raw scores and statistics of the run.
+
+    `aggregation_state` is the state from which `aggregated_scores` were computed, it lets reports
+    of shards of records be merged (see `structured_evals.sharding`).
+    """
+
     num_items: int
     aggregated_scores: dict[str, Any]
-    raw_scores: list[DictEvalOutput]
+    raw_scores: list[DictEvalOutput] | None = None
+    raw_scores_path: str | None = None
+    cache_stats: CacheStats | None = None
+    judge_throughput: ThroughputStats | None = None
+    result_store_stats: ResultStoreStats | None = None
+    parse_stats: ParseStats | None = None
+    aggregation_state: SerializeAsAny[AggregationState] | None = None
 
     @classmethod
     def from_batch_dict_eval_output(
-        cls, outs: BatchDictEvalOutput, aggregation: Aggregation
+        cls,
+        outs: BatchDictEvalOutput,
+        aggregation: Aggregation,
+        include_raw_scores: bool = True,
+        excluded_items: Sequence[int] = (),
     ) -> "EvaluationReport":
+        """Aggregates all items but `excluded_items` (e.g. `EvaluationBatch.failed_targets`),
+        which are kept only in raw scores."""
+        state = aggregation.get_state(outs.drop_items(excluded_items))
         return cls(
-            num_items=outs.num_items,
-            aggregated_scores=aggregation(outs),
-            raw_scores=outs.item_results,
+            num_items=state.num_items,
+            aggregated_scores=aggregation.finalize(state),
+            raw_scores=outs.item_results if include_raw_scores else None,
+            aggregation_state=state,
         )
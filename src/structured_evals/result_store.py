@@ -0,0 +1,125 @@
+"""Content-addressed store of evaluated cells, which lets repeated runs score only changed pairs."""
+
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, computed_field
+
+DEFAULT_RESULT_STORE_PATH = Path.home() / ".cache" / "structured-evals" / "results.db"
+# SQLite limits number of parameters of a single statement
+_MAX_QUERY_PARAMS = 500
+
+
+class ResultStoreStats(BaseModel):
+    reused: dict[str, int] = {}
+    recomputed: dict[str, int] = {}
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def num_reused(self) -> int:
+        return sum(self.reused.values())
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def num_recomputed(self) -> int:
+        return sum(self.recomputed.values())
+
+
+class ResultStore:
+    """Stores item outputs of evaluated cells under (evaluator fingerprint, key, pred hash, target
+    hash), so that a cell is evaluated again only when its values or evaluator configuration
+    change (see `EvaluatorBase.fingerprint`).
+
+    `stats` count reused and recomputed cells of each key, over all lookups.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_RESULT_STORE_PATH) -> None:
+        self.path = Path(path)
+        self.stats = ResultStoreStats()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_conn"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_value(value: Any) -> str:
+        payload = json.dumps(value, sort_keys=True, default=_typed_str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get_many(
+        self, fingerprint: str, key: str, value_hashes: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], Any]:
+        """Returns stored outputs of (pred hash, target hash) pairs, missing ones are omitted."""
+        found: dict[tuple[str, str], Any] = {}
+        pred_hashes = list(dict.fromkeys(pred_hash for pred_hash, _ in value_hashes))
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(pred_hashes), _MAX_QUERY_PARAMS):
+                batch = pred_hashes[start : start + _MAX_QUERY_PARAMS]
+                rows = conn.execute(
+                    "SELECT pred_hash, target_hash, output FROM results "
+                    "WHERE fingerprint = ? AND key = ? "
+                    f"AND pred_hash IN ({','.join('?' * len(batch))})",
+                    [fingerprint, key, *batch],
+                ).fetchall()
+                found |= {
+                    (pred_hash, target_hash): output for pred_hash, target_hash, output in rows
+                }
+
+        wanted = set(value_hashes)
+        outputs = {hashes: pickle.loads(found[hashes]) for hashes in wanted if hashes in found}
+        num_reused = sum(hashes in outputs for hashes in value_hashes)
+        with self._lock:
+            self.stats.reused[key] = self.stats.reused.get(key, 0) + num_reused
+            self.stats.recomputed[key] = (
+                self.stats.recomputed.get(key, 0) + len(value_hashes) - num_reused
+            )
+        return outputs
+
+    def set_many(self, fingerprint: str, key: str, outputs: dict[tuple[str, str], Any]) -> None:
+        if not outputs:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results "
+                    "(fingerprint, key, pred_hash, target_hash, output) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (fingerprint, key, pred_hash, target_hash, pickle.dumps(output))
+                        for (pred_hash, target_hash), output in outputs.items()
+                    ],
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # connection is shared by threads of evaluation, access is guarded by the lock
+            self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (fingerprint TEXT, key TEXT, pred_hash TEXT, "
+                "target_hash TEXT, output BLOB NOT NULL, "
+                "PRIMARY KEY (fingerprint, key, pred_hash, target_hash)) WITHOUT ROWID"
+            )
+        return self._conn
+
+
+def _typed_str(value: Any) -> dict[str, str]:
+    # type keeps values which aren't JSON-native apart from their string form,
+    # e.g. date(2021, 1, 1) from "2021-01-01"
+    return {"__type__": f"{type(value).__module__}.{type(value).__qualname__}", "value": str(value)}
@@ -0,0 +1,144 @@
+"""Evaluation split into shards of records, evaluated by separate processes or machines.
+
+Each shard is a contiguous range of records, and its partial report (`ShardReport`) keeps the
+aggregation state along with raw scores. `merge_shard_reports` combines partial reports of all
+shards into the report of the whole evaluation, with raw scores in the order of records.
+"""
+
+from pathlib import Path
+
+from structured_evals.aggregations import AverageAggregation, AverageAggregationState
+from structured_evals.jsonl_index import JsonlIndex
+from structured_evals.judgement_cache import CacheStats
+from structured_evals.loader import ParseStats, load_results_file
+from structured_evals.rate_limiter import ThroughputStats
+from structured_evals.raw_scores import T_raw_scores_file_format, concat_raw_scores_files
+from structured_evals.report import EvaluationReport
+from structured_evals.result_store import ResultStoreStats
+
+
+class ShardReport(EvaluationReport):
+    """Partial report of records `[start, stop)`, being shard `shard_index` of `num_shards`."""
+
+    shard_index: int
+    num_shards: int
+    start: int
+    stop: int
+    aggregation_state: AverageAggregationState
+
+
+def get_shard_range(num_records: int, shard_index: int, num_shards: int) -> range:
+    """Returns records of shard, shards differ in size by at most one record."""
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"Shard index must be in [0, {num_shards}), got: {shard_index}")
+    return range(
+        shard_index * num_records // num_shards, (shard_index + 1) * num_records // num_shards
+    )
+
+
+def count_records(path: str | Path) -> int:
+    """Counts records of json or jsonl file, the latter through its `JsonlIndex`."""
+    if Path(path).suffix == ".jsonl":
+        return len(JsonlIndex.open(path))
+    return len(load_results_file(path))
+
+
+def merge_shard_reports(
+    shard_reports: list[ShardReport], raw_scores_path: str | Path | None = None
+) -> EvaluationReport:
+    """Merges reports of all shards of an evaluation into a report equal (up to floating point
+    rounding of aggregated scores) to the one of evaluation of all records at once.
+
+    Raw scores kept inside shard reports are concatenated, raw scores files of shards (at their
+    `raw_scores_path`) are concatenated into `raw_scores_path`.
+    """
+    if not shard_reports:
+        raise ValueError("At least one shard report is required to merge")
+    shard_reports = sorted(shard_reports, key=lambda shard: shard.shard_index)
+    num_shards = shard_reports[0].num_shards
+    shard_indices = [shard.shard_index for shard in shard_reports]
+    if shard_indices != list(range(num_shards)) or any(
+        shard.num_shards != num_shards for shard in shard_reports
+    ):
+        found = [f"{shard.shard_index}/{shard.num_shards}" for shard in shard_reports]
+        raise ValueError(f"Expected each of {num_shards} shards exactly once, got: {found}")
+    for shard, next_shard in zip(shard_reports, shard_reports[1:]):
+        if shard.stop != next_shard.start:
+            raise ValueError(
+                f"Records of shards {shard.shard_index} and {next_shard.shard_index} aren't "
+                "consecutive, shards must be evaluated on the same file"
+            )
+
+    aggregation = AverageAggregation()
+    state = aggregation.merge_all([shard.aggregation_state for shard in shard_reports])
+    report = EvaluationReport(
+        num_items=state.num_items,
+        aggregated_scores=aggregation.finalize(state),
+        aggregation_state=state,
+    )
+
+    if all(shard.raw_scores is not None for shard in shard_reports):
+        report.raw_scores = [
+            item_res for shard in shard_reports for item_res in shard.raw_scores or []
+        ]
+    elif any(shard.raw_scores is not None for shard in shard_reports):
+        raise ValueError("Either all or none of shard reports must contain raw scores")
+    if raw_scores_path is not None:
+        shard_paths = [Path(shard.raw_scores_path or "") for shard in shard_reports]
+        suffixes = {path.suffix for path in shard_paths}
+        if len(suffixes) != 1 or suffixes - {".jsonl", ".parquet"}:
+            raise ValueError(f"Raw scores files of shards must be all jsonl or parquet: {suffixes}")
+        raw_scores_format: T_raw_scores_file_format = "jsonl" if ".jsonl" in suffixes else "parquet"
+        concat_raw_scores_files(shard_paths, raw_scores_path, raw_scores_format)
+        report.raw_scores_path = str(raw_scores_path)
+
+    if any(shard.parse_stats is not None for shard in shard_reports):
+        report.parse_stats = ParseStats()
+        for shard in shard_reports:
+            report.parse_stats = report.parse_stats.merge(shard.parse_stats or ParseStats())
+    report.cache_stats = _merge_cache_stats(
+        [shard.cache_stats for shard in shard_reports if shard.cache_stats is not None]
+    )
+    report.judge_throughput = _merge_throughput_stats(
+        [shard.judge_throughput for shard in shard_reports if shard.judge_throughput is not None]
+    )
+    report.result_store_stats = _merge_result_store_stats(
+        [shard.result_store_stats for shard in shard_reports if shard.result_store_stats]
+    )
+    return report
+
+
+def _merge_cache_stats(stats: list[CacheStats]) -> CacheStats | None:
+    if not stats:
+        return None
+    return CacheStats(
+        memory_hits=sum(shard_stats.memory_hits for shard_stats in stats),
+        disk_hits=sum(shard_stats.disk_hits for shard_stats in stats),
+        misses=sum(shard_stats.misses for shard_stats in stats),
+    )
+
+
+def _merge_throughput_stats(stats: list[ThroughputStats]) -> ThroughputStats | None:
+    """Shards are assumed to run at the same time, hence their throughputs add up."""
+    if not stats:
+        return None
+    return ThroughputStats(
+        num_requests=sum(shard_stats.num_requests for shard_stats in stats),
+        num_throttled=sum(shard_stats.num_throttled for shard_stats in stats),
+        num_failed=sum(shard_stats.num_failed for shard_stats in stats),
+        num_tokens=sum(shard_stats.num_tokens for shard_stats in stats),
+        elapsed=max(shard_stats.elapsed for shard_stats in stats),
+        concurrency=sum(shard_stats.concurrency for shard_stats in stats),
+    )
+
+
+def _merge_result_store_stats(stats: list[ResultStoreStats]) -> ResultStoreStats | None:
+    if not stats:
+        return None
+    merged = ResultStoreStats(reused={}, recomputed={})
+    for shard_stats in stats:
+        for key, num_reused in shard_stats.reused.items():
+            merged.reused[key] = merged.reused.get(key, 0) + num_reused
+        for key, num_recomputed in shard_stats.recomputed.items():
+            merged.recomputed[key] = merged.recomputed.get(key, 0) + num_recomputed
+    return merged
@@ -0,0 +1,179 @@
+"""Streaming evaluation of large prediction files in chunks, with bounded memory.
+
+Reading/parsing, evaluation and writing of raw scores run concurrently, connected with bounded
+queues, hence at most a few chunks are kept in memory at once.
+"""
+
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from structured_evals.aggregations import Aggregation, AverageAggregation
+from structured_evals.checkpoint import EvaluationCheckpoint
+from structured_evals.eval_batch import BatchDictEval, BatchDictEvalOutput
+from structured_evals.loader import EvaluationBatch, ParseStats
+from structured_evals.raw_scores import T_raw_scores_file_format, open_raw_scores_file
+from structured_evals.report import EvaluationReport
+
+DEFAULT_CHUNK_SIZE = 1_000
+DEFAULT_QUEUE_SIZE = 2
+_END_OF_STREAM = object()
+
+
+def evaluate_streaming(
+    evaluator: BatchDictEval,
+    chunks: Iterable[EvaluationBatch],
+    raw_scores_path: str | Path | None = None,
+    aggregation: Aggregation | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    checkpoint: EvaluationCheckpoint | None = None,
+    raw_scores_format: T_raw_scores_file_format = "jsonl",
+) -> EvaluationReport:
+    """Evaluates chunks of data, folding outputs into running aggregation state.
+
+    Args:
+        evaluator: evaluator applied to each chunk
+        chunks: iterable of batches, consumed lazily in a background thread
+        raw_scores_path: optional file, to which per-item raw scores are written (in input
+            order) while evaluation runs
+        aggregation: aggregation which state is updated with each chunk (average by default)
+        queue_size: number of chunks buffered between parsing, evaluation and writing
+        checkpoint: optional checkpoint, to which progress is saved after each evaluated key and
+            chunk; when it holds completed chunks, `chunks` must start right after them (see
+            `EvaluationCheckpoint.num_completed_chunks`), aggregation and raw scores are resumed
+        raw_scores_format: format of raw scores file, see `structured_evals.raw_scores`
+
+    Returns:
+        EvaluationReport with aggregated scores, aggregation state and parse stats of all chunks,
+        without raw scores
+    """
+    stop = threading.Event()
+    parsed_chunks: queue.Queue = queue.Queue(maxsize=queue_size)
+    parser = threading.Thread(
+        target=_produce, args=(chunks, parsed_chunks, stop), name="chunk-parser", daemon=True
+    )
+    aggregation = aggregation or AverageAggregation()
+    state = aggregation.init_state(evaluator.schema_keys)
+    parse_stats = ParseStats()
+    chunk_idx = 0
+    raw_scores_offset = 0
+    if checkpoint is not None and checkpoint.num_completed_chunks:
+        state, parse_stats = checkpoint.state
+        chunk_idx = checkpoint.num_completed_chunks
+        raw_scores_offset = checkpoint.raw_scores_offset
+    writer = (
+        _RawScoresWriter(
+            raw_scores_path, raw_scores_format, queue_size, raw_scores_offset, checkpoint
+        )
+        if raw_scores_path
+        else None
+    )
+
+    parser.start()
+    try:
+        while (chunk := parsed_chunks.get()) is not _END_OF_STREAM:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            outs = evaluator.evaluate(
+                pred=chunk.pred,
+                target=chunk.target,
+                checkpoint=checkpoint.chunk(chunk_idx) if checkpoint is not None else None,
+            )
+            # records with unparsable target have (empty) raw scores, but aren't aggregated
+            state = aggregation.update(state, outs.drop_items(chunk.failed_targets))
+            parse_stats = parse_stats.merge(chunk.parse_stats)
+            # parse stats are checkpointed along with aggregation state
+            if writer is not None:
+                writer.put(outs, chunk_idx, (state, parse_stats))
+            elif checkpoint is not None:
+                checkpoint.complete_chunk(chunk_idx, (state, parse_stats))
+            chunk_idx += 1
+    finally:
+        stop.set()
+        if writer is not None:
+            writer.close()
+
+    return EvaluationReport(
+        num_items=state.num_items,
+        aggregated_scores=aggregation.finalize(state),
+        raw_scores=None,
+        raw_scores_path=str(raw_scores_path) if raw_scores_path else None,
+        parse_stats=parse_stats,
+        aggregation_state=state,
+    )
+
+
+class _RawScoresWriter:
+    """Writes raw scores of consecutive chunks to file in a background thread.
+
+    When resuming, the file is truncated to `offset`, i.e. to raw scores of completed chunks. With
+    checkpoint, chunks are marked completed once their raw scores are written.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        raw_scores_format: T_raw_scores_file_format,
+        queue_size: int,
+        offset: int = 0,
+        checkpoint: EvaluationCheckpoint | None = None,
+    ) -> None:
+        # opened here, so that unsupported formats or offsets fail before evaluation starts
+        self.file = open_raw_scores_file(path, raw_scores_format, offset)
+        self.checkpoint = checkpoint
+        self.outputs: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(target=self._write, name="raw-scores-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, outs: BatchDictEvalOutput, chunk_idx: int = 0, state: Any = None) -> None:
+        if self.error is not None:
+            raise self.error
+        self.outputs.put((outs, chunk_idx, state))
+
+    def close(self) -> None:
+        self.outputs.put(_END_OF_STREAM)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _write(self) -> None:
+        try:
+            while (item := self.outputs.get()) is not _END_OF_STREAM:
+                if self.error is not None:
+                    # keeps draining the queue, so that the producer never blocks
+                    continue
+                try:
+                    outs, chunk_idx, state = item
+                    offset = self.file.write(outs)
+                    if self.checkpoint is not None:
+                        self.checkpoint.complete_chunk(chunk_idx, state, offset)
+                except BaseException as err:
+                    self.error = err
+        finally:
+            try:
+                self.file.close()
+            except BaseException as err:
+                self.error = self.error or err
+
+
+def _produce(items: Iterable[Any], out_queue: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for item in items:
+            if not _put_until_stopped(out_queue, item, stop):
+                return
+    except BaseException as err:
+        _put_until_stopped(out_queue, err, stop)
+    else:
+        _put_until_stopped(out_queue, _END_OF_STREAM, stop)
+
+
+def _put_until_stopped(out_queue: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
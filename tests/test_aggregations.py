@@ -1,9 +1,12 @@
+from typing import Any
+
 import pytest
 
-from structured_evals.aggregations import AverageAggregation, F1ScoreAggregation
+from structured_evals.aggregations import Aggregation, AverageAggregation, F1ScoreAggregation
 from structured_evals.base import ItemEvalOutput
-from structured_evals.eval_batch import BatchDictEvalOutput
+from structured_evals.eval_batch import BatchDictEval, BatchDictEvalOutput
 from structured_evals.eval_dict import DictEvalOutput
+from structured_evals.eval_primitive import NumEval
 
 
 def test_average_aggregation() -> None:
@@ -162,3 +165,55 @@ def test_f1_soft_macro_aggregation() -> None:
             "f1": (0.5 + 0.5 + 0.25) / 3,
         }
     ) == aggregation(outs)
+
+
+def test_f1_aggregation_counts_only_flagged_missing_keys() -> None:
+    aggregation = F1ScoreAggregation(mode="hard", average="micro")
+    eval_ = BatchDictEval(eval_mapping={"a": NumEval(), "b": NumEval()})
+    outs = eval_(
+        pred=[{"a": 1, "b": 2}, {"a": 1, "c": 3}],
+        target=[{"a": 1, "b": 2}, {"a": 1, "b": 2}],
+    )
+
+    # retrieved: 2 keys in the first item, 1 key and 1 extra key in the second one
+    assert pytest.approx({"precision": 3 / 4, "recall": 3 / 4, "f1": 3 / 4}) == aggregation(outs)
+
+
+@pytest.mark.parametrize(
+    "aggregation",
+    [
+        AverageAggregation(),
+        F1ScoreAggregation(mode="hard", average="micro"),
+        F1ScoreAggregation(mode="soft", average="macro"),
+    ],
+)
+def test_aggregation_merged_from_partial_states(aggregation: Aggregation) -> None:
+    eval_ = BatchDictEval(eval_mapping={"a": NumEval(), "b": NumEval()})
+    pred: list[dict[str, Any]] = [
+        {"a": 1, "b": 2},
+        {"a": 1, "c": 3},
+        {"a": 2, "b": 2, "c": 1},
+        {"b": 2, "d": 1},
+        {"a": 1, "b": 1},
+    ]
+    target: list[dict[str, Any]] = [{"a": 1, "b": 2}] * len(pred)
+    expected = aggregation(eval_(pred, target))
+
+    partial_states = [
+        aggregation.get_state(eval_(pred[i : i + 2], target[i : i + 2]))
+        for i in range(0, len(pred), 2)
+    ]
+    # states are serializable, hence can be computed in other processes
+    partial_states = [
+        type(state).model_validate_json(state.model_dump_json()) for state in partial_states
+    ]
+    merged = aggregation.merge(
+        partial_states[0],
+        aggregation.merge_all([aggregation.init_state(["a", "b"])] + partial_states[1:]),
+    )
+
+    assert merged.num_items == len(pred)
+    result = aggregation.finalize(merged)
+    assert result.keys() == expected.keys()
+    for key, value in expected.items():
+        assert pytest.approx(value) == result[key]
@@ -0,0 +1,39 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from structured_evals.assignment import linear_sum_assignment
+
+
+def _brute_force_min_cost(cost: np.ndarray) -> float:
+    num_rows, num_cols = cost.shape
+    if num_rows > num_cols:
+        return _brute_force_min_cost(cost.T)
+    return min(
+        sum(cost[row, col] for row, col in enumerate(cols))
+        for cols in itertools.permutations(range(num_cols), num_rows)
+    )
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (2, 5), (5, 2), (4, 4)])
+def test_linear_sum_assignment_is_optimal(shape: tuple[int, int]) -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        cost = rng.integers(0, 4, size=shape).astype(float)
+        rows, cols = linear_sum_assignment(cost)
+
+        assert len(rows) == min(shape)
+        assert len(set(rows.tolist())) == len(set(cols.tolist())) == min(shape)
+        assert rows.tolist() == sorted(rows.tolist())
+        assert cost[rows, cols].sum() == pytest.approx(_brute_force_min_cost(cost))
+
+
+def test_linear_sum_assignment_empty() -> None:
+    rows, cols = linear_sum_assignment(np.zeros((0, 3)))
+    assert rows.tolist() == cols.tolist() == []
+
+
+def test_linear_sum_assignment_rejects_non_finite_costs() -> None:
+    with pytest.raises(ValueError):
+        linear_sum_assignment(np.array([[0.0, np.inf]]))
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from structured_evals.benchmark import DEFAULT_CONCURRENCY_LEVELS, run_judge_benchmark
+from structured_evals.cli import app
+from structured_evals.eval_llm_as_judge import JudgeScore, LlmAsJudge
+from structured_evals.fake_llm import FakeApiError, FakeJudgeChatModel
+from structured_evals.rate_limiter import AdaptiveRateLimiter
+
+PRED = [f"prediction {i}" for i in range(20)]
+TARGET = [f"reference {i}" for i in range(20)]
+
+
+def test_fake_judge_scores_are_deterministic() -> None:
+    judge = LlmAsJudge(llm=FakeJudgeChatModel(latency=0.001))
+    scores = [res.score for res in judge.evaluate_batch(PRED, TARGET)]
+
+    assert set(scores) == {0.0, 1.0}
+    assert scores == [res.score for res in judge.evaluate_batch(PRED, TARGET)]
+    assert judge.evaluate(PRED[0], TARGET[0]).score == scores[0]
+
+    packed_judge = LlmAsJudge(llm=FakeJudgeChatModel(latency=0.001), pack_size=8)
+    assert [res.score for res in packed_judge.evaluate_batch(PRED, TARGET)] == scores
+    assert len(packed_judge.llm.request_latencies) == 3  # type: ignore[attr-defined]
+
+
+def test_fake_judge_errors() -> None:
+    llm = FakeJudgeChatModel(latency=0.001, throttle_rate=1.0, retry_after=3)
+    with pytest.raises(FakeApiError) as err:
+        asyncio.run(llm.ainvoke("Is it correct?"))
+    assert err.value.status_code == 429
+    assert err.value.response.headers == {"retry-after": "3.0"}
+
+    llm = FakeJudgeChatModel(latency=0.001, error_rate=1.0)
+    with pytest.raises(FakeApiError) as err:
+        llm.invoke("Is it correct?")
+    assert err.value.status_code == 500
+    assert llm.num_errors == 1
+
+
+def test_fake_judge_throttles_above_capacity() -> None:
+    llm = FakeJudgeChatModel(
+        latency=0.01, latency_sigma=0, max_concurrent_requests=4, retry_after=0.01
+    )
+    limiter = AdaptiveRateLimiter(initial_concurrency=8)
+    chain = llm.with_structured_output(JudgeScore)
+
+    async def call(prompt: str) -> None:
+        async with limiter.limit():
+            await chain.ainvoke(prompt)
+
+    async def run() -> None:
+        await asyncio.gather(*[call(p) for p in PRED], return_exceptions=True)
+
+    asyncio.run(run())
+    assert llm.num_errors > 0
+    assert limiter.concurrency < 8
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_run_judge_benchmark(adaptive: bool) -> None:
+    results = run_judge_benchmark(
+        concurrency_levels=(2, 16),
+        num_records=10,
+        num_fields=3,
+        adaptive=adaptive,
+        latency=0.005,
+    )
+
+    assert [res.concurrency for res in results] == [2, 16]
+    for res in results:
+        assert res.num_judgements == res.num_requests == 30
+        assert res.num_errors == 0
+        assert res.requests_per_second > 0
+        assert 0 < res.latency_p50 <= res.latency_p99
+
+
+@pytest.mark.parametrize(
+    "concurrency_args, expected_levels",
+    [([], list(DEFAULT_CONCURRENCY_LEVELS)), (["-c", "2", "-c", "4"], [2, 4])],
+)
+def test_cli_benchmark_judge_concurrency_levels(
+    concurrency_args: list[str], expected_levels: list[int], tmp_path: Path
+) -> None:
+    args = ["benchmark-judge", "--num-records", "10", "--num-fields", "1", "--latency", "0.001"]
+    result = CliRunner().invoke(app, [*args, *concurrency_args, "-o", str(tmp_path / "r.json")])
+
+    assert result.exit_code == 0, result.output
+    rows = json.loads((tmp_path / "r.json").read_text())
+    assert [row["concurrency"] for row in rows] == expected_levels
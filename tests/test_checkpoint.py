@@ -0,0 +1,243 @@
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+from structured_evals.base import ColumnEvalOutput
+from structured_evals.checkpoint import EvaluationCheckpoint
+from structured_evals.cli import _open_checkpoint, app
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_primitive import DateEval, NumEval
+from structured_evals.loader import EvaluationBatch, iter_jsonl_chunks
+from structured_evals.streaming import evaluate_streaming
+
+SAMPLE_JSONL = "data/sample.jsonl"
+
+
+class CountingNumEval(NumEval):
+    def __init__(self) -> None:
+        super().__init__()
+        self.num_calls = 0
+
+    def evaluate_column(self, pred: list, target: list):  # type: ignore[no-untyped-def]
+        self.num_calls += 1
+        return super().evaluate_column(pred, target)
+
+
+def make_evaluator() -> BatchDictEval:
+    return BatchDictEval(
+        eval_mapping={"name": CountingNumEval(), "age": CountingNumEval(), "birthday": DateEval()}
+    )
+
+
+def test_resumed_evaluation_reuses_saved_columns(tmp_path: Path) -> None:
+    eval_batch = EvaluationBatch.from_json(SAMPLE_JSONL, record_format="json")
+    checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run")
+    expected = make_evaluator().evaluate(
+        eval_batch.pred, eval_batch.target, checkpoint=checkpoint.chunk(0)
+    )
+    checkpoint.close()
+
+    evaluator = make_evaluator()
+    checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run", resume=True)
+    outs = evaluator.evaluate(eval_batch.pred, eval_batch.target, checkpoint=checkpoint.chunk(0))
+    checkpoint.close()
+
+    assert [evaluator.eval_mapping[key].num_calls for key in ["name", "age"]] == [0, 0]  # type: ignore[attr-defined]
+    assert outs.score_matrix.tolist() == expected.score_matrix.tolist()
+    assert outs.item_results == expected.item_results
+
+
+def test_checkpoint_without_resume_starts_over(tmp_path: Path) -> None:
+    checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run")
+    checkpoint.complete_chunk(0, state={"num_items": 2}, raw_scores_offset=10)
+    checkpoint.close()
+
+    resumed = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run", resume=True)
+    assert (resumed.num_completed_chunks, resumed.state, resumed.raw_scores_offset) == (
+        1,
+        {"num_items": 2},
+        10,
+    )
+    resumed.close()
+
+    restarted = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run")
+    assert restarted.num_completed_chunks == 0
+    restarted.remove()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_checkpoint_with_bounded_pending_writes_saves_all_columns(tmp_path: Path) -> None:
+    checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run", max_pending_writes=1)
+    columns = {f"key_{i}": ColumnEvalOutput(scores=np.full(3, i / 10)) for i in range(20)}
+    for key, column in columns.items():
+        checkpoint.save_column(0, key, column)
+
+    loaded = checkpoint.load_columns(0)
+    checkpoint.close()
+    assert {key: col.scores.tolist() for key, col in loaded.items()} == {
+        key: col.scores.tolist() for key, col in columns.items()
+    }
+
+
+def test_resume_of_different_run_fails(tmp_path: Path) -> None:
+    EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run").close()
+    with pytest.raises(ValueError, match="different run"):
+        EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="other", resume=True)
+
+
+@pytest.mark.parametrize(
+    "changed_params",
+    [{"raw_scores_format": "parquet"}, {"schema": {"name": "str", "age": "int"}}],
+    ids=str,
+)
+def test_cli_run_with_changed_params_is_not_resumed(
+    changed_params: dict[str, Any], tmp_path: Path
+) -> None:
+    params: dict[str, Any] = {
+        "predictions_file": Path(SAMPLE_JSONL),
+        "schema": {"name": "str", "age": "float"},
+        "raw_scores_format": "jsonl",
+    }
+    for resume in [False, True]:
+        checkpoint = _open_checkpoint(tmp_path / "results.json", True, resume, **params)
+        assert checkpoint is not None
+        checkpoint.close()
+    with pytest.raises(ValueError, match="different run"):
+        _open_checkpoint(tmp_path / "results.json", True, resume=True, **params | changed_params)
+
+
+def test_cli_run_without_checkpoint_doesnt_open_it(tmp_path: Path) -> None:
+    checkpoint = _open_checkpoint(
+        tmp_path / "results.json", False, resume=False, predictions_file=Path(SAMPLE_JSONL)
+    )
+    assert checkpoint is None
+    assert not (tmp_path / "results.checkpoint.db").exists()
+
+
+def test_cli_resume_with_all_chunks_evaluated(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # resumed run reads first records through index of the file, which is stored next to it
+    predictions_file = tmp_path / "sample.jsonl"
+    predictions_file.write_text(Path(SAMPLE_JSONL).read_text())
+    args = [
+        "eval-from-predictions",
+        str(predictions_file),
+        "-o",
+        str(tmp_path / "results.json"),
+        "--pred-key",
+        "pred",
+        "--target-key",
+        "target",
+        "--text-evaluator",
+        "ngram",
+        "--stream",
+        "--chunk-size",
+        "2",
+        "--checkpoint",
+    ]
+    # keeps checkpoint of the completed run, as if it was interrupted just before saving results
+    with monkeypatch.context() as patch:
+        patch.setattr(EvaluationCheckpoint, "remove", EvaluationCheckpoint.close)
+        result = CliRunner().invoke(app, args)
+        assert result.exit_code == 0, result.output
+    expected = (tmp_path / "results.json").read_text()
+
+    result = CliRunner().invoke(app, [*args, "--resume"])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "results.json").read_text() == expected
+    assert not (tmp_path / "results.checkpoint.db").exists()
+
+
+def test_cli_failed_run_closes_evaluator_and_keeps_checkpoint(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    closed = []
+
+    def failing_evaluate(self: BatchDictEval, *args: Any, **kwargs: Any) -> None:
+        raise RuntimeError("endpoint is down")
+
+    monkeypatch.setattr(BatchDictEval, "evaluate", failing_evaluate)
+    monkeypatch.setattr(BatchDictEval, "close", lambda self: closed.append(self))
+    result = CliRunner().invoke(
+        app,
+        ["eval-from-predictions", SAMPLE_JSONL, "-o", str(tmp_path / "results.json")]
+        + ["--pred-key", "pred", "--target-key", "target", "--text-evaluator", "ngram"]
+        + ["--checkpoint"],
+    )
+
+    assert isinstance(result.exception, RuntimeError)
+    assert len(closed) == 1
+    assert not (tmp_path / "results.json").exists()
+    # checkpoint of the failed run is closed, hence it can be resumed
+    assert (tmp_path / "results.checkpoint.db").exists()
+    checkpoint = _open_checkpoint(
+        tmp_path / "results.json",
+        True,
+        resume=True,
+        predictions_file=Path(SAMPLE_JSONL),
+        pred_key="pred",
+        target_key="target",
+        text_evaluator="ngram",
+        chunk_size=None,
+        shard_index=0,
+        num_shards=1,
+        raw_scores_format="json",
+    )
+    assert checkpoint is not None
+    checkpoint.remove()
+
+
+def test_cli_streaming_of_empty_file_fails(tmp_path: Path) -> None:
+    (tmp_path / "empty.jsonl").touch()
+    result = CliRunner().invoke(
+        app,
+        ["eval-from-predictions", str(tmp_path / "empty.jsonl"), "-o", str(tmp_path / "r.json")]
+        + ["--text-evaluator", "ngram", "--stream"],
+    )
+    assert result.exit_code == 2
+    assert "no records" in result.output
+
+
+def test_resumed_streaming_matches_uninterrupted_run(tmp_path: Path) -> None:
+    def chunks(skip_chunks: int = 0) -> Iterator[EvaluationBatch]:
+        return EvaluationBatch.iter_chunks(
+            SAMPLE_JSONL, chunk_size=1, record_format="json", skip_chunks=skip_chunks
+        )
+
+    def interrupted_chunks() -> Iterator[EvaluationBatch]:
+        yield from list(chunks())[:2]
+        raise KeyboardInterrupt
+
+    expected = evaluate_streaming(make_evaluator(), chunks(), raw_scores_path=tmp_path / "a.jsonl")
+
+    raw_scores_path = tmp_path / "b.jsonl"
+    checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run")
+    with pytest.raises(KeyboardInterrupt):
+        evaluate_streaming(
+            make_evaluator(), interrupted_chunks(), raw_scores_path, checkpoint=checkpoint
+        )
+    checkpoint.close()
+
+    checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.db", run_id="run", resume=True)
+    assert checkpoint.num_completed_chunks == 2
+    report = evaluate_streaming(
+        make_evaluator(),
+        chunks(skip_chunks=checkpoint.num_completed_chunks),
+        raw_scores_path,
+        checkpoint=checkpoint,
+    )
+    checkpoint.close()
+
+    assert report.num_items == expected.num_items == 3
+    assert report.aggregated_scores == expected.aggregated_scores
+    assert raw_scores_path.read_text() == (tmp_path / "a.jsonl").read_text()
+
+
+def test_iter_jsonl_chunks_skips_chunks() -> None:
+    all_chunks = list(iter_jsonl_chunks(SAMPLE_JSONL, chunk_size=2))
+    assert list(iter_jsonl_chunks(SAMPLE_JSONL, chunk_size=2, skip_chunks=1)) == all_chunks[1:]
+    assert list(iter_jsonl_chunks(SAMPLE_JSONL, chunk_size=2, skip_chunks=5)) == []
@@ -0,0 +1,89 @@
+import datetime
+import pickle
+
+from structured_evals.coercion import CoercionPlan, coerce_iso_dates
+from structured_evals.eval_dict import DictEval
+from structured_evals.eval_primitive import NumEval
+from structured_evals.infer_from_schema import infer_structured_evaluator_from_schema
+from structured_evals.loader import parse_json
+from structured_evals.parsing import parse_yaml
+
+SCHEMA = {
+    "name": {"type": "string"},
+    "signed": {"type": "date"},
+    "due": {"type": "string", "format": "date"},
+    "amount": {"type": "number"},
+    "accepted": {"type": "enum", "choices": ["yes", "no"]},
+    "payments": {
+        "type": "list",
+        "items": {
+            "type": "object",
+            "properties": {"date": {"type": "date"}, "amount": {"type": "float"}},
+        },
+    },
+}
+
+
+def test_plan_converts_fields_by_schema_type() -> None:
+    plan = CoercionPlan.from_schema(SCHEMA)
+    text = """
+name: 2021-01-01
+signed: 2021-01-02
+due: "2021-01-03T12:00:00"
+amount: 1e3
+accepted: yes
+payments:
+  - date: "2021-02-01"
+    amount: "10.5"
+  - null
+extra: 2021-01-04
+"""
+    assert parse_yaml(text, coercion_plan=plan) == {
+        "name": "2021-01-01",
+        "signed": datetime.date(2021, 1, 2),
+        "due": datetime.date(2021, 1, 3),
+        "amount": 1000.0,
+        "accepted": "yes",
+        "payments": [{"date": datetime.date(2021, 2, 1), "amount": 10.5}, None],
+        "extra": datetime.date(2021, 1, 4),
+    }
+
+
+def test_plan_keeps_values_which_cant_be_converted() -> None:
+    plan = CoercionPlan.from_schema(SCHEMA)
+    record = {"signed": "unknown", "amount": "a lot", "accepted": "maybe", "payments": "none"}
+    assert parse_json('{"name": "2021-01-01", "signed": null}', coercion_plan=plan) == {
+        "name": "2021-01-01",
+        "signed": None,
+    }
+    assert plan(dict(record)) == record
+
+
+def test_plan_is_picklable() -> None:
+    plan = pickle.loads(pickle.dumps(CoercionPlan.from_schema(SCHEMA)))
+    assert plan({"accepted": True, "payments": [{"amount": "1"}]}) == {
+        "accepted": "yes",
+        "payments": [{"amount": 1}],
+    }
+
+
+def test_coerce_iso_dates_without_schema() -> None:
+    assert coerce_iso_dates(
+        {"a": "2021-01-01", "b": "20210102", "c": "2021-13-01", "d": "text", "e": 2021}
+    ) == {
+        "a": datetime.date(2021, 1, 1),
+        "b": datetime.date(2021, 1, 2),
+        "c": "2021-13-01",
+        "d": "text",
+        "e": 2021,
+    }
+
+
+def test_schema_with_nested_object() -> None:
+    evaluator = infer_structured_evaluator_from_schema(
+        {"loan": {"type": "object", "properties": {"amount": {"type": "number"}}}},
+        text_evaluator="ngram",
+    )
+    assert isinstance(evaluator, DictEval)
+    assert isinstance(evaluator.eval_mapping["loan"], DictEval)
+    assert isinstance(evaluator.eval_mapping["loan"].eval_mapping["amount"], NumEval)
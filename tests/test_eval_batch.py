@@ -1,10 +1,20 @@
+import asyncio
+import pickle
+import time
 from datetime import datetime
+from typing import Any
 
+import numpy as np
 import pytest
 
-from structured_evals.eval_batch import BatchDictEval
-from structured_evals.eval_dict import DictEval
+from structured_evals.base import EvaluatorBase, ItemEvalOutput
+from structured_evals.eval_batch import BatchDictEval, BatchDictEvalOutput
+from structured_evals.eval_dict import DictEval, DictEvalOutput
+from structured_evals.eval_enum import EnumEval, EnumItemOutput
+from structured_evals.eval_list import ListEval
 from structured_evals.eval_primitive import DateEval, NumEval
+from structured_evals.eval_text import EvalTextualMetric
+from structured_evals.ngram_score_fn import chrf_eval
 
 
 def test_eval_batch() -> None:
@@ -31,3 +41,258 @@ def test_eval_batch() -> None:
         "date": [0.0, 0.0, 1.0],
     }
     assert pytest.approx(output.num_times_extra_keys, rel=1e-6) == {"name": 1.0}
+
+
+def test_eval_batch_columnar_output() -> None:
+    eval_ = BatchDictEval(eval_mapping={"num": NumEval(), "color": EnumEval(["red", "green"])})
+
+    pred: list[dict[str, Any]] = [
+        {"num": 1, "color": "red"},
+        {"num": 2, "color": "blue", "extra": 1},
+        {"num": 3},
+    ]
+    target: list[dict[str, Any]] = [
+        {"num": 1, "color": "red"},
+        {"num": 3, "color": "red"},
+        {"num": 3, "color": "red"},
+    ]
+    output = eval_(pred, target)
+
+    assert output.num_items == 3
+    assert output.score_matrix.dtype == np.float32
+    assert output.score_matrix.tolist() == [[1.0, 1.0], [0.0, 0.0], [1.0, 0.0]]
+    assert output.missing_mask.tolist() == [[False, False], [False, False], [False, True]]
+    assert output.extra_keys_table["extra"].tolist() == [1]
+
+    item_results = output.item_results
+    assert item_results[1] == output.item_result(1)
+    assert item_results[1] == DictEvalOutput(
+        results={
+            "num": ItemEvalOutput(score=0.0),
+            "color": EnumItemOutput(score=0.0, prohibited_value=1),
+        },
+        missing_keys={"num": 0, "color": 0},
+        extra_keys={"extra": 1},
+    )
+    assert item_results[2].results["color"] == EnumItemOutput(score=0.0, prohibited_value=0)
+
+
+def test_eval_batch_output_drop_items() -> None:
+    eval_ = BatchDictEval(eval_mapping={"num": NumEval(), "color": EnumEval(["red", "green"])})
+    pred: list[dict[str, Any]] = [
+        {"num": 1, "extra": 1},
+        {"num": 2, "color": "blue", "extra": 1, "other": 1},
+        {"num": 3, "color": "red", "extra": 1},
+    ]
+    target: list[dict[str, Any]] = [{"num": 1, "color": "red"}] * 3
+    output = eval_(pred, target)
+
+    dropped = output.drop_items([1])
+    assert dropped.num_items == 2
+    assert dropped.score_matrix.tolist() == output.score_matrix[[0, 2]].tolist()
+    assert dropped.missing_mask.tolist() == [[False, True], [False, False]]
+    assert {key: idx.tolist() for key, idx in dropped.extra_keys_table.items()} == {"extra": [0, 1]}
+    assert dropped.item_results == [output.item_result(0), output.item_result(2)]
+    assert output.drop_items([]) is output
+
+
+def test_eval_batch_output_from_item_results() -> None:
+    pred: list[dict[str, Any]] = [{"num": 1, "date": datetime(2021, 1, 1), "name": "a"}, {"num": 3}]
+    target: list[dict[str, Any]] = [
+        {"num": 1, "date": datetime(2021, 1, 1)},
+        {"num": 3, "date": datetime(2021, 1, 1)},
+    ]
+    output = BatchDictEval(eval_mapping={"num": NumEval(), "date": DateEval()})(pred, target)
+
+    rebuilt = BatchDictEvalOutput(schema_keys=output.schema_keys, item_results=output.item_results)
+    assert rebuilt.score_matrix.tolist() == output.score_matrix.tolist()
+    assert rebuilt.missing_mask.tolist() == output.missing_mask.tolist()
+    assert rebuilt.num_times_extra_keys == output.num_times_extra_keys == {"name": 1}
+    assert rebuilt.item_results == output.item_results
+
+
+def test_eval_batch_with_key_missing_in_all_items() -> None:
+    eval_ = BatchDictEval(eval_mapping={"num": NumEval(), "date": DateEval()})
+    output = eval_([{"num": 1}, {"num": 2}], [{"num": 1}, {"num": 1}])
+    assert output.scores == {"num": [1.0, 0.0], "date": [0.0, 0.0]}
+    assert output.missing_keys == {"num": [0.0, 0.0], "date": [1.0, 1.0]}
+
+
+def test_eval_batch_with_workers_matches_single_process() -> None:
+    eval_mapping: dict[str, EvaluatorBase] = {
+        "num": NumEval(),
+        "nums": ListEval(NumEval()),
+        "text": EvalTextualMetric(chrf_eval, "chrf"),
+    }
+    pred: list[dict[str, Any]] = [
+        {"num": i, "nums": [i, i + 1], "text": f"item {i}"} for i in range(300) if i % 7
+    ] + [{"num": 1}]
+    target: list[dict[str, Any]] = [
+        {"num": i, "nums": [i, i % 3], "text": f"item {i % 5}"} for i in range(300) if i % 7
+    ] + [{"num": 1, "nums": [1], "text": "a"}]
+
+    single = BatchDictEval(eval_mapping=eval_mapping)(pred, target)
+    with BatchDictEval(eval_mapping=eval_mapping, workers=2) as parallel_eval:
+        parallel = parallel_eval(pred, target)
+        pool = parallel_eval._pool
+        # pool of workers is reused by following calls, e.g. for chunks of a stream
+        assert pool is not None
+        assert parallel_eval(pred[:100], target[:100]).item_results == single.item_results[:100]
+        assert parallel_eval._pool is pool
+    assert parallel_eval._pool is None
+
+    assert parallel.score_matrix.tolist() == single.score_matrix.tolist()
+    assert parallel.missing_mask.tolist() == single.missing_mask.tolist()
+    assert parallel.item_results == single.item_results
+
+
+def test_eval_batch_flattens_nested_dict_eval() -> None:
+    nested = DictEval(
+        eval_mapping={
+            "name": NumEval(),
+            "address": DictEval(eval_mapping={"city": NumEval(), "zip": NumEval()}),
+        }
+    )
+    eval_ = BatchDictEval(eval_mapping={"id": NumEval(), "borrower": nested})
+    assert eval_.schema_keys == [
+        "id",
+        "borrower.name",
+        "borrower.address.city",
+        "borrower.address.zip",
+    ]
+
+    pred: list[dict[str, Any]] = [
+        {"id": 1, "borrower": {"name": 1, "address": {"city": 2, "zip": 3, "street": 4}}},
+        {"id": 2, "borrower": {"name": 1}},
+        {"id": 3, "borrower": None},
+    ]
+    target: list[dict[str, Any]] = [
+        {"id": 1, "borrower": {"name": 1, "address": {"city": 2, "zip": 0}}},
+        {"id": 2, "borrower": {"name": 1, "address": {"city": 2, "zip": 3}}},
+        {"id": 3, "borrower": None},
+    ]
+    output = eval_(pred, target)
+
+    assert output.scores == {
+        "id": [1.0, 1.0, 1.0],
+        "borrower.name": [1.0, 1.0, 1.0],
+        "borrower.address.city": [1.0, 0.0, 1.0],
+        "borrower.address.zip": [0.0, 0.0, 1.0],
+    }
+    assert output.missing_keys["borrower.address.city"] == [0.0, 1.0, 0.0]
+    assert output.num_times_extra_keys == {"borrower.address.street": 1}
+
+    item_result = output.item_result(1)
+    borrower = item_result.results["borrower"]
+    assert isinstance(borrower, DictEvalOutput)
+    assert borrower.missing_keys == {"name": 0, "address": 1}
+    assert borrower.results["address"] == DictEvalOutput(
+        results={"city": ItemEvalOutput(score=0.0), "zip": ItemEvalOutput(score=0.0)},
+        missing_keys={"city": 1, "zip": 1},
+        extra_keys={},
+    )
+    assert output.item_results[0].extra_keys == {"borrower.address.street": 1}
+
+    rebuilt = BatchDictEvalOutput(
+        schema_keys=output.schema_keys, key_paths=output.key_paths, item_results=output.item_results
+    )
+    assert rebuilt.score_matrix.tolist() == output.score_matrix.tolist()
+    assert rebuilt.missing_mask.tolist() == output.missing_mask.tolist()
+    assert rebuilt.item_results == output.item_results
+
+
+class SleepingEvaluator(EvaluatorBase[Any, ItemEvalOutput]):
+    """Scores exact matches after a delay, either in async batch or blocking call."""
+
+    def __init__(self, delay: float, use_async: bool) -> None:
+        super().__init__()
+        self.delay = delay
+        if use_async:
+            self.async_evaluate_batch = self._async_evaluate_batch
+
+    @property
+    def zero_score(self) -> ItemEvalOutput:
+        return ItemEvalOutput(score=0.0)
+
+    @property
+    def max_score(self) -> ItemEvalOutput:
+        return ItemEvalOutput(score=1.0)
+
+    def evaluate(self, pred: Any, target: Any) -> ItemEvalOutput:
+        return ItemEvalOutput(score=float(pred == target))
+
+    def evaluate_batch(self, pred: list[Any], target: list[Any]) -> list[ItemEvalOutput]:
+        time.sleep(self.delay)
+        return [self.evaluate(p, t) for p, t in zip(pred, target)]
+
+    async def _async_evaluate_batch(
+        self, pred: list[Any], target: list[Any]
+    ) -> list[ItemEvalOutput]:
+        await asyncio.sleep(self.delay)
+        return [self.evaluate(p, t) for p, t in zip(pred, target)]
+
+    def check_dtype(self, pred: Any, target: Any) -> bool:
+        return True
+
+
+def test_eval_batch_evaluates_keys_concurrently() -> None:
+    delay = 0.3
+    eval_ = BatchDictEval(
+        eval_mapping={
+            "llm_1": SleepingEvaluator(delay, use_async=True),
+            "llm_2": SleepingEvaluator(delay, use_async=True),
+            "cpu": SleepingEvaluator(delay, use_async=False),
+            "num": NumEval(),
+        }
+    )
+    pred: list[dict[str, Any]] = [{"llm_1": 1, "llm_2": 2, "cpu": 3, "num": 4}, {"llm_1": 0}]
+    target: list[dict[str, Any]] = [{"llm_1": 1, "llm_2": 0, "cpu": 3, "num": 4}] * 2
+
+    start = time.perf_counter()
+    output = eval_(pred, target)
+    assert time.perf_counter() - start < 2 * delay
+
+    assert output.schema_keys == ["llm_1", "llm_2", "cpu", "num"]
+    assert output.scores == {
+        "llm_1": [1.0, 0.0],
+        "llm_2": [0.0, 0.0],
+        "cpu": [1.0, 0.0],
+        "num": [1.0, 0.0],
+    }
+
+
+def test_compiled_eval_matches_batch_eval() -> None:
+    eval_ = BatchDictEval(
+        eval_mapping={
+            "id": NumEval(),
+            "kind": EnumEval(["a", "b"]),
+            "tags": ListEval(EvalTextualMetric(chrf_eval, "chrf")),
+            "borrower": DictEval(
+                eval_mapping={"name": EvalTextualMetric(chrf_eval, "chrf"), "born": DateEval()}
+            ),
+            "llm": SleepingEvaluator(0.0, use_async=True),
+        }
+    )
+    pred: list[dict[str, Any]] = [
+        {"id": 1, "kind": "c", "tags": ["x"], "borrower": {"name": "ann", "age": 3}, "llm": 1},
+        {"id": 2, "kind": "a", "borrower": None, "note": "extra"},
+        {"kind": "b", "tags": [], "borrower": {"born": datetime(2020, 1, 1)}, "llm": 2},
+    ]
+    target: list[dict[str, Any]] = [
+        {"id": 1, "kind": "a", "tags": ["x", "y"], "borrower": {"name": "anna"}, "llm": 1},
+        {"id": 3, "kind": "a", "tags": ["z"], "borrower": None, "llm": 0},
+        {"id": 3, "kind": "b", "tags": [], "borrower": {"born": datetime(2020, 1, 1)}, "llm": 0},
+    ]
+    expected = eval_(pred, target)
+
+    compiled = pickle.loads(pickle.dumps(eval_.compile()))
+    for _ in range(2):
+        output = compiled(pred, target)
+        assert output.schema_keys == expected.schema_keys
+        assert output.score_matrix.tolist() == expected.score_matrix.tolist()
+        assert output.missing_mask.tolist() == expected.missing_mask.tolist()
+        assert output.item_results == expected.item_results
+
+    assert compiled([], []).num_items == 0
+    with pytest.raises(ValueError, match="not present in eval_mapping"):
+        compiled(pred, [{"unknown": 1}] * 3)
@@ -0,0 +1,117 @@
+from typing import Any
+
+import pytest
+
+from structured_evals.base import EvaluatorBase, ItemEvalOutput
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_cascade import CascadeEvalOutput, CascadeTextEval
+from structured_evals.eval_llm_as_judge import LlmAsJudge
+from structured_evals.fake_llm import FakeJudgeChatModel
+
+
+class RecordingEvaluator(EvaluatorBase[str, ItemEvalOutput]):
+    """Scores every pair with 0.5, recording escalated pairs."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pairs: list[tuple[Any, Any]] = []
+
+    @property
+    def zero_score(self) -> ItemEvalOutput:
+        return ItemEvalOutput(score=0.0)
+
+    @property
+    def max_score(self) -> ItemEvalOutput:
+        return ItemEvalOutput(score=1.0)
+
+    def evaluate(self, pred: str, target: str) -> ItemEvalOutput:
+        self.pairs.append((pred, target))
+        return ItemEvalOutput(score=0.5)
+
+    def check_dtype(self, pred: Any, target: Any) -> bool:
+        return True
+
+
+PRED = [
+    None,
+    "",
+    123,
+    "Warsaw, Poland.",
+    "Umowa kredytu hipotecznego nr 123/2008 indeksowanego do CHF",
+    "completely different",
+    "Bank Polski",
+]
+TARGET = [
+    None,
+    "target",
+    "target",
+    "warsaw,  poland",
+    "Umowa kredytu hipotecznego nr 123/2008 indeksowanego do CHF.",
+    "xyz",
+    "Bank Polska",
+]
+EXPECTED = [
+    CascadeEvalOutput(score=1.0, tier="rule"),
+    CascadeEvalOutput(score=0.0, tier="rule"),
+    CascadeEvalOutput(score=0.0, tier="rule"),
+    CascadeEvalOutput(score=1.0, tier="exact"),
+    CascadeEvalOutput(score=1.0, tier="exact"),
+    CascadeEvalOutput(score=0.0, tier="ngram"),
+    CascadeEvalOutput(score=0.5, tier="escalation"),
+]
+
+
+def test_cascade_tiers() -> None:
+    escalation = RecordingEvaluator()
+    cascade = CascadeTextEval(escalation_evaluator=escalation)
+
+    assert cascade.evaluate_batch(PRED, TARGET) == EXPECTED  # type: ignore[arg-type]
+    assert escalation.pairs == [("Bank Polski", "Bank Polska")]
+    assert [cascade.evaluate(p, t) for p, t in zip(PRED, TARGET)] == EXPECTED  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize(
+    "pred, target",
+    [("-5", "5"), ("$100", "100"), ("C++", "C"), ("!!!", "?"), ("(a)", "a")],
+)
+def test_cascade_exact_tier_keeps_meaningful_punctuation(pred: str, target: str) -> None:
+    cascade = CascadeTextEval(escalation_evaluator=RecordingEvaluator())
+    assert cascade.evaluate(pred, target).tier != "exact"
+
+
+def test_cascade_exact_tier_ignores_sentence_end() -> None:
+    cascade = CascadeTextEval(escalation_evaluator=RecordingEvaluator())
+    assert cascade.evaluate("Yes!", " yes ").tier == "exact"
+    assert cascade.evaluate("C++.", "c++").tier == "exact"
+
+
+def test_cascade_ngram_high_tier() -> None:
+    escalation = RecordingEvaluator()
+    cascade = CascadeTextEval(escalation_evaluator=escalation, high_threshold=0.8)
+    pred = "Sąd Okręgowy w Warszawie, XXV Wydział Cywilny"
+    target = "Sąd Okręgowy w Warszawie XXV Wydział Cywilny"
+
+    assert cascade.evaluate(pred, target) == CascadeEvalOutput(score=1.0, tier="ngram")
+    assert escalation.pairs == []
+
+
+def test_invalid_thresholds() -> None:
+    with pytest.raises(ValueError):
+        CascadeTextEval(RecordingEvaluator(), high_threshold=0.2, low_threshold=0.5)
+
+
+def test_cascade_in_batch_dict_eval_with_llm_judge() -> None:
+    llm = FakeJudgeChatModel(latency=0.001)
+    cascade = CascadeTextEval(escalation_evaluator=LlmAsJudge(llm=llm))
+    assert cascade.io_bound
+    evaluator = BatchDictEval(eval_mapping={"text": cascade})
+
+    results = evaluator(
+        pred=[{"text": p} for p in PRED],
+        target=[{"text": t} for t in TARGET],
+    )
+
+    assert [out.results["text"].tier for out in results.item_results] == [  # type: ignore[union-attr]
+        out.tier for out in EXPECTED
+    ]
+    assert len(llm.request_latencies) == 1
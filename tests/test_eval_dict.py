@@ -3,7 +3,7 @@ from datetime import datetime
 import pytest
 
 from structured_evals.base import ItemEvalOutput
-from structured_evals.eval_dict import DictEval
+from structured_evals.eval_dict import DictEval, DictEvalOutput
 from structured_evals.eval_primitive import DateEval, NumEval
 
 
@@ -109,3 +109,17 @@ def test_eval_dict_ignore_error_strategy_and_invalid_field_dtype() -> None:
 #             missing={"b": 1},
 #             extra={"b": 1},
 #         )
+
+
+def test_eval_dict_nested() -> None:
+    eval_ = DictEval(
+        eval_mapping={"num": NumEval(), "inner": DictEval(eval_mapping={"num": NumEval()})}
+    )
+
+    output = eval_({"num": 1, "inner": {"num": 3}}, {"num": 1, "inner": {"num": 2}})
+    assert output.results == {
+        "num": ItemEvalOutput(score=1.0),
+        "inner": DictEvalOutput(
+            results={"num": ItemEvalOutput(score=0.0)}, missing_keys={}, extra_keys={}
+        ),
+    }
@@ -48,3 +48,14 @@ def test_numeric_types() -> None:
     result = evaluator(1, 1)
     assert result.score == 1.0
     assert result.prohibited_value == 0
+
+
+def test_evaluate_batch_matches_item_evaluation() -> None:
+    evaluator = EnumEval(["red", "green", 1, None])
+    pred = ["red", "red", "yellow", None, None, ["red"], 1.0, "red", None]
+    target = ["red", "green", "red", None, "red", "red", 1, "yellow", "yellow"]
+    results = evaluator.evaluate_batch(pred, target)  # type: ignore[arg-type]
+    expected = [evaluator(p, t) for p, t in zip(pred, target)]  # type: ignore[arg-type]
+    assert [(r.score, r.prohibited_value) for r in results] == [
+        (e.score, e.prohibited_value) for e in expected
+    ]
@@ -1,6 +1,10 @@
+from typing import Any
+
 import pytest
 
-from structured_evals.eval_list import ListEval, ListEvalOutput
+from structured_evals.base import EvaluatorBase, ItemEvalOutput
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_list import ListEval, ListEvalOutput, T_list_matching
 from structured_evals.eval_primitive import NumEval
 
 
@@ -265,3 +269,103 @@ def test_complex_greedy_scenario() -> None:
     assert result.score == pytest.approx(2.0 / 3.0)
     assert result.num_missing_items == 1
     assert result.num_extra_items == 2
+
+
+class LookupEvaluator(EvaluatorBase[str, ItemEvalOutput]):
+    """Scores pairs from a lookup table, counting batched calls."""
+
+    def __init__(self, scores: dict[tuple[str, str], float]) -> None:
+        super().__init__()
+        self.scores = scores
+        self.num_batch_calls = 0
+        self.num_scored_pairs = 0
+
+    @property
+    def zero_score(self) -> ItemEvalOutput:
+        return ItemEvalOutput(score=0.0)
+
+    @property
+    def max_score(self) -> ItemEvalOutput:
+        return ItemEvalOutput(score=1.0)
+
+    def evaluate(self, pred: str, target: str) -> ItemEvalOutput:
+        return ItemEvalOutput(score=self.scores.get((pred, target), 0.0))
+
+    def evaluate_batch(self, pred: list[str], target: list[str]) -> list[ItemEvalOutput]:
+        self.num_batch_calls += 1
+        self.num_scored_pairs += len(pred)
+        return [self.evaluate(p, t) for p, t in zip(pred, target)]
+
+    def check_dtype(self, pred: str, target: str) -> bool:
+        return True
+
+
+@pytest.mark.parametrize(
+    "matching,expected_score,expected_missing,expected_extra",
+    [("hungarian", 0.75, 0, 0), ("greedy", 0.45, 1, 1)],
+)
+def test_matching_modes(
+    matching: T_list_matching,
+    expected_score: float,
+    expected_missing: int,
+    expected_extra: int,
+) -> None:
+    """Test that hungarian matching maximizes total similarity, unlike greedy one."""
+    item_evaluator = LookupEvaluator({("x", "a"): 0.9, ("y", "a"): 0.8, ("x", "b"): 0.7})
+    evaluator = ListEval(item_evaluator=item_evaluator, matching=matching)
+    result = evaluator(["x", "y"], ["a", "b"])
+
+    assert result.score == pytest.approx(expected_score)
+    assert result.num_missing_items == expected_missing
+    assert result.num_extra_items == expected_extra
+    assert item_evaluator.num_batch_calls == 1
+
+
+def test_greedy_matching_is_default() -> None:
+    item_evaluator = LookupEvaluator({("x", "a"): 0.9, ("y", "a"): 0.8, ("x", "b"): 0.7})
+    evaluator = ListEval(item_evaluator=item_evaluator)
+    result = evaluator(["x", "y"], ["a", "b"])
+
+    assert evaluator.matching == "greedy"
+    assert result.score == pytest.approx(0.45)
+
+
+def test_hungarian_matching_of_long_lists() -> None:
+    """Test that shuffled long lists are fully matched."""
+    evaluator = ListEval(item_evaluator=NumEval(), matching="hungarian")
+    target = list(range(200))
+    pred = [*reversed(target[50:]), 1000, 1001]
+    result = evaluator(pred, target)
+
+    assert result.score == pytest.approx(150 / 200)
+    assert result.num_missing_items == 50
+    assert result.num_extra_items == 2
+
+
+def test_evaluate_batch_scores_unique_item_pairs_at_once() -> None:
+    """Test that item pairs of all lists in batch are deduplicated and scored in one call."""
+    scores = {("x", "a"): 0.9, ("y", "a"): 0.8, ("x", "b"): 0.7}
+    pred: list[Any] = [["x", "y"], ["x"], None, ["y", "x"], []]
+    target: list[Any] = [["a", "b"], ["a"], ["a"], ["b", "a"], []]
+    item_evaluator = LookupEvaluator(scores)
+    evaluator = ListEval(item_evaluator=item_evaluator)
+
+    results = evaluator.evaluate_batch(pred, target)
+
+    assert item_evaluator.num_batch_calls == 1
+    assert item_evaluator.num_scored_pairs == 4
+    reference = ListEval(item_evaluator=LookupEvaluator(scores))
+    assert results == [reference.evaluate(p, t) for p, t in zip(pred, target)]
+
+
+def test_batch_dict_eval_scores_list_items_at_once() -> None:
+    """Test that BatchDictEval scores items of a list field across all records in one call."""
+    item_evaluator = LookupEvaluator({("x", "a"): 1.0})
+    evaluator = BatchDictEval(eval_mapping={"names": ListEval(item_evaluator=item_evaluator)})
+    output = evaluator(
+        [{"names": ["x", "y"]}, {"names": ["x"]}, {}],
+        [{"names": ["a"]}, {"names": ["a", "b"]}, {"names": ["a"]}],
+    )
+
+    assert item_evaluator.num_batch_calls == 1
+    assert output.scores == {"names": [1.0, 0.5, 0.0]}
@@ -1,16 +1,28 @@
 import asyncio
+import pickle
+import threading
+import time
+from typing import Any
 from unittest.mock import Mock, patch
 
 import pytest
+from langchain_core.exceptions import OutputParserException
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts.chat import ChatPromptTemplate
 
 from structured_evals.base import ItemEvalOutput
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_list import ListEval
 from structured_evals.eval_llm_as_judge import (
     DEFAULT_MAX_CONCURRENT_CALLS,
     JudgeScore,
+    JudgeScores,
     LlmAsJudge,
+    PairScore,
 )
+from structured_evals.fake_llm import FakeApiError, FakeJudgeChatModel
+from structured_evals.judgement_cache import JudgementCache
+from structured_evals.rate_limiter import AdaptiveRateLimiter
 
 
 @pytest.fixture
@@ -222,3 +234,224 @@ class TestLlmAsJudgeBatchEvaluation:
             assert call_count == 2
 
         asyncio.run(run_test())
+
+
+def test_pickle_round_trip() -> None:
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(model="test-model", api_key="key", base_url="http://localhost:1234/v1")  # type: ignore[arg-type]
+    judge = LlmAsJudge(llm=llm, max_concurrent_calls=3)
+
+    restored = pickle.loads(pickle.dumps(judge))
+
+    assert isinstance(restored.llm, ChatOpenAI)
+    assert restored.llm.model_name == "test-model"
+    assert restored.llm.openai_api_base == "http://localhost:1234/v1"
+    assert restored.semaphore._value == 3
+    assert restored.name == judge.name
+    assert restored.io_bound
+
+
+def test_evaluate_batch_in_consecutive_event_loops(mock_llm: Mock) -> None:
+    """Test that concurrency limit works across event loops of consecutive batches."""
+    judge = LlmAsJudge(llm=mock_llm, max_concurrent_calls=1)
+
+    async def slow_ainvoke(template_kwargs: dict[str, str]) -> JudgeScore:
+        await asyncio.sleep(0.01)
+        return JudgeScore(score=0.5)
+
+    judge.chain = Mock(ainvoke=slow_ainvoke)
+    start = time.perf_counter()
+    for _ in range(2):
+        results = judge.evaluate_batch(["a", "b", "c"], ["x", "y", "z"])
+        assert [res.score for res in results] == [0.5, 0.5, 0.5]
+    # semaphore bound to a previous loop would fail and trigger retries with >= 1s backoff
+    assert time.perf_counter() - start < 1.0
+
+
+def test_evaluate_batch_with_cache(mock_llm: Mock) -> None:
+    judged: list[tuple[str, str]] = []
+
+    async def ainvoke(template_kwargs: dict[str, str]) -> JudgeScore:
+        judged.append((template_kwargs["pred"], template_kwargs["target"]))
+        return JudgeScore(score=0.5)
+
+    judge = LlmAsJudge(llm=mock_llm, cache=JudgementCache(path=None))
+    judge.chain = Mock(ainvoke=ainvoke)
+
+    results = judge.evaluate_batch(["a", "a", "b", "same"], ["x", "x", "y", "same"])
+    assert [res.score for res in results] == [0.5, 0.5, 0.5, 1.0]
+    assert sorted(judged) == [("a", "x"), ("b", "y")]
+
+    results = judge.evaluate_batch(["a", "c"], ["x", "z"])
+    assert [res.score for res in results] == [0.5, 0.5]
+    assert sorted(judged) == [("a", "x"), ("b", "y"), ("c", "z")]
+
+    assert judge.evaluate("b", "y").score == 0.5
+    assert len(judged) == 3
+    assert judge.cache is not None
+    assert judge.cache.stats.misses == 3
+
+
+def test_cache_is_keyed_by_prompt(mock_llm: Mock) -> None:
+    cache = JudgementCache(path=None)
+    first = LlmAsJudge(llm=mock_llm, cache=cache)
+    second = LlmAsJudge(llm=mock_llm, prompt="Is {pred} same as {target}?", cache=cache)
+
+    assert first._cache_key("a", "b") != second._cache_key("a", "b")
+
+
+def test_cache_and_fingerprint_distinguish_packed_mode(mock_llm: Mock) -> None:
+    cache = JudgementCache(path=None)
+    single = LlmAsJudge(llm=mock_llm, cache=cache)
+    packed = LlmAsJudge(llm=mock_llm, cache=cache, pack_size=4)
+    other_packed = LlmAsJudge(
+        llm=mock_llm, cache=cache, pack_size=8, packed_prompt="Score pairs:\n{pairs}"
+    )
+
+    keys = {judge._cache_key("a", "b") for judge in [single, packed, other_packed]}
+    fingerprints = {judge.fingerprint for judge in [single, packed, other_packed]}
+    assert len(keys) == len(fingerprints) == 3
+    # pack size within packed mode doesn't change judgements
+    assert packed._cache_key("a", "b") == LlmAsJudge(llm=mock_llm, pack_size=2)._cache_key("a", "b")
+
+
+class TestPackedJudging:
+    """Test judging of multiple pairs per LLM request."""
+
+    @staticmethod
+    def _judge(mock_llm: Mock, **kwargs: Any) -> tuple[LlmAsJudge, list[str], list[str]]:
+        judge = LlmAsJudge(llm=mock_llm, **kwargs)
+        packed_requests: list[str] = []
+        single_requests: list[str] = []
+
+        async def packed_ainvoke(template_kwargs: dict[str, str]) -> JudgeScores | None:
+            packed_requests.append(template_kwargs["pairs"])
+            num_pairs = template_kwargs["pairs"].count("Reference Answer:")
+            return JudgeScores(scores=[PairScore(id=i, score=0.5) for i in range(1, num_pairs + 1)])
+
+        async def single_ainvoke(template_kwargs: dict[str, str]) -> JudgeScore:
+            single_requests.append(template_kwargs["pred"])
+            return JudgeScore(score=0.25)
+
+        judge.packed_chain = Mock(ainvoke=packed_ainvoke)
+        judge.chain = Mock(ainvoke=single_ainvoke)
+        return judge, packed_requests, single_requests
+
+    def test_packs_pairs_into_requests(self, mock_llm: Mock) -> None:
+        judge, packed, single = self._judge(mock_llm, pack_size=4)
+        pred = [f"pred {i}" for i in range(10)] + ["same"]
+        target = [f"target {i}" for i in range(10)] + ["same"]
+
+        results = judge.evaluate_batch(pred, target)
+
+        assert [res.score for res in results] == [0.5] * 10 + [1.0]
+        assert len(packed) == 3
+        assert "Prediction: pred 0" in packed[0] and "Prediction: pred 9" in packed[2]
+        assert single == []
+
+    def test_pack_size_adapts_to_token_budget(self, mock_llm: Mock) -> None:
+        judge, _, _ = self._judge(mock_llm, pack_size=8, max_pack_tokens=200)
+        pairs = [("a" * 400, "b" * 400)] * 2 + [("short", "text")] * 10 + [("c" * 300, "d")] * 3
+
+        packs = judge._make_packs(pairs)
+
+        assert [len(pack) for pack in packs] == [1, 1, 8, 4, 1]
+
+    def test_falls_back_to_single_requests_on_missing_scores(self, mock_llm: Mock) -> None:
+        judge, packed, single = self._judge(mock_llm, pack_size=3)
+
+        async def incomplete_ainvoke(template_kwargs: dict[str, str]) -> JudgeScores:
+            packed.append(template_kwargs["pairs"])
+            return JudgeScores(scores=[PairScore(id=1, score=1.0), PairScore(id=7, score=1.0)])
+
+        judge.packed_chain = Mock(ainvoke=incomplete_ainvoke)
+        results = judge.evaluate_batch(["a", "b", "c"], ["x", "y", "z"])
+
+        assert [res.score for res in results] == [1.0, 0.25, 0.25]
+        assert len(packed) == 1
+        assert single == ["b", "c"]
+
+    def test_falls_back_to_single_requests_on_parse_failure(self, mock_llm: Mock) -> None:
+        judge, packed, single = self._judge(mock_llm, pack_size=3)
+
+        async def failing_ainvoke(template_kwargs: dict[str, str]) -> JudgeScores:
+            packed.append(template_kwargs["pairs"])
+            raise OutputParserException("invalid output")
+
+        judge.packed_chain = Mock(ainvoke=failing_ainvoke)
+        results = judge.evaluate_batch(["a", "b"], ["x", "y"])
+
+        assert [res.score for res in results] == [0.25, 0.25]
+        # parse failures are not retried
+        assert len(packed) == 1
+        assert single == ["a", "b"]
+
+    def test_invalid_pack_size(self, mock_llm: Mock) -> None:
+        with pytest.raises(ValueError):
+            LlmAsJudge(llm=mock_llm, pack_size=0)
+
+
+def test_evaluate_batch_with_rate_limiter(mock_llm: Mock) -> None:
+    limiter = AdaptiveRateLimiter(initial_concurrency=2)
+    judge = LlmAsJudge(llm=mock_llm, rate_limiter=limiter)
+
+    async def ainvoke(template_kwargs: dict[str, str]) -> JudgeScore:
+        await asyncio.sleep(0.001)
+        return JudgeScore(score=0.5)
+
+    judge.chain = Mock(ainvoke=ainvoke)
+    results = judge.evaluate_batch(["a", "b", "c"], ["x", "y", "z"])
+
+    assert [res.score for res in results] == [0.5, 0.5, 0.5]
+    assert limiter.stats.num_requests == 3
+    assert limiter.stats.num_tokens > 0
+    assert limiter.concurrency > 2
+
+
+def test_rate_limiter_shared_by_string_and_list_keys() -> None:
+    # judges of list keys run their own event loops in worker threads, concurrently with judges
+    # of string keys on the main loop
+    limiter = AdaptiveRateLimiter(initial_concurrency=4, max_concurrency=4)
+    llm = FakeJudgeChatModel(latency=0.002, max_concurrent_requests=4)
+    judge = LlmAsJudge(llm=llm, rate_limiter=limiter)
+    eval_ = BatchDictEval(eval_mapping={"a": judge, "b": ListEval(judge)})
+    pred = [{"a": f"pred {i}", "b": [f"pred {i}", f"pred {i + 1}"]} for i in range(60)]
+    target = [{"a": f"target {i}", "b": [f"target {i}", f"target {i + 1}"]} for i in range(60)]
+
+    outputs = []
+    thread = threading.Thread(target=lambda: outputs.append(eval_(pred, target)), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive(), "evaluation with shared rate limiter didn't finish"
+    assert len(outputs[0].scores["a"]) == 60
+    assert limiter.stats.num_requests >= 60
+    # concurrency limit holds across event loops, the endpoint never throttles
+    assert limiter.stats.num_throttled == 0
+
+
+@pytest.mark.parametrize("with_limiter", [True, False])
+def test_throttled_requests_are_retried_after_pause_of_limiter(
+    mock_llm: Mock, with_limiter: bool
+) -> None:
+    limiter = AdaptiveRateLimiter() if with_limiter else None
+    judge = LlmAsJudge(llm=mock_llm, rate_limiter=limiter)
+    responses: list[Any] = [FakeApiError(429, {"retry-after": "0.01"}), JudgeScore(score=0.5)]
+
+    async def ainvoke(template_kwargs: dict[str, str]) -> JudgeScore:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    judge.chain = Mock(ainvoke=ainvoke)
+    with patch("asyncio.sleep", wraps=asyncio.sleep) as sleep:
+        assert [res.score for res in judge.evaluate_batch(["a"], ["x"])] == [0.5]
+
+    # limiter pauses for Retry-After, exponential backoff of retries doesn't add up to it
+    backoffs = [call.args[0] for call in sleep.call_args_list]
+    if with_limiter:
+        assert max(backoffs) < 1
+    else:
+        assert backoffs == [1]
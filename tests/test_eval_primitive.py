@@ -52,3 +52,44 @@ def test_date_eval_null_handling() -> None:
     assert evaluator(None, None).score == 1.0
     assert evaluator(None, datetime(2021, 1, 1)).score == 0.0
     assert evaluator(datetime(2021, 1, 1), None).score == 0.0
+
+
+def test_num_eval_batch_matches_item_evaluation() -> None:
+    evaluator = NumEval()
+    pred = [1, 2.0, None, None, 1, "1", 2**60 + 1, True]
+    target = [1, 2, None, 1, None, 1, 2**60, 1]
+    expected = [evaluator(p, t).score for p, t in zip(pred, target)]  # type: ignore[arg-type]
+    assert [out.score for out in evaluator.evaluate_batch(pred, target)] == expected  # type: ignore[arg-type]
+    assert expected == [1.0, 1.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+
+def test_date_eval_batch_matches_item_evaluation() -> None:
+    evaluator = DateEval()
+    pred = [
+        datetime(2021, 1, 1, 12, 34),
+        datetime(2021, 1, 1).date(),
+        None,
+        None,
+        datetime(2021, 1, 1),
+        "2021-01-01",
+    ]
+    target = [
+        datetime(2021, 1, 1),
+        datetime(2021, 1, 2).date(),
+        None,
+        datetime(2021, 1, 1),
+        None,
+        datetime(2021, 1, 1),
+    ]
+    expected = [evaluator(p, t).score for p, t in zip(pred, target)]  # type: ignore[arg-type]
+    assert [out.score for out in evaluator.evaluate_batch(pred, target)] == expected  # type: ignore[arg-type]
+    assert expected == [1.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+
+
+def test_date_eval_batch_with_custom_formats() -> None:
+    pred = [datetime(2021, 1, 1), datetime(2021, 2, 1), datetime(2021, 1, 1, 10)]
+    target = [datetime(2021, 1, 31), datetime(2021, 1, 1), datetime(2021, 1, 1, 11)]
+    for date_fmt in ["%Y", "%Y-%m", "%d/%m/%Y %H"]:
+        evaluator = DateEval(date_fmt=date_fmt)
+        expected = [evaluator(p, t).score for p, t in zip(pred, target)]
+        assert [out.score for out in evaluator.evaluate_batch(pred, target)] == expected  # type: ignore[arg-type]
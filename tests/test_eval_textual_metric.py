@@ -1,6 +1,8 @@
+import pytest
 from torchmetrics.functional.text import chrf_score
 
-from structured_evals.eval_text import EvalTextualMetric
+from structured_evals.eval_text import ChrfEval, EvalTextualMetric
+from structured_evals.ngram_score_fn import chrf_batch
 
 
 def test_eval_textual_metric() -> None:
@@ -19,3 +21,33 @@ def test_eval_textual_chrf() -> None:
     assert eval_("abc", "def").score == 0.0
     assert eval_("abc", "abc").score == 1.0
     assert eval_("abcd", "abce").score == 0.75
+
+
+@pytest.mark.parametrize(
+    "n_char_order,n_word_order,beta",
+    [(1, 0, 2.0), (6, 2, 2.0), (3, 0, 1.0)],
+)
+def test_chrf_eval_matches_torchmetrics(n_char_order: int, n_word_order: int, beta: float) -> None:
+    pred: list[str | None] = ["abc", "the cat, sat!", "ąęść  x", "a", "", None, "abc", "x y z"]
+    target: list[str | None] = ["def", "a cat sat.", "ąę ść", "a", "", None, None, "z y x"]
+    eval_ = ChrfEval(n_char_order=n_char_order, n_word_order=n_word_order, beta=beta)
+
+    def reference(p: str | None, t: str | None) -> float:
+        if not p and not t:
+            return 1.0
+        elif not p or not t:
+            return 0.0
+        return chrf_score(  # type: ignore[union-attr]
+            [p], [t], n_char_order=n_char_order, n_word_order=n_word_order, beta=beta
+        ).item()
+
+    expected = [reference(p, t) for p, t in zip(pred, target)]
+    assert [eval_.evaluate(p, t).score for p, t in zip(pred, target)] == expected
+    assert eval_.evaluate_column(pred, target).scores.tolist() == expected
+    assert eval_.evaluate_batch(pred, target) == [
+        eval_.evaluate(p, t) for p, t in zip(pred, target)
+    ]
+
+
+def test_chrf_batch_empty() -> None:
+    assert chrf_batch([], []).tolist() == []
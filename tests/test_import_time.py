@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# backends which take seconds to import, and are needed only by LLM-based evaluators
+HEAVY_MODULES = ["langchain", "langchain_community", "langchain_core", "langchain_openai", "torch"]
+IMPORT_TIME_BUDGET_S = 1.5
+CLI_HELP_TIME_BUDGET_S = 3.0
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import structured_evals
+elapsed = time.perf_counter() - start
+"""
+CLI_HELP_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from typer.testing import CliRunner
+from structured_evals.cli import app
+assert CliRunner().invoke(app, ["--help"]).exit_code == 0
+elapsed = time.perf_counter() - start
+"""
+REPORT_SNIPPET = """
+heavy = sorted({name.split(".")[0] for name in sys.modules} & set(json.loads(sys.argv[1])))
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+"""
+
+
+@pytest.mark.parametrize(
+    "snippet,budget",
+    [(IMPORT_SNIPPET, IMPORT_TIME_BUDGET_S), (CLI_HELP_SNIPPET, CLI_HELP_TIME_BUDGET_S)],
+    ids=["import", "cli-help"],
+)
+def test_startup_does_not_import_heavy_backends(snippet: str, budget: float) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-c", snippet + REPORT_SNIPPET, json.dumps(HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(proc.stdout.splitlines()[-1])
+    assert result["heavy"] == []
+    assert result["elapsed"] < budget
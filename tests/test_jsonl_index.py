@@ -0,0 +1,74 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from structured_evals.jsonl_index import JsonlIndex
+from structured_evals.loader import EvaluationBatch
+
+SAMPLE_JSONL = "data/sample.jsonl"
+
+
+@pytest.fixture
+def jsonl_file(tmp_path: Path) -> Path:
+    path = tmp_path / "records.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(10):
+            f.write(json.dumps({"pred": f'{{"id": {i}}}', "target": f'{{"id": "ł{i}"}}'}) + "\n")
+            if i == 4:
+                f.write("\n  \n")
+    return path
+
+
+def test_index_reads_records_by_position(jsonl_file: Path) -> None:
+    with open(jsonl_file) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    index = JsonlIndex.open(jsonl_file)
+
+    assert len(index) == 10
+    assert JsonlIndex.get_index_path(jsonl_file).exists()
+    assert index.read_records(range(3, 7)) == records[3:7]
+    assert index.read_records([9, 0, 5]) == [records[9], records[0], records[5]]
+    assert index.read_records([]) == []
+
+
+def test_stale_index_is_rebuilt(jsonl_file: Path) -> None:
+    JsonlIndex.open(jsonl_file)
+    loaded = JsonlIndex.load(jsonl_file)
+    assert loaded is not None and len(loaded) == 10 and loaded.hashes is None
+
+    with open(jsonl_file, "a") as f:
+        f.write(json.dumps({"pred": "{}", "target": "{}"}) + "\n")
+    os.utime(jsonl_file, ns=(0, 0))
+
+    assert JsonlIndex.load(jsonl_file) is None
+    index = JsonlIndex.open(jsonl_file, with_hashes=True)
+    assert len(index) == 11
+    assert index.hashes is not None and len(set(index.hashes.tolist())) == 11
+
+
+def test_loader_reads_record_ranges(jsonl_file: Path) -> None:
+    # reads whole file sequentially, skipping blank lines as index does
+    (eval_batch,) = EvaluationBatch.iter_chunks(jsonl_file, chunk_size=100, record_format="json")
+    subset = EvaluationBatch.from_json(jsonl_file, record_format="json", records=[8, 2])
+    chunks = list(
+        EvaluationBatch.iter_chunks(
+            jsonl_file, chunk_size=3, record_format="json", skip_chunks=1, records=range(2, 10)
+        )
+    )
+
+    assert subset.target == [eval_batch.target[8], eval_batch.target[2]]
+    assert [len(chunk.pred) for chunk in chunks] == [3, 2]
+    assert [item for chunk in chunks for item in chunk.target] == eval_batch.target[5:10]
+
+
+def test_parse_errors_refer_to_positions_in_file(tmp_path: Path) -> None:
+    with open(SAMPLE_JSONL) as f_in, open(tmp_path / "records.jsonl", "w") as f_out:
+        f_out.write(f_in.read())
+        f_out.write(json.dumps({"pred": "[1]", "target": "{}"}) + "\n")
+
+    eval_batch = EvaluationBatch.from_json(
+        tmp_path / "records.jsonl", record_format="json", records=range(1, 4)
+    )
+    assert [error.index for error in eval_batch.parse_stats.errors] == [3]
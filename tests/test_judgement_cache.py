@@ -0,0 +1,122 @@
+import pickle
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from structured_evals.judgement_cache import JudgementCache
+
+
+def test_make_key_depends_on_all_parts() -> None:
+    parts = {
+        "model": "model",
+        "prompt": "prompt {pred} {target}",
+        "system_prompt": "system",
+        "pred": "pred",
+        "target": "target",
+    }
+    key = JudgementCache.make_key(**parts)
+
+    assert key == JudgementCache.make_key(**parts)
+    for name in parts:
+        assert key != JudgementCache.make_key(**(parts | {name: "other"}))
+
+
+def test_memory_and_disk_hits(tmp_path: Path) -> None:
+    path = tmp_path / "judgements.db"
+    cache = JudgementCache(path=path)
+    cache.set_many({"a": 1.0, "b": 0.5})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1.0, "b": 0.5}
+    assert (cache.stats.memory_hits, cache.stats.disk_hits, cache.stats.misses) == (2, 0, 1)
+
+    other_process_cache = JudgementCache(path=path)
+    assert other_process_cache.get_many(["a", "c"]) == {"a": 1.0}
+    assert other_process_cache.get_many(["a"]) == {"a": 1.0}
+    stats = other_process_cache.stats
+    assert (stats.memory_hits, stats.disk_hits, stats.misses) == (1, 1, 1)
+    assert stats.hit_rate == pytest.approx(2 / 3)
+
+
+def test_in_memory_only() -> None:
+    cache = JudgementCache(path=None)
+    cache.set_many({"a": 1.0})
+
+    assert cache.get_many(["a", "b"]) == {"a": 1.0}
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_memory_tier_is_lru(tmp_path: Path) -> None:
+    cache = JudgementCache(path=None, max_memory_items=2)
+    cache.set_many({"a": 1.0, "b": 0.0})
+    cache.get_many(["a"])
+    cache.set_many({"c": 0.5})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1.0, "c": 0.5}
+
+
+def test_ttl(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "judgements.db"
+    cache = JudgementCache(path=path, ttl=60)
+    monkeypatch.setattr("time.time", lambda: 1000.0)
+    cache.set_many({"a": 1.0})
+
+    monkeypatch.setattr("time.time", lambda: 1030.0)
+    assert cache.get_many(["a"]) == {"a": 1.0}
+
+    monkeypatch.setattr("time.time", lambda: 1100.0)
+    assert cache.get_many(["a"]) == {}
+    assert JudgementCache(path=path, ttl=60).get_many(["a"]) == {}
+
+    # expired entries are removed from disk on write
+    cache.set_many({"b": 0.0})
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT key FROM judgements").fetchall() == [("b",)]
+
+
+def test_size_eviction(tmp_path: Path) -> None:
+    path = tmp_path / "judgements.db"
+    cache = JudgementCache(path=path, max_disk_items=3)
+    for key in "abcde":
+        cache.set_many({key: 1.0})
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT key FROM judgements ORDER BY key").fetchall() == [
+            ("c",),
+            ("d",),
+            ("e",),
+        ]
+    assert JudgementCache(path=path).get_many(list("abcde")).keys() == {"c", "d", "e"}
+
+
+def test_size_eviction_with_replaced_entries(tmp_path: Path) -> None:
+    path = tmp_path / "judgements.db"
+    cache = JudgementCache(path=path, max_disk_items=3)
+    cache.set_many({"a": 1.0, "b": 1.0})
+    # replaced entries leave gaps in rowids, which must not evict entries within the limit
+    for _ in range(5):
+        cache.set_many({"a": 0.5})
+    cache.set_many({"c": 1.0})
+
+    assert JudgementCache(path=path).get_many(list("abc")).keys() == {"a", "b", "c"}
+    cache.set_many({"d": 1.0})
+    assert JudgementCache(path=path).get_many(list("abcd")).keys() == {"a", "c", "d"}
+
+
+def test_batched_lookup_of_many_keys(tmp_path: Path) -> None:
+    path = tmp_path / "judgements.db"
+    scores = {str(i): i / 2000 for i in range(2000)}
+    JudgementCache(path=path).set_many(scores)
+
+    assert JudgementCache(path=path).get_many(scores) == scores
+
+
+def test_pickle(tmp_path: Path) -> None:
+    cache = JudgementCache(path=tmp_path / "judgements.db")
+    cache.set_many({"a": 1.0})
+
+    restored = pickle.loads(pickle.dumps(cache))
+    restored.set_many({"b": 0.0})
+
+    assert restored.get_many(["a", "b"]) == {"a": 1.0, "b": 0.0}
+    assert cache.get_many(["b"]) == {"b": 0.0}
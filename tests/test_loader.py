@@ -1,6 +1,12 @@
 import datetime
+import json
+import math
+from pathlib import Path
 
-from structured_evals.loader import EvaluationBatch, load_jsonl
+import pytest
+
+from structured_evals import fast_json
+from structured_evals.loader import EvaluationBatch, load_jsonl, parse_json
 
 SAMPLE_JSONL = "data/sample.jsonl"
 SAMPLE_JSON = "data/sample.json"
@@ -39,3 +45,122 @@ def test_loader_with_parser() -> None:
     ]
     assert eval_batch.pred == pred_data
     assert eval_batch.target == target_data
+
+
+def test_loader_iter_chunks() -> None:
+    eval_batch = EvaluationBatch.from_json(SAMPLE_JSONL, record_format="json")
+    chunks = list(EvaluationBatch.iter_chunks(SAMPLE_JSONL, chunk_size=2, record_format="json"))
+
+    assert [len(chunk.pred) for chunk in chunks] == [2, 1]
+    assert [item for chunk in chunks for item in chunk.pred] == eval_batch.pred
+    assert [item for chunk in chunks for item in chunk.target] == eval_batch.target
+
+
+def test_loader_iter_chunks_requires_jsonl() -> None:
+    with pytest.raises(ValueError, match="Only jsonl files"):
+        next(EvaluationBatch.iter_chunks(SAMPLE_JSON, chunk_size=2, record_format="json"))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"name": "cat", "age": 3}',
+        '  {"name": "cat", "age": 3}\n',
+        '```json\n{"name": "cat", "age": 3}\n```',
+        '```\n{"name": "cat", "age": 3}\n```\n',
+    ],
+    ids=["bare", "bare-whitespace", "fenced", "fenced-without-language"],
+)
+def test_parse_json_decodes_clean_json_without_tolerant_parser(
+    text: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fail(text: str) -> None:
+        raise AssertionError("tolerant parser shouldn't be used")
+
+    monkeypatch.setattr("langchain_core.utils.json.parse_json_markdown", fail)
+    assert parse_json(text) == {"name": "cat", "age": 3}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        'Here it is:\n```json\n{"name": "cat", "age": 3}\n```',
+        '```json\n{"name": "cat", "age": 3\n```',
+        '{"name": "cat", "age": 3',
+    ],
+    ids=["text-around-fence", "partial-fenced", "partial"],
+)
+def test_parse_json_falls_back_to_tolerant_parser(text: str) -> None:
+    assert parse_json(text) == {"name": "cat", "age": 3}
+
+
+def test_fast_json_falls_back_to_stdlib_decoder() -> None:
+    assert math.isnan(fast_json.loads(b'{"score": NaN}')["score"])
+    with pytest.raises(json.JSONDecodeError):
+        fast_json.loads("{")
+
+
+def write_records(path: Path, num_records: int) -> None:
+    with open(path, "w") as f:
+        for i in range(num_records):
+            record = {"pred": f"```yaml\nid: {i}\nname: item {i}\n```", "target": f"id: {i}"}
+            if i % 50 == 1:
+                record["pred"] = "id: [unclosed"
+            elif i % 50 == 2:
+                record["target"] = "- not a dict"
+            elif i % 50 == 3:
+                record["pred"] = "plain text"
+            f.write(json.dumps(record) + "\n")
+
+
+def test_parse_failures_are_collected(tmp_path: Path) -> None:
+    write_records(tmp_path / "records.jsonl", 10)
+    eval_batch = EvaluationBatch.from_json(tmp_path / "records.jsonl", record_format="yaml")
+
+    stats = eval_batch.parse_stats
+    assert (stats.num_records, stats.num_failed_records) == (10, 3)
+    assert (stats.num_failed_preds, stats.num_failed_targets) == (2, 1)
+    assert stats.failure_rate == 0.3
+    assert [(error.index, error.field) for error in stats.errors] == [
+        (1, "pred"),
+        (2, "target"),
+        (3, "pred"),
+    ]
+    assert stats.errors[1].message == "Expected dict, got list"
+    assert stats.errors[2].message == "Expected dict, got str"
+    # records which failed to parse are kept empty, in their positions
+    assert len(eval_batch.pred) == len(eval_batch.target) == 10
+    assert eval_batch.pred[1] == {}
+    assert eval_batch.pred[2] == eval_batch.target[2] == {}
+    assert eval_batch.target[3] == {"id": 3}
+    assert eval_batch.failed_targets == [2]
+
+
+def test_missing_key_is_an_error(tmp_path: Path) -> None:
+    write_records(tmp_path / "records.jsonl", 3)
+    with pytest.raises(KeyError, match="answer"):
+        EvaluationBatch.from_json(
+            tmp_path / "records.jsonl", record_format="yaml", pred_key="answer"
+        )
+
+
+def test_parallel_parsing_matches_serial(tmp_path: Path) -> None:
+    write_records(tmp_path / "records.jsonl", 500)
+    serial = EvaluationBatch.from_json(tmp_path / "records.jsonl", record_format="yaml")
+    parallel = EvaluationBatch.from_json(
+        tmp_path / "records.jsonl", record_format="yaml", workers=2
+    )
+    chunks = list(
+        EvaluationBatch.iter_chunks(
+            tmp_path / "records.jsonl",
+            chunk_size=200,
+            record_format="yaml",
+            skip_chunks=1,
+            workers=2,
+        )
+    )
+
+    assert parallel == serial
+    assert serial.parse_stats.num_failed_records == 30
+    assert [item for chunk in chunks for item in chunk.target] == serial.target[200:]
+    assert [error.index for error in chunks[0].parse_stats.errors][:3] == [201, 202, 203]
@@ -0,0 +1,146 @@
+import asyncio
+import pickle
+import time
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from structured_evals.rate_limiter import (
+    AdaptiveRateLimiter,
+    _get_retry_after,
+    _TokenBucket,
+    get_default_rate_limiter,
+)
+
+
+class ApiError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = Mock(headers=headers or {})
+
+
+async def _request(limiter: AdaptiveRateLimiter, error: Exception | None = None) -> None:
+    async with limiter.limit(num_tokens=10):
+        await asyncio.sleep(0.001)
+        if error is not None:
+            raise error
+
+
+async def _requests(limiter: AdaptiveRateLimiter, errors: list[Exception | None]) -> None:
+    await asyncio.gather(*[_request(limiter, err) for err in errors], return_exceptions=True)
+
+
+def test_concurrency_increases_on_success() -> None:
+    limiter = AdaptiveRateLimiter(initial_concurrency=4, max_concurrency=5)
+    asyncio.run(_requests(limiter, [None] * 4))
+    assert limiter.concurrency == pytest.approx(5.0, abs=0.1)
+
+    asyncio.run(_requests(limiter, [None] * 20))
+    assert limiter.concurrency == 5
+
+    stats = limiter.stats
+    assert stats.num_requests == 24
+    assert stats.num_tokens == 240
+    assert stats.requests_per_minute > 0
+
+
+def test_concurrency_decreases_once_per_wave_of_throttled_requests() -> None:
+    limiter = AdaptiveRateLimiter(initial_concurrency=16)
+    asyncio.run(_requests(limiter, [ApiError(429, {"retry-after-ms": "1"})] * 16))
+    assert limiter.concurrency == 8
+    assert limiter.stats.num_throttled == 16
+
+    asyncio.run(_requests(limiter, [ApiError(503, {"retry-after": "0"})] * 3))
+    assert limiter.concurrency == 4
+
+
+def test_client_errors_dont_change_concurrency() -> None:
+    limiter = AdaptiveRateLimiter(initial_concurrency=4)
+    asyncio.run(_requests(limiter, [ApiError(400), ValueError("invalid")]))
+
+    assert limiter.concurrency == 4
+    assert limiter.stats.num_failed == 2
+
+
+def test_concurrency_is_limited() -> None:
+    limiter = AdaptiveRateLimiter(initial_concurrency=3, max_concurrency=3)
+    in_flight = max_in_flight = 0
+
+    async def request() -> None:
+        nonlocal in_flight, max_in_flight
+        async with limiter.limit():
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*[request() for _ in range(20)])
+
+    asyncio.run(run())
+    assert max_in_flight == 3
+
+
+def test_retry_after_pauses_all_requests() -> None:
+    limiter = AdaptiveRateLimiter(initial_concurrency=4)
+    asyncio.run(_requests(limiter, [ApiError(429, {"retry-after": "0.2"})]))
+
+    start = time.perf_counter()
+    asyncio.run(_requests(limiter, [None] * 4))
+    assert time.perf_counter() - start >= 0.15
+
+
+def test_token_bucket() -> None:
+    bucket = _TokenBucket(per_minute=60)
+    now = bucket.updated
+
+    assert bucket.get_delay(60, now) == 0
+    bucket.consume(50, now)
+    assert bucket.get_delay(20, now) == pytest.approx(10)
+    assert bucket.get_delay(20, now + 10) == pytest.approx(0)
+    # requests above capacity wait for the full bucket instead of forever
+    assert bucket.get_delay(1_000, now) == pytest.approx(50)
+
+
+def test_requests_per_minute_budget() -> None:
+    limiter = AdaptiveRateLimiter(requests_per_minute=600)
+    assert limiter._request_bucket is not None
+    limiter._request_bucket.tokens = 0
+
+    start = time.perf_counter()
+    asyncio.run(_requests(limiter, [None] * 2))
+    # 10 requests per second are refilled
+    assert time.perf_counter() - start >= 0.15
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, None),
+        ({"retry-after": "3"}, 3.0),
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"retry-after": "invalid"}, None),
+    ],
+)
+def test_get_retry_after(headers: dict[str, Any], expected: float | None) -> None:
+    assert _get_retry_after(ApiError(429, headers)) == expected
+
+
+def test_pickle() -> None:
+    limiter = AdaptiveRateLimiter(requests_per_minute=100)
+    asyncio.run(_requests(limiter, [None]))
+
+    restored = pickle.loads(pickle.dumps(limiter))
+    asyncio.run(_requests(restored, [None]))
+
+    assert restored.stats.num_requests == 2
+
+
+def test_default_rate_limiter_is_keyed_by_budgets() -> None:
+    limiter = get_default_rate_limiter(requests_per_minute=100)
+    assert get_default_rate_limiter(requests_per_minute=100) is limiter
+    other = get_default_rate_limiter(requests_per_minute=200)
+    assert other is not limiter
+    assert (limiter.requests_per_minute, other.requests_per_minute) == (100, 200)
@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from structured_evals.eval_batch import BatchDictEval, BatchDictEvalOutput
+from structured_evals.eval_primitive import DateEval, NumEval
+from structured_evals.loader import EvaluationBatch
+from structured_evals.raw_scores import ParquetRawScoresFile, write_raw_scores
+from structured_evals.streaming import evaluate_streaming
+
+SAMPLE_JSONL = "data/sample.jsonl"
+
+
+@pytest.fixture
+def evaluator() -> BatchDictEval:
+    return BatchDictEval(eval_mapping={"name": NumEval(), "age": NumEval(), "birthday": DateEval()})
+
+
+@pytest.fixture
+def outs(evaluator: BatchDictEval) -> BatchDictEvalOutput:
+    eval_batch = EvaluationBatch.from_json(SAMPLE_JSONL, record_format="json")
+    return evaluator(eval_batch.pred, eval_batch.target)
+
+
+def test_jsonl_raw_scores(outs: BatchDictEvalOutput, tmp_path: Path) -> None:
+    write_raw_scores(outs, tmp_path / "raw.jsonl", "jsonl")
+
+    with open(tmp_path / "raw.jsonl") as f:
+        raw_scores = [json.loads(line) for line in f]
+    assert raw_scores == [item.model_dump() for item in outs.item_results]
+
+
+def test_parquet_raw_scores(
+    evaluator: BatchDictEval, outs: BatchDictEvalOutput, tmp_path: Path
+) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    chunks = EvaluationBatch.iter_chunks(SAMPLE_JSONL, chunk_size=2, record_format="json")
+    report = evaluate_streaming(
+        evaluator, chunks, raw_scores_path=tmp_path / "raw.parquet", raw_scores_format="parquet"
+    )
+
+    table = pq.read_table(tmp_path / "raw.parquet")
+    assert report.raw_scores_path == str(tmp_path / "raw.parquet")
+    assert table.column_names == [
+        "name",
+        "name.missing",
+        "age",
+        "age.missing",
+        "birthday",
+        "birthday.missing",
+        "num_extra_keys",
+    ]
+    assert pq.ParquetFile(tmp_path / "raw.parquet").num_row_groups == 2
+    for j, key in enumerate(outs.schema_keys):
+        assert table[key].to_pylist() == outs.score_matrix[:, j].tolist()
+        assert table[f"{key}.missing"].to_pylist() == outs.missing_mask[:, j].tolist()
+    assert table["num_extra_keys"].to_pylist() == outs.num_extra_keys_per_item.tolist()
+
+
+def test_parquet_raw_scores_cant_be_resumed(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="can't be resumed"):
+        ParquetRawScoresFile(tmp_path / "raw.parquet", offset=10)
+
+
+def test_streaming_without_raw_scores(evaluator: BatchDictEval) -> None:
+    chunks = EvaluationBatch.iter_chunks(SAMPLE_JSONL, chunk_size=2, record_format="json")
+    report = evaluate_streaming(evaluator, chunks)
+
+    assert report.num_items == 3
+    assert report.raw_scores is None and report.raw_scores_path is None
@@ -0,0 +1,129 @@
+import functools
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from structured_evals.base import ColumnEvalOutput
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_list import ListEval
+from structured_evals.eval_primitive import NumEval
+from structured_evals.eval_text import ChrfEval, EvalTextualMetric
+from structured_evals.result_store import ResultStore
+
+
+class CountingChrfEval(ChrfEval):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        # private, as public attributes are part of the fingerprint
+        self._num_evaluated = 0
+
+    def evaluate_column(self, pred: list[Any], target: list[Any]) -> ColumnEvalOutput:
+        self._num_evaluated += len(pred)
+        return super().evaluate_column(pred, target)
+
+
+PRED = [
+    {"name": "alpha", "age": 1, "tags": ["a"]},
+    {"name": "beta", "age": 2, "tags": ["b"]},
+    {"name": "gamma", "age": 3, "tags": ["c", "d"]},
+]
+TARGET = [
+    {"name": "alpha", "age": 1, "tags": ["a"]},
+    {"name": "bet", "age": 3, "tags": ["b"]},
+    {"name": "gamma ray", "age": 3, "tags": ["c"]},
+]
+
+
+def make_evaluator(store: ResultStore, n_char_order: int = 6) -> BatchDictEval:
+    return BatchDictEval(
+        eval_mapping={
+            "name": CountingChrfEval(n_char_order=n_char_order),
+            "age": NumEval(),
+            "tags": ListEval(ChrfEval()),
+        },
+        result_store=store,
+    )
+
+
+def test_unchanged_pairs_are_reused(tmp_path: Path) -> None:
+    expected = make_evaluator(ResultStore(tmp_path / "results.db"))(PRED, TARGET)
+
+    store = ResultStore(tmp_path / "results.db")
+    evaluator = make_evaluator(store)
+    pred = [dict(item) for item in PRED]
+    pred[1]["name"] = "beta version"
+    outs = evaluator(pred, TARGET)
+
+    assert evaluator.eval_mapping["name"]._num_evaluated == 1  # type: ignore[attr-defined]
+    assert store.stats.reused == {"name": 2, "age": 3, "tags": 3}
+    assert store.stats.recomputed == {"name": 1, "age": 0, "tags": 0}
+    assert outs.item_results[0] == expected.item_results[0]
+    assert outs.item_results[2] == expected.item_results[2]
+    assert outs.scores["name"][1] != expected.scores["name"][1]
+
+
+def test_changed_evaluator_configuration_invalidates_results(tmp_path: Path) -> None:
+    make_evaluator(ResultStore(tmp_path / "results.db"))(PRED, TARGET)
+
+    store = ResultStore(tmp_path / "results.db")
+    evaluator = make_evaluator(store, n_char_order=3)
+    evaluator(PRED, TARGET)
+
+    assert evaluator.eval_mapping["name"]._num_evaluated == 3  # type: ignore[attr-defined]
+    assert store.stats.model_dump() == {
+        "reused": {"name": 0, "age": 3, "tags": 3},
+        "recomputed": {"name": 3, "age": 0, "tags": 0},
+        "num_reused": 6,
+        "num_recomputed": 3,
+    }
+
+
+def test_fingerprint_depends_on_configuration() -> None:
+    assert ChrfEval().fingerprint == ChrfEval().fingerprint
+    assert ChrfEval().fingerprint != ChrfEval(beta=1).fingerprint
+    assert ListEval(NumEval()).fingerprint != ListEval(ChrfEval()).fingerprint
+
+
+def test_fingerprint_depends_on_metric_function() -> None:
+    def make_scaled(scale: float) -> EvalTextualMetric:
+        return EvalTextualMetric(lambda p, t: scale * (p == t), "scaled")
+
+    def length_ratio(p: str, t: str, exponent: int) -> float:
+        return float((len(p) / len(t)) ** exponent)
+
+    def fingerprint(metric_fn: Any) -> str | None:
+        return EvalTextualMetric(metric_fn, "metric").fingerprint
+
+    assert fingerprint(lambda p, t: float(p == t)) != fingerprint(lambda p, t: float(p != t))
+    assert fingerprint(lambda p, t: float(p == t)) == fingerprint(lambda p, t: float(p == t))
+    assert make_scaled(1.0).fingerprint == make_scaled(1.0).fingerprint
+    assert make_scaled(1.0).fingerprint != make_scaled(0.5).fingerprint
+    assert fingerprint(functools.partial(length_ratio, exponent=1)) != fingerprint(
+        functools.partial(length_ratio, exponent=2)
+    )
+
+
+def test_evaluator_with_opaque_parameter_bypasses_store(tmp_path: Path) -> None:
+    metric = EvalTextualMetric(lambda p, t: float(p == t), "exact")
+    metric.lock = threading.Lock()  # type: ignore[attr-defined]
+    assert metric.fingerprint is None
+    assert ListEval(metric).fingerprint is None
+
+    store = ResultStore(tmp_path / "results.db")
+    evaluator = BatchDictEval(
+        eval_mapping={"name": metric, "age": NumEval(), "tags": ListEval(metric)},
+        result_store=store,
+    )
+    evaluator(PRED, TARGET)
+    evaluator(PRED, TARGET)
+
+    assert store.stats.reused == {"age": 3}
+    assert store.stats.recomputed == {"age": 3}
+
+
+def test_hash_value_depends_on_type_of_non_json_values() -> None:
+    assert ResultStore.hash_value(date(2021, 1, 1)) != ResultStore.hash_value("2021-01-01")
+    assert ResultStore.hash_value({"a": date(2021, 1, 1)}) == ResultStore.hash_value(
+        {"a": date(2021, 1, 1)}
+    )
@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from typer.testing import CliRunner
+
+from structured_evals.aggregations import AverageAggregation
+from structured_evals.cli import app
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_primitive import DateEval, NumEval
+from structured_evals.loader import EvaluationBatch
+from structured_evals.report import EvaluationReport
+from structured_evals.sharding import ShardReport, get_shard_range, merge_shard_reports
+
+SAMPLE_JSON = "data/sample.json"
+SAMPLE_JSONL = "data/sample.jsonl"
+EVAL_ARGS = ["--pred-key", "pred", "--target-key", "target", "--text-evaluator", "ngram"]
+
+
+def test_shards_cover_all_records() -> None:
+    shards = [get_shard_range(10, i, 3) for i in range(3)]
+    assert shards == [range(0, 3), range(3, 6), range(6, 10)]
+    assert get_shard_range(2, 3, 4) == range(1, 2)
+    with pytest.raises(ValueError, match="Shard index"):
+        get_shard_range(10, 3, 3)
+
+
+def evaluate_shard(records: range, shard_index: int, num_shards: int) -> ShardReport:
+    evaluator = BatchDictEval(
+        eval_mapping={"name": NumEval(), "age": NumEval(), "birthday": DateEval()}
+    )
+    eval_batch = EvaluationBatch.from_json(SAMPLE_JSON, record_format="json", records=records)
+    report = EvaluationReport.from_batch_dict_eval_output(
+        evaluator(eval_batch.pred, eval_batch.target), aggregation=AverageAggregation()
+    )
+    return ShardReport(
+        **dict(report),
+        shard_index=shard_index,
+        num_shards=num_shards,
+        start=records.start,
+        stop=records.stop,
+    )
+
+
+def test_merge_shard_reports() -> None:
+    expected = evaluate_shard(range(0, 3), 0, 1)
+    shards = [evaluate_shard(get_shard_range(3, i, 2), i, 2) for i in [1, 0]]
+
+    report = merge_shard_reports(shards)
+    assert report.num_items == 3
+    assert report.raw_scores == expected.raw_scores
+    for agg_name, agg_scores in expected.aggregated_scores.items():
+        assert pytest.approx(agg_scores) == report.aggregated_scores[agg_name]
+
+    with pytest.raises(ValueError, match="exactly once"):
+        merge_shard_reports(shards[:1])
+    with pytest.raises(ValueError, match="consecutive"):
+        merge_shard_reports([shards[1], evaluate_shard(range(2, 3), 1, 2)])
+
+
+def run_cli(*args: str | Path) -> None:
+    result = CliRunner().invoke(app, [str(arg) for arg in args])
+    assert result.exit_code == 0, result.output
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("extra_args", [[], ["--stream", "--chunk-size", "1"]], ids=str)
+def test_cli_sharded_run_matches_single_run(extra_args: list[str], tmp_path: Path) -> None:
+    predictions_file = tmp_path / "sample.jsonl"
+    predictions_file.write_text(Path(SAMPLE_JSONL).read_text())
+
+    run_cli("eval-from-predictions", predictions_file, "-o", tmp_path / "single.json", *EVAL_ARGS)
+    shard_files = [tmp_path / "shards" / f"shard-{i}.json" for i in range(2)]
+    for i, shard_file in enumerate(shard_files):
+        run_cli(
+            "eval-from-predictions",
+            predictions_file,
+            "-o",
+            shard_file,
+            "--shard-index",
+            str(i),
+            "--num-shards",
+            "2",
+            *EVAL_ARGS,
+            *extra_args,
+        )
+    run_cli("merge", *shard_files, "-o", tmp_path / "merged.json")
+
+    single, merged = load_results(tmp_path / "single.json"), load_results(tmp_path / "merged.json")
+    assert "aggregation_state" not in merged
+    assert load_results(shard_files[1])["aggregation_state"]["num_items"] == 2
+    single_scores, merged_scores = single.pop("aggregated_scores"), merged.pop("aggregated_scores")
+    for agg_name, agg_scores in single_scores.items():
+        assert pytest.approx(agg_scores) == merged_scores[agg_name]
+    if extra_args:
+        assert merged.pop("raw_scores_path") == str(tmp_path / "merged.raw.jsonl")
+        assert (tmp_path / "merged.raw.jsonl").read_text() == "".join(
+            (tmp_path / "shards" / f"shard-{i}.raw.jsonl").read_text() for i in range(2)
+        )
+    else:
+        assert single == merged
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from structured_evals.aggregations import AverageAggregation
+from structured_evals.eval_batch import BatchDictEval
+from structured_evals.eval_primitive import DateEval, NumEval
+from structured_evals.loader import EvaluationBatch
+from structured_evals.report import EvaluationReport
+from structured_evals.streaming import evaluate_streaming
+
+SAMPLE_JSONL = "data/sample.jsonl"
+
+
+@pytest.fixture
+def evaluator() -> BatchDictEval:
+    return BatchDictEval(eval_mapping={"name": NumEval(), "age": NumEval(), "birthday": DateEval()})
+
+
+def test_streaming_matches_in_memory_evaluation(evaluator: BatchDictEval, tmp_path: Path) -> None:
+    eval_batch = EvaluationBatch.from_json(SAMPLE_JSONL, record_format="json")
+    expected = EvaluationReport.from_batch_dict_eval_output(
+        evaluator(eval_batch.pred, eval_batch.target), aggregation=AverageAggregation()
+    )
+
+    raw_scores_path = tmp_path / "raw.jsonl"
+    chunks = EvaluationBatch.iter_chunks(SAMPLE_JSONL, chunk_size=2, record_format="json")
+    report = evaluate_streaming(evaluator, chunks, raw_scores_path=raw_scores_path, queue_size=1)
+
+    assert report.num_items == expected.num_items == 3
+    assert report.raw_scores is None
+    for agg_name, agg_scores in expected.aggregated_scores.items():
+        assert pytest.approx(agg_scores) == report.aggregated_scores[agg_name]
+
+    with open(raw_scores_path) as f:
+        raw_scores = [json.loads(line) for line in f]
+    assert expected.raw_scores is not None
+    assert raw_scores == [item.model_dump() for item in expected.raw_scores]
+
+
+def test_streaming_propagates_parsing_errors(evaluator: BatchDictEval) -> None:
+    def failing_chunks():  # type: ignore[no-untyped-def]
+        yield from EvaluationBatch.iter_chunks(SAMPLE_JSONL, chunk_size=1, record_format="json")
+        raise RuntimeError("corrupted file")
+
+    with pytest.raises(RuntimeError, match="corrupted file"):
+        evaluate_streaming(evaluator, failing_chunks())
+
+
+def test_records_with_unparsable_target_are_not_aggregated(
+    evaluator: BatchDictEval, tmp_path: Path
+) -> None:
+    records = [json.loads(line) for line in Path(SAMPLE_JSONL).read_text().splitlines()]
+    with open(tmp_path / "records.jsonl", "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            f.write(json.dumps({**record, "target": "not json"}) + "\n")
+    eval_batch = EvaluationBatch.from_json(tmp_path / "records.jsonl", record_format="json")
+    assert eval_batch.failed_targets == [1, 3, 5]
+
+    valid_batch = EvaluationBatch.from_json(SAMPLE_JSONL, record_format="json")
+    expected = EvaluationReport.from_batch_dict_eval_output(
+        evaluator(valid_batch.pred, valid_batch.target), aggregation=AverageAggregation()
+    )
+    report = EvaluationReport.from_batch_dict_eval_output(
+        evaluator(eval_batch.pred, eval_batch.target),
+        aggregation=AverageAggregation(),
+        excluded_items=eval_batch.failed_targets,
+    )
+    chunks = EvaluationBatch.iter_chunks(
+        tmp_path / "records.jsonl", chunk_size=4, record_format="json"
+    )
+    streamed = evaluate_streaming(evaluator, chunks, raw_scores_path=tmp_path / "raw.jsonl")
+
+    assert report.num_items == streamed.num_items == expected.num_items == 3
+    for agg_name, agg_scores in expected.aggregated_scores.items():
+        assert pytest.approx(agg_scores) == report.aggregated_scores[agg_name]
+        assert pytest.approx(agg_scores) == streamed.aggregated_scores[agg_name]
+    # raw scores keep a row for every record
+    assert report.raw_scores is not None and len(report.raw_scores) == 6
+    assert len((tmp_path / "raw.jsonl").read_text().splitlines()) == 6